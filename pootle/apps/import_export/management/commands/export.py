@@ -8,16 +8,30 @@
 
 import os
 os.environ["DJANGO_SETTINGS_MODULE"] = "pootle.settings"
-from zipfile import ZipFile
+from itertools import imap
 
 from django.core.management.base import CommandError
 
+from pootle.core.utils.db import get_pool
 from pootle_app.management.commands import PootleCommand
 from pootle_language.models import Language
 from pootle_project.models import Project
 from pootle_store.models import Store
+from pootle_translationproject.models import TranslationProject
 
-from ...utils import TPTMXExporter
+from ...utils import StoreZipExporter, TPTMXExporter
+
+
+def _export_tmx(args):
+    """Export the TMX for a TP, and return the TP's name with the exported
+    and removed files
+    """
+    tp, rotate, incremental = args
+    tp = TranslationProject.objects.select_related(
+        "language", "project__source_language").get(pk=tp)
+    filename, removed = TPTMXExporter(tp).export(
+        rotate=rotate, incremental=incremental)
+    return unicode(tp), filename, removed
 
 
 class Command(PootleCommand):
@@ -53,16 +67,67 @@ class Command(PootleCommand):
             default=False,
             help="Remove old exported TMX files",
         )
+        parser.add_argument(
+            "--workers",
+            action="store",
+            type=int,
+            default=1,
+            help="Number of processes to export TMX files with",
+        )
 
     def _create_zip(self, stores, prefix):
         with open("%s.zip" % (prefix), "wb") as f:
-            with ZipFile(f, "w") as zf:
-                for store in stores:
-                    zf.writestr(prefix + store.pootle_path, store.serialize())
+            for chunk in StoreZipExporter(stores, prefix).iterzip():
+                f.write(chunk)
 
         self.stdout.write("Created %s\n" % (f.name))
 
+    @property
+    def tp_qs(self):
+        tps = TranslationProject.objects.live().exclude(
+            project__disabled=True)
+        if self.projects:
+            tps = tps.filter(project__code__in=self.projects)
+        if self.languages:
+            tps = tps.filter(language__code__in=self.languages)
+        return tps.order_by("project__code", "language__code")
+
+    def write_tmx_export(self, tp, filename, removed):
+        if filename is None:
+            self.stdout.write(
+                'Translation project (%s) has not been changed.' % tp)
+            return
+        self.stdout.write('File "%s" has been saved.' % filename)
+        for filename in removed:
+            self.stdout.write('File "%s" has been removed.' % filename)
+
+    def export_tmx_parallel(self, workers, **options):
+        tps = [
+            (tp, options["rotate"], not options["overwrite"])
+            for tp
+            in self.tp_qs.values_list("pk", flat=True)]
+        pool = get_pool(workers)
+        try:
+            exports = (
+                pool.imap_unordered(_export_tmx, tps)
+                if pool
+                else imap(_export_tmx, tps))
+            for exported in exports:
+                self.write_tmx_export(*exported)
+            if pool:
+                pool.close()
+        except BaseException:
+            if pool:
+                pool.terminate()
+            raise
+        finally:
+            if pool:
+                pool.join()
+
     def handle_all(self, **options):
+        if options['export_tmx'] and options['workers'] > 1:
+            return self.export_tmx_parallel(**options)
+
         if options['pootle_path'] is not None:
             return self.handle_path(options['pootle_path'])
 
@@ -82,17 +147,10 @@ class Command(PootleCommand):
 
     def handle_translation_project(self, translation_project, **options):
         if options['export_tmx']:
-            exporter = TPTMXExporter(translation_project)
-            if not options['overwrite'] and exporter.file_exists():
-                self.stdout.write(
-                    'Translation project (%s) has not been changed.' %
-                    translation_project)
-                return False
-
-            filename, removed = exporter.export(rotate=options['rotate'])
-            self.stdout.write('File "%s" has been saved.' % filename)
-            for filename in removed:
-                self.stdout.write('File "%s" has been removed.' % filename)
+            filename, removed = TPTMXExporter(translation_project).export(
+                rotate=options['rotate'],
+                incremental=not options['overwrite'])
+            self.write_tmx_export(translation_project, filename, removed)
         else:
             stores = translation_project.stores.live()
             prefix = "%s-%s" % (translation_project.project.code,
@@ -119,7 +177,8 @@ class Command(PootleCommand):
         if stores.count() == 1:
             store = stores.get()
             with open(os.path.basename(store.pootle_path), "wb") as f:
-                f.write(store.serialize())
+                for chunk in store.serialize_stream():
+                    f.write(chunk)
 
             self.stdout.write("Created '%s'" % (f.name))
             return
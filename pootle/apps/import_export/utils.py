@@ -8,7 +8,10 @@
 
 import logging
 import os
+import tempfile
+from hashlib import md5
 from io import BytesIO
+from itertools import islice
 from zipfile import ZipFile
 
 from translate.storage import tmx
@@ -20,10 +23,12 @@ from django.utils.functional import cached_property
 from pootle.core.delegate import revision
 from pootle.core.url_helpers import urljoin
 from pootle.i18n.gettext import ugettext_lazy as _
+from pootle_app.models import Directory
 from pootle_app.models.permissions import check_user_permission
 from pootle_statistics.models import SubmissionTypes
 from pootle_store.constants import TRANSLATED
-from pootle_store.models import Store
+from pootle_store.models import Store, Unit
+from pootle_store.updater import update_stores
 
 from .exceptions import (FileImportError, MissingPootlePathError,
                          MissingPootleRevError, UnsupportedFiletypeError)
@@ -31,8 +36,14 @@ from .exceptions import (FileImportError, MissingPootlePathError,
 
 logger = logging.getLogger(__name__)
 
+# number of units converted to TMX at a time when exporting
+TMX_CHUNK_SIZE = 500
 
-def import_file(f, user=None):
+
+def get_import_update(f, user=None):
+    """Parses an uploaded file, and returns a ``(store, ttk, update_kwargs)``
+    tuple for updating the ``Store`` that the file was exported from.
+    """
     ttk = getclass(f)(f.read())
     if not hasattr(ttk, "parseheader"):
         raise UnsupportedFiletypeError(_("Unsupported filetype '%s', only PO "
@@ -65,17 +76,264 @@ def import_file(f, user=None):
                               and check_user_permission(user,
                                                         'administrate',
                                                         tp.directory))
+    return (
+        store,
+        ttk,
+        dict(user=user,
+             submission_type=SubmissionTypes.UPLOAD,
+             store_revision=rev,
+             allow_add_and_obsolete=allow_add_and_obsolete))
+
+
+def import_files(files, user=None):
+    """Imports the uploaded ``files`` in one batch, so that stats, checks,
+    scores and revisions are only updated once for each translation project.
+    """
+    updates = [get_import_update(f, user=user) for f in files]
     try:
-        store.update(store=ttk, user=user,
-                     submission_type=SubmissionTypes.UPLOAD,
-                     store_revision=rev,
-                     allow_add_and_obsolete=allow_add_and_obsolete)
+        update_stores(updates)
     except Exception as e:
         # This should not happen!
         logger.error("Error importing file: %s", str(e))
         raise FileImportError(_("There was an error uploading your file"))
 
 
+def import_file(f, user=None):
+    import_files([f], user=user)
+
+
+class ZipStream(object):
+    """A write-only file for ``ZipFile``, which keeps the data written to it
+    until it is taken with ``pop``.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.chunks = []
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.position += len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = "".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class StoreZipExporter(object):
+    """Exports stores as a zip file, serializing them one at a time.
+
+    If a ``directory`` is given, the zip is saved in
+    ``POOTLE_EXPORTS_DIRECTORY`` as it is exported, named after the revision
+    of the directory, so that it is served from disk until the directory
+    changes.
+    """
+
+    def __init__(self, stores, prefix, directory=None):
+        self.stores = stores
+        self.prefix = prefix
+        self.directory = directory
+
+    @property
+    def filename(self):
+        return "%s.zip" % self.prefix
+
+    @property
+    def exports_directory(self):
+        return settings.POOTLE_EXPORTS_DIRECTORY
+
+    @cached_property
+    def revision(self):
+        if self.directory is None:
+            return None
+        return revision.get(Directory)(self.directory).get(key="stats")
+
+    @property
+    def cached_path(self):
+        if not (self.exports_directory and self.revision):
+            return None
+        return os.path.join(
+            self.exports_directory,
+            "%s.%s.zip" % (self.prefix, self.revision))
+
+    @property
+    def job_id(self):
+        """Identifies the background job that saves the zip for the current
+        revision of the directory.
+        """
+        if self.cached_path is None:
+            return None
+        return (
+            "import_export.zip.%s"
+            % md5(self.cached_path.encode("utf-8")).hexdigest())
+
+    def get_cached(self):
+        """Returns the path of the saved zip for the current revision of the
+        directory, if it exists.
+        """
+        path = self.cached_path
+        if path is not None and os.path.exists(path):
+            return path
+
+    def iterzip(self):
+        """Yields the zip in chunks, one for each store"""
+        stream = ZipStream()
+        with ZipFile(stream, "w", allowZip64=True) as zf:
+            for store in self.stores.iterator():
+                try:
+                    data = store.serialize()
+                except Exception as e:
+                    logger.error("Could not serialize %r: %s",
+                                 store.pootle_path, e)
+                    continue
+                zf.writestr(self.prefix + store.pootle_path, data)
+                yield stream.pop()
+        yield stream.pop()
+
+    def remove_stale(self, path):
+        start = "%s." % self.prefix
+        for filename in os.listdir(self.exports_directory):
+            stale = (
+                filename.startswith(start)
+                and filename.endswith(".zip")
+                and "." not in filename[len(start):-len(".zip")])
+            filepath = os.path.join(self.exports_directory, filename)
+            if stale and filepath != path:
+                os.remove(filepath)
+
+    def stream(self):
+        """Yields the zip in chunks, and saves it once it is complete.
+
+        The zip is written to a temporary file first, so that an export
+        that is not completed is never served.
+        """
+        path = self.cached_path
+        if path is None:
+            for chunk in self.iterzip():
+                yield chunk
+            return
+        if not os.path.exists(self.exports_directory):
+            os.makedirs(self.exports_directory)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.exports_directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self.iterzip():
+                    f.write(chunk)
+                    yield chunk
+            os.rename(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.remove_stale(path)
+
+    def export(self):
+        """Saves the zip unless it is up to date, and returns its path"""
+        if self.cached_path is None:
+            return None
+        if not self.get_cached():
+            for chunk in self.stream():
+                pass
+        return self.cached_path
+
+
+def get_path_exporter(path):
+    stores = Store.objects.live().select_related(
+        "data",
+        "filetype__extension",
+        "translation_project",
+        "translation_project__project",
+        "translation_project__language").filter(pootle_path__startswith=path)
+    prefix = path.strip("/").replace("/", "-")
+    if not prefix:
+        prefix = "export"
+    return StoreZipExporter(
+        stores,
+        prefix,
+        directory=Directory.objects.filter(pootle_path=path).first())
+
+
+def export_zip(path):
+    """Saves the zip export of ``path``, for running as a background job"""
+    return get_path_exporter(path).export()
+
+
+def enqueue_export_zip(queue, path, exporter=None):
+    """Enqueues a job saving the zip export of ``path``, unless a job saving
+    the zip for the same revision is already queued or running.
+    """
+    exporter = exporter or get_path_exporter(path)
+    job = queue.fetch_job(exporter.job_id)
+    if job is not None and (job.is_queued or job.is_started):
+        return job
+    return queue.enqueue(export_zip, path, job_id=exporter.job_id)
+
+
+class TMXStream(object):
+    """Serializes translations as a TMX document in chunks, so that only
+    ``chunk_size`` translations are converted and held in memory at a time.
+
+    :param translations: iterable of ``(source, target, comment)``
+    """
+
+    def __init__(self, translations, source_language, target_language,
+                 chunk_size=None):
+        self.translations = translations
+        self.source_language = source_language
+        self.target_language = target_language
+        self.chunk_size = chunk_size or TMX_CHUNK_SIZE
+
+    @property
+    def chunks(self):
+        translations = iter(self.translations)
+        while True:
+            chunk = list(islice(translations, self.chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+    def tostring(self, tmxfile):
+        bs = BytesIO()
+        tmxfile.serialize(bs)
+        return bs.getvalue()
+
+    def get_units(self, chunk):
+        """Returns the serialized ``<tu>`` elements for a chunk of
+        translations.
+        """
+        tmxfile = tmx.tmxfile()
+        for source, target, comment in chunk:
+            tmxfile.addtranslation(source, self.source_language,
+                                   target, self.target_language,
+                                   comment)
+        document = self.tostring(tmxfile)
+        body = document[
+            document.index("<body>") + len("<body>"):
+            document.rindex("</body>")]
+        # strip the indentation of the closing tag
+        return body[:body.rindex("\n")]
+
+    def __iter__(self):
+        head, tail = self.tostring(tmx.tmxfile()).split("<body/>")
+        empty = True
+        for chunk in self.chunks:
+            if empty:
+                yield head + "<body>"
+                empty = False
+            yield self.get_units(chunk)
+        if empty:
+            yield head + "<body/>" + tail
+        else:
+            yield "\n%s</body>%s" % (head[head.rindex("\n") + 1:], tail)
+
+
 class TPTMXExporter(object):
 
     def __init__(self, context):
@@ -152,25 +410,62 @@ class TPTMXExporter(object):
     def abs_filepath(self):
         return os.path.join(self.directory, self.filename)
 
-    def export(self, rotate=False):
-        source_language = self.context.project.source_language.code
-        target_language = self.context.language.code
-
+    @property
+    def translations(self):
+        """Returns the translated units of the live stores with a single
+        query, which is read with a server-side cursor where supported.
+        """
+        return Unit.objects.filter(
+            store__translation_project=self.context,
+            store__obsolete=False,
+            state=TRANSLATED).order_by(
+                "store__pootle_path",
+                "index").values_list(
+                    "source_f",
+                    "target_f",
+                    "developer_comment").iterator()
+
+    def write(self):
+        """Writes the TMX to a temporary file, and then stores it in the zip.
+
+        Both files are written in the export directory and the zip is moved
+        into place once it is complete, so only a complete export is ever
+        served.
+        """
+        stream = TMXStream(
+            self.translations,
+            self.context.project.source_language.code,
+            self.context.language.code)
+        fd, tmx_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        zip_path = "%s.tmp" % self.abs_filepath
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in stream:
+                    f.write(chunk)
+            with ZipFile(zip_path, "w") as zf:
+                zf.write(tmx_path, self.filename.rstrip('.zip'))
+            os.rename(zip_path, self.abs_filepath)
+        finally:
+            for path in [tmx_path, zip_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def export(self, rotate=False, incremental=False):
+        """Exports the TMX, and returns a tuple of the exported file and a
+        list of the files that were removed if ``rotate`` is set.
+
+        If ``incremental`` is set and the TP has not changed since it was
+        exported, the previous export is kept and ``(None, [])`` is
+        returned.
+        """
         if not os.path.exists(self.directory):
             os.makedirs(self.directory)
 
-        tmxfile = tmx.tmxfile()
-        for store in self.context.stores.live().iterator():
-            for unit in store.units.filter(state=TRANSLATED):
-                tmxfile.addtranslation(unit.source, source_language,
-                                       unit.target, target_language,
-                                       unit.developer_comment)
+        if incremental and self.file_exists():
+            self.update_exported_revision()
+            return None, []
 
-        bs = BytesIO()
-        tmxfile.serialize(bs)
-        with open(self.abs_filepath, "wb") as f:
-            with ZipFile(f, "w") as zf:
-                zf.writestr(self.filename.rstrip('.zip'), bs.getvalue())
+        self.write()
 
         last_exported_filepath = self.last_exported_file_path
         self.update_exported_revision()
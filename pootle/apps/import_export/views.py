@@ -6,41 +6,57 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
-import logging
 import os
-from io import BytesIO
 from zipfile import ZipFile, is_zipfile
 
+from django_rq.queues import get_queue
+
 from django.contrib.auth import get_user_model
-from django.http import Http404, HttpResponse
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse)
 from django.shortcuts import redirect
 
 from pootle.core.delegate import language_team
 from pootle.core.views.base import PootleDetailView
 from pootle_app.models.permissions import check_permission
-from pootle_store.models import Store
 from pootle_translationproject.views import TPDirectoryMixin
 
 from .forms import UploadForm
-from .utils import TPTMXExporter, import_file
+from .utils import (
+    TPTMXExporter, enqueue_export_zip, get_path_exporter, import_file,
+    import_files)
 
 
 def download(contents, name, content_type):
-    response = HttpResponse(contents, content_type=content_type)
+    if isinstance(contents, basestring):
+        response_class = HttpResponse
+    elif hasattr(contents, "read"):
+        response_class = FileResponse
+    else:
+        response_class = StreamingHttpResponse
+    response = response_class(contents, content_type=content_type)
     response["Content-Disposition"] = "attachment; filename=%s" % (name)
     return response
 
 
+def zipped_files(zf, valid_extensions):
+    for path in zf.namelist():
+        if path.endswith("/"):
+            # is a directory
+            continue
+        ext = os.path.splitext(path)[1].strip(".")
+        if ext not in valid_extensions:
+            continue
+        with zf.open(path, "r") as f:
+            yield f
+
+
 def export(request):
     path = request.GET.get("path")
     if not path:
         raise Http404
-    stores = Store.objects.live().select_related(
-        "data",
-        "filetype__extension",
-        "translation_project",
-        "translation_project__project",
-        "translation_project__language").filter(pootle_path__startswith=path)
+    exporter = get_path_exporter(path)
+    stores = exporter.stores
     num_items = stores.count()
 
     if not num_items:
@@ -48,28 +64,26 @@ def export(request):
 
     if num_items == 1:
         store = stores.get()
-        contents = BytesIO(store.serialize())
         name = os.path.basename(store.pootle_path)
-        contents.seek(0)
-        return download(contents.read(), name, "application/octet-stream")
+        return download(
+            store.serialize_stream(),
+            name,
+            "application/octet-stream")
+
+    cached = exporter.get_cached()
+    if cached:
+        return download(
+            open(cached, "rb"),
+            exporter.filename,
+            "application/zip")
+
+    if request.GET.get("background") and exporter.cached_path:
+        # the zip is served once the job has saved it
+        enqueue_export_zip(get_queue("default"), path, exporter=exporter)
+        return HttpResponse(status=202)
 
     # zip all the stores together
-    f = BytesIO()
-    prefix = path.strip("/").replace("/", "-")
-    if not prefix:
-        prefix = "export"
-    with BytesIO() as f:
-        with ZipFile(f, "w") as zf:
-            for store in stores:
-                try:
-                    data = store.serialize()
-                except Exception as e:
-                    logging.error("Could not serialize %r: %s",
-                                  store.pootle_path, e)
-                    continue
-                zf.writestr(prefix + store.pootle_path, data)
-
-        return download(f.getvalue(), "%s.zip" % (prefix), "application/zip")
+    return download(exporter.stream(), exporter.filename, "application/zip")
 
 
 def handle_upload_form(request, tp):
@@ -108,15 +122,9 @@ def handle_upload_form(request, tp):
             try:
                 if is_zipfile(django_file):
                     with ZipFile(django_file, "r") as zf:
-                        for path in zf.namelist():
-                            if path.endswith("/"):
-                                # is a directory
-                                continue
-                            ext = os.path.splitext(path)[1].strip(".")
-                            if ext not in valid_extensions:
-                                continue
-                            with zf.open(path, "r") as f:
-                                import_file(f, user=uploader)
+                        import_files(
+                            zipped_files(zf, valid_extensions),
+                            user=uploader)
                 else:
                     # is_zipfile consumes the file buffer
                     django_file.seek(0)
@@ -11,15 +11,33 @@ import os
 # This must be run before importing Django.
 os.environ['DJANGO_SETTINGS_MODULE'] = 'pootle.settings'
 
+from itertools import groupby, imap
+
+from pootle.core.delegate import check_updater
 from pootle.core.signals import update_checks
+from pootle.core.utils.db import get_pool
+from pootle_store.models import QualityCheck, Store
 from pootle_translationproject.models import TranslationProject
 
 from . import PootleCommand
 
 
+def _update_shard(shard):
+    """Update the checks for a shard of stores and return the updated
+    stores, leaving it to the caller to update the data once all shards
+    are complete
+    """
+    tp, stores, check_names = shard
+    return check_updater.get(TranslationProject)(
+        translation_project=TranslationProject.objects.get(pk=tp),
+        stores=stores,
+        check_names=check_names).update()
+
+
 class Command(PootleCommand):
     help = "Allow checks to be recalculated manually."
     process_disabled_projects = True
+    shard_size = 100
 
     def add_arguments(self, parser):
         super(Command, self).add_arguments(parser)
@@ -30,6 +48,15 @@ class Command(PootleCommand):
             default=None,
             help='Check to recalculate',
         )
+        parser.add_argument(
+            '--workers',
+            action='store',
+            type=int,
+            default=1,
+            help=(u"Number of processes to recalculate checks with, "
+                  u"translation projects are split into shards of "
+                  u"%s stores" % self.shard_size),
+        )
 
     def update_checks(self, check_names, translation_project=None):
         update_checks.send(
@@ -39,13 +66,63 @@ class Command(PootleCommand):
             clear_unknown=True,
             update_data_after=True)
 
+    @property
+    def tp_qs(self):
+        tps = TranslationProject.objects.all()
+        if self.projects:
+            tps = tps.filter(project__code__in=self.projects)
+        if self.languages:
+            tps = tps.filter(language__code__in=self.languages)
+        return tps
+
+    def get_shards(self, check_names):
+        stores = (
+            Store.objects.filter(translation_project__in=self.tp_qs)
+                         .order_by("translation_project_id", "id")
+                         .values_list("translation_project_id", "id"))
+        tps = groupby(stores.iterator(), key=lambda store: store[0])
+        for tp, tp_stores in tps:
+            tp_stores = [store for _tp, store in tp_stores]
+            for i in range(0, len(tp_stores), self.shard_size):
+                yield tp, tp_stores[i:i + self.shard_size], check_names
+
+    def update_checks_parallel(self, check_names, workers):
+        QualityCheck.delete_unknown_checks()
+        updated = {}
+        shards = self.get_shards(check_names)
+        pool = get_pool(workers)
+        try:
+            shards = (
+                pool.imap_unordered(_update_shard, shards)
+                if pool
+                else imap(_update_shard, shards))
+            for shard_updated in shards:
+                for tp, stores in shard_updated.items():
+                    updated[tp] = updated.get(tp, set()) | stores
+            if pool:
+                pool.close()
+        except BaseException:
+            if pool:
+                pool.terminate()
+            raise
+        finally:
+            if pool:
+                pool.join()
+        check_updater.get(TranslationProject)().update_data(updated)
+
     def handle_all_stores(self, translation_project, **options):
         self.stdout.write(u"Running %s for %s" %
                           (self.name, translation_project))
         self.update_checks(options["check_names"], translation_project)
 
     def handle_all(self, **options):
-        if not self.projects and not self.languages:
+        if options["workers"] > 1:
+            self.stdout.write(
+                u"Running %s with %s workers"
+                % (self.name, options["workers"]))
+            self.update_checks_parallel(
+                options["check_names"], options["workers"])
+        elif not self.projects and not self.languages:
             self.stdout.write(u"Running %s (noargs)" % self.name)
             self.update_checks(options["check_names"])
         else:
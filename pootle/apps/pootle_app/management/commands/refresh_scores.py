@@ -9,16 +9,64 @@
 import os
 os.environ['DJANGO_SETTINGS_MODULE'] = 'pootle.settings'
 
+import time
+from argparse import ArgumentTypeError
+from datetime import datetime, timedelta
+from hashlib import md5
+from itertools import imap
+
+from dateutil.parser import parse as parse_datetime
+from django_redis import get_redis_connection
+
 from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.utils.functional import cached_property
+from django.utils.timesince import timesince
+from django.utils.timezone import utc
 
+from pootle.core.contextmanagers import keep_data
 from pootle.core.delegate import score_updater
+from pootle.core.signals import update_scores
+from pootle.core.utils.db import get_pool
+from pootle.core.utils.timezone import localdate
 from pootle_translationproject.models import TranslationProject
 
 from . import PootleCommand
 
 
+PROGRESS_KEY = "pootle.score.refresh"
+
+
+def get_date(date_string):
+    """Return the date parsed from a date string."""
+    try:
+        return parse_datetime(date_string).date()
+    except ValueError:
+        raise ArgumentTypeError('The provided date string is not '
+                                'valid: "%s"' % date_string)
+
+
+def _refresh_partition(partition):
+    """Refresh the store and TP scores for a partition of a TP's scores,
+    leaving it to the caller to update the user scores once all partitions
+    are complete
+    """
+    tp, start, end, users = partition
+    suppress_user_scores = keep_data(
+        signals=(update_scores, ),
+        suppress=(get_user_model(), ))
+    with suppress_user_scores:
+        score_updater.get(TranslationProject)(
+            TranslationProject.objects.get(pk=tp)).refresh_scores(
+                users=users,
+                start=start,
+                end=end)
+    return partition
+
+
 class Command(PootleCommand):
     help = "Refresh score"
+    partition_days = 30
 
     def add_arguments(self, parser):
         super(Command, self).add_arguments(parser)
@@ -35,6 +83,42 @@ class Command(PootleCommand):
             dest='users',
             help='User to refresh',
         )
+        parser.add_argument(
+            '--since',
+            type=get_date,
+            action='store',
+            dest='since',
+            help='Only refresh scores from this date, eg "2016-01-24"',
+        )
+        parser.add_argument(
+            '--until',
+            type=get_date,
+            action='store',
+            dest='until',
+            help='Only refresh scores up to and including this date',
+        )
+        parser.add_argument(
+            '--workers',
+            action='store',
+            type=int,
+            dest='workers',
+            default=None,
+            help=(u"Number of processes to refresh scores with, "
+                  u"translation projects are split into partitions of "
+                  u"%s days" % self.partition_days),
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            dest='restart',
+            default=False,
+            help=(u"Refresh all of the partitions, rather than resuming "
+                  u"an interrupted refresh"),
+        )
+
+    @cached_property
+    def redis(self):
+        return get_redis_connection("redis")
 
     def get_users(self, **options):
         return (
@@ -43,6 +127,100 @@ class Command(PootleCommand):
             if options["users"]
             else None)
 
+    @property
+    def tp_qs(self):
+        tps = TranslationProject.objects.all()
+        if self.projects:
+            tps = tps.filter(project__code__in=self.projects)
+        if self.languages:
+            tps = tps.filter(language__code__in=self.languages)
+        return tps
+
+    def get_date_ranges(self, since=None, until=None):
+        end = (
+            until + timedelta(days=1)
+            if until is not None
+            else None)
+        if since is None:
+            yield None, end
+            return
+        end = end or localdate() + timedelta(days=1)
+        while since < end:
+            yield since, min(end, since + timedelta(days=self.partition_days))
+            since += timedelta(days=self.partition_days)
+
+    def get_partitions(self, users=None, since=None, until=None):
+        date_ranges = list(self.get_date_ranges(since, until))
+        tps = self.tp_qs.order_by("pk").values_list("pk", flat=True)
+        for tp in tps.iterator():
+            for start, end in date_ranges:
+                yield tp, start, end, users
+
+    def get_progress_key(self, users=None, since=None, until=None):
+        refresh = md5(
+            repr((sorted(self.projects or []),
+                  sorted(self.languages or []),
+                  sorted(users or []),
+                  since,
+                  until)))
+        return "%s.%s" % (PROGRESS_KEY, refresh.hexdigest())
+
+    def get_partition_id(self, partition):
+        tp, start, end = partition[:3]
+        return "%s:%s:%s" % (tp, start, end)
+
+    def refresh_partitions(self, users=None, since=None, until=None,
+                           workers=None, restart=False):
+        progress_key = self.get_progress_key(users, since, until)
+        started_key = "%s.started" % progress_key
+        if restart:
+            self.redis.delete(progress_key, started_key)
+        refreshed = self.redis.smembers(progress_key)
+        partitions = [
+            partition
+            for partition
+            in self.get_partitions(users, since, until)
+            if self.get_partition_id(partition) not in refreshed]
+        if refreshed:
+            started = self.redis.get(started_key)
+            self.stdout.write(
+                u"Resuming %s started %s ago, %s partitions already "
+                u"refreshed, use --restart to refresh them again"
+                % (self.name,
+                   (timesince(datetime.fromtimestamp(int(started), utc))
+                    if started
+                    else u"an unknown time"),
+                   len(refreshed)))
+        else:
+            self.redis.set(started_key, int(time.time()))
+        self.stdout.write(
+            u"Refreshing scores for %s partitions with %s workers"
+            % (len(partitions), workers or 1))
+        pool = (
+            get_pool(workers)
+            if workers > 1
+            else None)
+        try:
+            partitions = (
+                pool.imap_unordered(_refresh_partition, partitions)
+                if pool
+                else imap(_refresh_partition, partitions))
+            for partition in partitions:
+                self.redis.sadd(
+                    progress_key,
+                    self.get_partition_id(partition))
+            if pool:
+                pool.close()
+        except BaseException:
+            if pool:
+                pool.terminate()
+            raise
+        finally:
+            if pool:
+                pool.join()
+        score_updater.get(get_user_model())(users=users).update(users=users)
+        self.redis.delete(progress_key, started_key)
+
     def handle_all_stores(self, translation_project, **options):
         users = self.get_users(**options)
         updater = score_updater.get(TranslationProject)(translation_project)
@@ -52,11 +230,25 @@ class Command(PootleCommand):
             updater.refresh_scores(users)
 
     def handle_all(self, **options):
-        if not self.projects and not self.languages:
+        partitioned = (
+            options["workers"]
+            or options["since"]
+            or options["until"])
+        if options["reset"] and partitioned:
+            raise CommandError(
+                "--reset cannot be used with --workers, --since or --until")
+        if partitioned:
+            self.refresh_partitions(
+                self.get_users(**options),
+                since=options["since"],
+                until=options["until"],
+                workers=options["workers"],
+                restart=options["restart"])
+        elif not self.projects and not self.languages:
             users = self.get_users(**options)
             if options["reset"]:
                 score_updater.get(get_user_model())(users=users).clear()
             else:
-                score_updater.get(get_user_model())().refresh_scores(users)
+                self.refresh_partitions(users, restart=options["restart"])
         else:
             super(Command, self).handle_all(**options)
@@ -28,8 +28,22 @@ class Command(SkipChecksMixin, BaseCommand):
             dest='restore',
             help='Restore the current revision number from the DB.',
         )
+        parser.add_argument(
+            '--coalesced',
+            action='store_true',
+            default=False,
+            dest='coalesced',
+            help=('Print the number of Directory revision updates that '
+                  'were coalesced.'),
+        )
 
     def handle(self, **options):
+        if options['coalesced']:
+            from pootle_revision.contextmanagers import get_coalesced_stats
+            stats = get_coalesced_stats()
+            self.stdout.write(
+                'Requested: %(requested)s Written: %(written)s' % stats)
+            return
         if options['restore']:
             from pootle_store.models import Unit
             Revision.set(Unit.max_revision())
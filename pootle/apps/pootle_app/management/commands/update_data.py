@@ -12,6 +12,7 @@ os.environ['DJANGO_SETTINGS_MODULE'] = 'pootle.settings'
 
 from pootle.core.signals import update_data
 from pootle_app.management.commands import PootleCommand
+from pootle_app.models import Directory
 from pootle_store.models import Store
 from pootle_translationproject.models import TranslationProject
 
@@ -39,6 +40,10 @@ class Command(PootleCommand):
                 "Updated data for store: %s",
                 store.pootle_path)
             tps.add(store.tp)
+        update_data.send(
+            Directory,
+            object_list=Directory.objects.filter(
+                pk__in=set(store.parent_id for store in stores)))
         for tp in tps:
             update_data.send(tp.__class__, instance=tp)
             logger.debug(
@@ -62,6 +67,12 @@ class Command(PootleCommand):
                 logger.debug(
                     "Updated data for store: %s",
                     store.pootle_path)
+            update_data.send(
+                Directory,
+                object_list=tp.dirs.filter(child_dirs__isnull=True))
+            logger.debug(
+                "Updated data for directories in: %s",
+                tp.pootle_path)
             update_data.send(tp.__class__, instance=tp)
             logger.debug(
                 "Updated data for translation project: %s",
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import logging
+import os
+
+# This must be run before importing Django.
+os.environ['DJANGO_SETTINGS_MODULE'] = 'pootle.settings'
+
+from pootle_word.utils import StoreTrigrams
+
+from . import PootleCommand
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(PootleCommand):
+    help = "Rebuild the trigram index used to search units."
+    process_disabled_projects = True
+
+    def handle_all_stores(self, translation_project, **options):
+        self.stdout.write(u"Running %s for %s" %
+                          (self.name, translation_project))
+        for store in translation_project.stores.all().iterator():
+            StoreTrigrams(store).index()
+            logger.debug(
+                "Updated search index for store: %s",
+                store.pootle_path)
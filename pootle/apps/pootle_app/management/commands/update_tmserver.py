@@ -7,19 +7,24 @@
 # AUTHORS file for copyright and authorship information.
 
 import os
+from collections import deque
 from hashlib import md5
+from multiprocessing.pool import ThreadPool
 
 # This must be run before importing Django.
 os.environ['DJANGO_SETTINGS_MODULE'] = 'pootle.settings'
 
 from elasticsearch import Elasticsearch, helpers
+from elasticsearch.exceptions import NotFoundError
 from translate.storage import factory
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import dateparse
 from django.utils.encoding import force_bytes
+from django.utils.module_loading import import_string
 
+from pootle.core.search import NgramSearchBackend
 from pootle.core.utils import dateformat
 from pootle_store.models import Unit
 from pootle_translationproject.models import TranslationProject
@@ -52,13 +57,15 @@ class DBParser(BaseParser):
         self.exclude_disabled_projects = not kwargs.pop('disabled_projects')
         self.tp_pk = None
 
-    def get_units(self):
-        """Gets the units to import and its total count."""
+    @property
+    def units_qs(self):
         units_qs = (
             Unit.objects.exclude(target_f__isnull=True)
                         .exclude(target_f__exact='')
-                        .filter(store__translation_project__pk=self.tp_pk)
                         .filter(revision__gt=self.last_indexed_revision))
+        if self.tp_pk is not None:
+            units_qs = units_qs.filter(
+                store__translation_project__pk=self.tp_pk)
         units_qs = units_qs.select_related(
             'change__submitted_by',
             'store',
@@ -70,7 +77,7 @@ class DBParser(BaseParser):
                 store__translation_project__project__disabled=True
             ).exclude(store__obsolete=True)
 
-        units_qs = units_qs.values(
+        return units_qs.values(
             'id',
             'revision',
             'source_f',
@@ -84,8 +91,32 @@ class DBParser(BaseParser):
             'store__translation_project__language__code'
         ).order_by()
 
+    def get_units(self):
+        """Gets the units to import and its total count."""
+        units_qs = self.units_qs
         return units_qs.iterator(), units_qs.count()
 
+    def get_unit_chunks(self, chunk_size):
+        """Yields the highest revision and the units of chunks of units
+        ordered by revision.
+
+        Units with the same revision are never split across chunks, so that
+        once a chunk is indexed all units up to its revision are indexed.
+        """
+        units_qs = self.units_qs.order_by("revision", "id")
+        last_revision = self.last_indexed_revision
+        while True:
+            chunk = list(
+                units_qs.filter(revision__gt=last_revision)[:chunk_size])
+            if not chunk:
+                return
+            last_revision = chunk[-1]["revision"]
+            chunk += list(
+                units_qs.filter(
+                    revision=last_revision,
+                    id__gt=chunk[-1]["id"]))
+            yield last_revision, chunk
+
     def get_unit_data(self, unit):
         """Return dict with data to import for a single unit."""
         fullname = (unit['change__submitted_by__full_name'] or
@@ -189,6 +220,90 @@ class FileParser(BaseParser):
         }
 
 
+class TMServerTarget(object):
+    """Elasticsearch index that the pipeline writes unit data to
+
+    The highest fully indexed revision is kept in a separate document type
+    so that interrupted updates can be resumed.
+    """
+
+    checkpoint_type = "pootle_checkpoint"
+    checkpoint_id = "revision"
+
+    def __init__(self, es, index):
+        self.es = es
+        self.index = index
+
+    def bulk(self, actions):
+        return helpers.bulk(self.es, actions)
+
+    def get_checkpoint(self):
+        try:
+            checkpoint = self.es.get(
+                index=self.index,
+                doc_type=self.checkpoint_type,
+                id=self.checkpoint_id)
+        except NotFoundError:
+            return None
+        return checkpoint["_source"]["revision"]
+
+    def set_checkpoint(self, revision):
+        self.es.index(
+            index=self.index,
+            doc_type=self.checkpoint_type,
+            id=self.checkpoint_id,
+            body={"revision": revision})
+
+
+class IndexPipeline(object):
+    """Streams unit data in revision ordered chunks to a bounded pool of
+    bulk requests, checkpointing the highest revision for which all chunks
+    have been indexed.
+    """
+
+    def __init__(self, parser, target, workers=1,
+                 chunk_size=BULK_CHUNK_SIZE):
+        self.parser = parser
+        self.target = target
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        chunks = self.parser.get_unit_chunks(self.chunk_size)
+        for revision, units in chunks:
+            yield revision, [self.parser.get_unit_data(unit) for unit in units]
+
+    def commit(self, pending):
+        revision, result = pending.popleft()
+        result.get()
+        self.target.set_checkpoint(revision)
+        return revision
+
+    def run(self):
+        """Index all of the chunks, returning the number of units indexed
+        """
+        pool = ThreadPool(self.workers)
+        pending = deque()
+        indexed = 0
+        try:
+            for revision, chunk in self.chunks():
+                while len(pending) >= self.workers:
+                    self.commit(pending)
+                pending.append(
+                    (revision,
+                     pool.apply_async(self.target.bulk, (chunk, ))))
+                indexed += len(chunk)
+            while pending:
+                self.commit(pending)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return indexed
+
+
 class Command(BaseCommand):
     help = "Load Translation Memory with translations"
 
@@ -227,6 +342,25 @@ class Command(BaseCommand):
             default=False,
             help='Add translations from disabled projects'
         )
+        local.add_argument(
+            '--workers',
+            action='store',
+            dest='workers',
+            type=int,
+            default=None,
+            help='Index translations in revision ordered chunks using '
+                 'this number of concurrent bulk requests, checkpointing '
+                 'the indexed revision after each chunk'
+        )
+        local.add_argument(
+            '--chunk-size',
+            action='store',
+            dest='chunk_size',
+            type=int,
+            default=BULK_CHUNK_SIZE,
+            help='Number of translations to index in each bulk request '
+                 'when using --workers'
+        )
 
         # External TM specific options.
         external = parser.add_argument_group('External TM', 'Pootle External '
@@ -302,12 +436,19 @@ class Command(BaseCommand):
         self.INDEX_NAME = self.tm_settings['INDEX_NAME']
         self.is_local_tm = options['tm'] == 'local'
 
-        self.es = Elasticsearch([
-            {
-                'host': self.tm_settings['HOST'],
-                'port': self.tm_settings['PORT'],
-            }], retry_on_timeout=True
-        )
+        engine = self.tm_settings.get('ENGINE')
+        if engine and issubclass(import_string(engine), NgramSearchBackend):
+            # the n-gram index is written to directly, without ES
+            self.es = None
+            self.target = import_string(engine)(options['tm'])
+        else:
+            self.es = Elasticsearch([
+                {
+                    'host': self.tm_settings['HOST'],
+                    'port': self.tm_settings['PORT'],
+                }], retry_on_timeout=True
+            )
+            self.target = TMServerTarget(self.es, self.INDEX_NAME)
 
         # If files to import have been provided.
         if options['files']:
@@ -332,11 +473,19 @@ class Command(BaseCommand):
 
     def _set_latest_indexed_revision(self, **options):
         self.last_indexed_revision = -1
-
-        if (not options['rebuild'] and
-            not options['refresh'] and
-            self.es.indices.exists(self.INDEX_NAME)):
-
+        resume = (
+            not options['rebuild']
+            and not options['refresh']
+            and (self.es is None
+                 or self.es.indices.exists(self.INDEX_NAME)))
+        checkpoint = (
+            self.target.get_checkpoint()
+            if resume and (options['workers'] or self.es is None)
+            else None)
+
+        if checkpoint is not None:
+            self.last_indexed_revision = checkpoint
+        elif resume and self.es is not None:
             result = self.es.search(
                 index=self.INDEX_NAME,
                 body={
@@ -360,6 +509,10 @@ class Command(BaseCommand):
     def handle(self, **options):
         self._initialize(**options)
 
+        if self.es is None:
+            self._update_ngram_index(**options)
+            return
+
         if (options['rebuild'] and
             not options['dry_run'] and
             self.es.indices.exists(self.INDEX_NAME)):
@@ -378,6 +531,10 @@ class Command(BaseCommand):
             helpers.bulk(self.es, self._parse_translations(**options))
             return
 
+        if options['workers']:
+            self._index_pipeline(**options)
+            return
+
         # If we are parsing from DB.
         tp_qs = TranslationProject.objects.all()
 
@@ -387,3 +544,35 @@ class Command(BaseCommand):
         for tp in tp_qs:
             self.parser.tp_pk = tp.pk
             helpers.bulk(self.es, self._parse_translations(**options))
+
+    def _update_ngram_index(self, **options):
+        if options['rebuild'] and not options['dry_run']:
+            self.target.clear()
+
+        if self.is_local_tm:
+            self._set_latest_indexed_revision(**options)
+
+        if isinstance(self.parser, FileParser):
+            self.target.bulk(self._parse_translations(**options))
+            return
+
+        options['workers'] = options['workers'] or 1
+        self._index_pipeline(**options)
+
+    def _index_pipeline(self, **options):
+        self.parser.tp_pk = None
+        total = self.parser.units_qs.count()
+        if total == 0:
+            self.stdout.write("No translations to index")
+            return
+        self.stdout.write("%s translations to index" % total)
+        if options['dry_run']:
+            return
+        indexed = IndexPipeline(
+            self.parser,
+            self.target,
+            workers=options['workers'],
+            chunk_size=options['chunk_size']).run()
+        self.stdout.write(
+            "Indexed %s translations up to revision %s"
+            % (indexed, self.target.get_checkpoint()))
@@ -17,6 +17,7 @@ from django.utils.lru_cache import lru_cache
 
 from pootle.core.bulk import BulkCRUD
 from pootle.core.contextmanagers import bulk_operations
+from pootle.core.delegate import crud
 from pootle.core.signals import create, delete, update_data
 from pootle_store.constants import UNTRANSLATED
 from pootle_store.models import QualityCheck, Unit
@@ -36,6 +37,51 @@ class QualityCheckCRUD(BulkCRUD):
     model = QualityCheck
 
 
+class QualityCheckWriter(object):
+    """Accumulates QualityCheck creations and deletions for many Units,
+    and writes them with the QualityCheck CRUD in batches
+    """
+
+    batch_size = 500
+
+    def __init__(self, batch_size=None):
+        if batch_size is not None:
+            self.batch_size = batch_size
+        self.to_create = []
+        self.to_delete = []
+
+    @property
+    def crud(self):
+        return crud.get(QualityCheck)
+
+    def create(self, checks):
+        self.to_create += checks
+        if len(self.to_create) >= self.batch_size:
+            self.flush_create()
+
+    def delete(self, check_ids):
+        self.to_delete += check_ids
+        if len(self.to_delete) >= self.batch_size:
+            self.flush_delete()
+
+    def flush_create(self):
+        while self.to_create:
+            batch = self.to_create[:self.batch_size]
+            self.to_create = self.to_create[self.batch_size:]
+            self.crud.create(objects=batch)
+
+    def flush_delete(self):
+        while self.to_delete:
+            batch = self.to_delete[:self.batch_size]
+            self.to_delete = self.to_delete[self.batch_size:]
+            self.crud.delete(
+                objects=QualityCheck.objects.filter(id__in=batch))
+
+    def flush(self):
+        self.flush_delete()
+        self.flush_create()
+
+
 class CheckableUnit(UnitProxy):
     """CheckableUnit wraps a `Unit` values dictionary to provide a `Unit` like
     instance that can be used by UnitQualityCheck
@@ -59,7 +105,8 @@ class CheckableUnit(UnitProxy):
 
 class UnitQualityCheck(object):
 
-    def __init__(self, unit, checker, original_checks, check_names):
+    def __init__(self, unit, checker, original_checks, check_names,
+                 writer=None):
         """Refreshes QualityChecks for a Unit
 
         As this class can work with either `Unit` or `CheckableUnit` it only
@@ -69,11 +116,13 @@ class UnitQualityCheck(object):
         :param checker: a Checker for this Unit.
         :param original_checks: current QualityChecks for this Unit
         :param check_names: limit checks to given list of quality check names.
+        :param writer: an optional `QualityCheckWriter` to defer writes to.
         """
         self.checker = checker
         self.unit = unit
         self.original_checks = original_checks
         self.check_names = check_names
+        self.writer = writer
 
     @cached_property
     def check_failures(self):
@@ -94,6 +143,10 @@ class UnitQualityCheck(object):
     def delete_checks(self, checks):
         """Delete checks that are no longer used.
         """
+        if self.writer is not None:
+            self.writer.delete(
+                [check["id"] for check in checks.values()])
+            return True
         return delete.send(
             self.checks_qs.model,
             objects=self.checks_qs.filter(name__in=checks))
@@ -130,7 +183,9 @@ class UnitQualityCheck(object):
                     message=self.check_failures[name]['message'],
                     category=self.check_failures[name]['category']))
             updated = True
-        if new_checks:
+        if new_checks and self.writer is not None:
+            self.writer.create(new_checks)
+        elif new_checks:
             create.send(self.checks_qs.model, objects=new_checks)
         return updated
 
@@ -138,12 +193,13 @@ class UnitQualityCheck(object):
 class QualityCheckUpdater(object):
 
     def __init__(self, check_names=None, translation_project=None,
-                 stores=None, units=None):
+                 stores=None, units=None, batch_size=None):
         """Refreshes QualityChecks for Units
 
         :param check_names: limit checks to given list of quality check names.
         :param translation_project: an instance of `TranslationProject` to
             restrict the update to.
+        :param batch_size: number of QualityChecks to write at a time.
         """
 
         self.check_names = check_names
@@ -151,6 +207,7 @@ class QualityCheckUpdater(object):
         self.stores = stores
         self._units = units
         self._updated_stores = {}
+        self.batch_size = batch_size
 
     @cached_property
     def checks(self):
@@ -220,6 +277,10 @@ class QualityCheckUpdater(object):
     def tp_qs(self):
         return TranslationProject.objects.all()
 
+    @cached_property
+    def writer(self):
+        return QualityCheckWriter(batch_size=self.batch_size)
+
     @property
     def updated_stores(self):
         return self._updated_stores
@@ -236,6 +297,8 @@ class QualityCheckUpdater(object):
         with bulk_operations(QualityCheck):
             self.update_untranslated()
             self.update_translated()
+            self.writer.flush()
+        del self.__dict__["writer"]
         updated = self.updated_stores
         if update_data_after:
             self.update_data(updated)
@@ -268,7 +331,8 @@ class QualityCheckUpdater(object):
             unit,
             checker,
             self.checks.get(unit.id, {}),
-            self.check_names)
+            self.check_names,
+            writer=self.writer)
         if checker.update():
             self.update_store(unit.tp, unit.store)
             return True
@@ -337,17 +401,19 @@ class TPQCUpdater(QualityCheckUpdater):
 class StoreQCUpdater(QualityCheckUpdater):
     stores = None
 
-    def __init__(self, store, check_names=None, units=None):
+    def __init__(self, store, check_names=None, units=None, batch_size=None):
         """Refreshes QualityChecks for Units
 
         :param check_names: limit checks to given list of quality check names.
         :param translation_project: an instance of `TranslationProject` to
             restrict the update to.
+        :param batch_size: number of QualityChecks to write at a time.
         """
         self.check_names = check_names
         self.store = store
         self._updated_stores = {}
         self._units = units
+        self.batch_size = batch_size
 
     def log_debug(self):
         logger.debug(
@@ -6,11 +6,126 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
-from django.db.models import Max
+from django.db.models import Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 
+from pootle.core.bulk import BulkCRUD
+from pootle.core.decorators import persistent_property
+from pootle_app.models import Directory
 from pootle_translationproject.models import TranslationProject
 
-from .utils import RelatedStoresDataTool
+from .models import DirectoryData, StoreData
+from .utils import DataUpdater, RelatedStoresDataTool
+
+
+class DirectoryDataCRUD(BulkCRUD):
+    model = DirectoryData
+
+
+class DirectoryDataUpdater(DataUpdater):
+    """Sets the rollup data for a Directory from the data of its child
+    stores and the rollup data of its child directories
+    """
+
+    related_name = "directory"
+    max_fields = (
+        "last_created_unit",
+        "last_submission",
+        "max_unit_revision")
+    update_fields = (
+        "critical_checks",
+        "last_created_unit",
+        "last_submission",
+        "max_unit_revision",
+        "pending_suggestions",
+        "translated_words",
+        "total_words",
+        "fuzzy_words")
+
+    @property
+    def aggregation(self):
+        aggregation = {
+            k: Coalesce(Sum(k), 0)
+            for k
+            in self.sum_fields}
+        aggregation.update(
+            {k: Max(k)
+             for k
+             in self.max_fields})
+        return aggregation
+
+    @property
+    def child_data_qs(self):
+        return DirectoryData.objects.filter(
+            directory__parent_id=self.model.id)
+
+    @property
+    def store_data_qs(self):
+        return StoreData.objects.filter(
+            store__parent_id=self.model.id).exclude(store__obsolete=True)
+
+    def get_store_data(self, **kwargs):
+        data = dict(self.aggregate_defaults)
+        data.update({k: None for k in self.max_fields})
+        for qs in (self.store_data_qs, self.child_data_qs):
+            for k, v in qs.aggregate(**self.aggregation).items():
+                if k in self.sum_fields:
+                    data[k] += v
+                elif v is not None and (data[k] is None or v > data[k]):
+                    data[k] = v
+        data["max_unit_revision"] = data["max_unit_revision"] or 0
+        return data
+
+
+class DirectoryUpdater(object):
+    """Updates the rollup data of Directories and of their parents up to
+    their translation project's directory, deepest first.
+    """
+
+    def __init__(self, object_list):
+        self.object_list = object_list
+
+    @property
+    def parent_paths(self):
+        paths = set()
+        for directory in self.object_list:
+            parts = directory.pootle_path.strip("/").split("/")
+            if parts[0] == "projects":
+                continue
+            for i in range(2, len(parts) + 1):
+                paths.add("/%s/" % "/".join(parts[:i]))
+        return paths
+
+    def get_directories(self, parent_paths):
+        directories = {
+            directory.pk: directory
+            for directory
+            in Directory.objects.filter(
+                pootle_path__in=parent_paths,
+                tp__isnull=False).select_related("data")}
+        # child directories without rollup data are built in full, so that
+        # the rollups are complete the first time their parents are updated
+        missing = Directory.objects.filter(
+            parent_id__in=directories.keys(),
+            data__isnull=True).values_list("tp_id", "pootle_path")
+        for tp_id, pootle_path in missing:
+            directories.update(
+                (directory.pk, directory)
+                for directory
+                in Directory.objects.filter(
+                    tp_id=tp_id,
+                    pootle_path__startswith=pootle_path).select_related("data"))
+        return sorted(
+            directories.values(),
+            key=lambda directory: -directory.pootle_path.count("/"))
+
+    def update(self):
+        parent_paths = self.parent_paths
+        if not parent_paths:
+            return
+        for directory in self.get_directories(parent_paths):
+            directory.data_tool.update()
 
 
 class DirectoryDataTool(RelatedStoresDataTool):
@@ -19,10 +134,33 @@ class DirectoryDataTool(RelatedStoresDataTool):
     group_by = ("store__parent__tp_path", )
     cache_key_name = "directory"
 
+    @property
+    def child_dirs_data(self):
+        return DirectoryData.objects.filter(
+            directory__parent_id=self.context.id,
+            directory__obsolete=False).values(
+                *("directory__name", ) + self.max_fields + self.sum_fields)
+
+    @persistent_property
+    def children_stats(self):
+        """For a given object returns stats for each of the objects
+        immediate descendants, the stats of child directories are read from
+        their rollup data if it exists
+        """
+        if self.has_rollup_data:
+            return self.get_rollup_children_stats()
+        return self.get_children_stats(self.child_stats_qs)
+
     @property
     def context_name(self):
         return self.context.pootle_path
 
+    @cached_property
+    def has_rollup_data(self):
+        return DirectoryData.objects.filter(
+            directory_id=self.context.id,
+            directory__tp__project__disabled=False).exists()
+
     @property
     def max_unit_revision(self):
         try:
@@ -37,11 +175,8 @@ class DirectoryDataTool(RelatedStoresDataTool):
                 store__parent__tp_path__startswith=self.context.tp_path)
               .exclude(store__parent=self.context))
 
-    def get_children_stats(self, qs):
-        children = {}
-        for child in qs.iterator():
-            self.add_child_stats(children, child)
-        child_stores = self.data_model.filter(store__parent=self.context).values(
+    def add_child_stores_stats(self, children, child_stores):
+        child_stores = child_stores.values(
             *("store__name", ) + self.max_fields + self.sum_fields)
         for child in child_stores:
             self.add_child_stats(
@@ -53,6 +188,28 @@ class DirectoryDataTool(RelatedStoresDataTool):
         self.add_last_created_info(child_stores, children)
         return children
 
+    def get_children_stats(self, qs):
+        children = {}
+        for child in qs.iterator():
+            self.add_child_stats(children, child)
+        return self.add_child_stores_stats(
+            children,
+            self.data_model.filter(store__parent=self.context))
+
+    def get_rollup_children_stats(self):
+        children = {}
+        for child in self.child_dirs_data:
+            self.add_child_stats(
+                children,
+                child,
+                root=child["directory__name"],
+                use_aggregates=False)
+        return self.add_child_stores_stats(
+            children,
+            self.data_model.filter(
+                store__parent=self.context,
+                store__obsolete=False))
+
     def get_root_child_path(self, child):
         return child["store__parent__tp_path"][
             len(self.context.tp_path):].split("/")[0]
@@ -73,3 +73,70 @@ class TPChecksData(AbstractPootleChecksData):
 
     def __unicode__(self):
         return self.tp.pootle_path
+
+
+class DirectoryData(models.Model):
+    """Rollup of the data of the stores in a Directory and its
+    subdirectories, for Directories in translation projects.
+
+    The data is aggregated from the data of the child stores and
+    subdirectories, so updating it only reads the immediate children.
+    """
+
+    class Meta(object):
+        db_table = "pootle_directory_data"
+
+    directory = models.OneToOneField(
+        "pootle_app.Directory",
+        on_delete=models.CASCADE,
+        db_index=True,
+        related_name="data")
+    # the greatest pk of the last created units of live child stores
+    last_created_unit = models.ForeignKey(
+        "pootle_store.Unit",
+        null=True,
+        blank=True,
+        db_index=True,
+        related_name="+",
+        on_delete=models.SET_NULL)
+    # the greatest pk of the last submissions of live child stores
+    last_submission = models.ForeignKey(
+        "pootle_statistics.Submission",
+        null=True,
+        blank=True,
+        db_index=True,
+        related_name="+",
+        on_delete=models.SET_NULL)
+    max_unit_revision = models.IntegerField(
+        null=False,
+        blank=True,
+        default=0,
+        db_index=False)
+    critical_checks = models.IntegerField(
+        null=False,
+        blank=False,
+        default=0,
+        db_index=False)
+    pending_suggestions = models.IntegerField(
+        null=False,
+        blank=False,
+        default=0,
+        db_index=False)
+    total_words = models.IntegerField(
+        null=False,
+        blank=False,
+        default=0,
+        db_index=False)
+    translated_words = models.IntegerField(
+        null=False,
+        blank=False,
+        default=0,
+        db_index=False)
+    fuzzy_words = models.IntegerField(
+        null=False,
+        blank=False,
+        default=0,
+        db_index=False)
+
+    def __unicode__(self):
+        return self.directory.pootle_path
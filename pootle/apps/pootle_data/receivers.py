@@ -13,10 +13,12 @@ from django.dispatch import receiver
 
 from pootle.core.delegate import crud, data_tool, data_updater
 from pootle.core.signals import create, delete, update, update_data
+from pootle_app.models import Directory
 from pootle_store.models import Store
 from pootle_translationproject.models import TranslationProject
 
-from .models import StoreChecksData, StoreData, TPChecksData, TPData
+from .models import (
+    DirectoryData, StoreChecksData, StoreData, TPChecksData, TPData)
 
 
 logger = logging.getLogger(__name__)
@@ -32,6 +34,16 @@ def handle_tp_data_obj_create(**kwargs):
     crud.get(TPData).create(**kwargs)
 
 
+@receiver(create, sender=DirectoryData)
+def handle_directory_data_obj_create(**kwargs):
+    crud.get(DirectoryData).create(**kwargs)
+
+
+@receiver(update, sender=DirectoryData)
+def handle_directory_data_obj_update(**kwargs):
+    crud.get(DirectoryData).update(**kwargs)
+
+
 @receiver(update, sender=StoreData)
 def handle_store_data_obj_update(**kwargs):
     crud.get(StoreData).update(**kwargs)
@@ -74,14 +86,24 @@ def handle_tp_checks_data_create(**kwargs):
 
 @receiver(post_save, sender=StoreData)
 def handle_storedata_save(**kwargs):
-    tp = kwargs["instance"].store.translation_project
-    update_data.send(tp.__class__, instance=tp)
+    store_data = kwargs["instance"]
+    tp = store_data.store.translation_project
+    # deltas are only valid for the save they were calculated for
+    data_deltas = store_data.__dict__.pop("data_deltas", None)
+    update_data.send(
+        Directory,
+        object_list=[store_data.store.parent])
+    update_data.send(
+        tp.__class__,
+        instance=tp,
+        data_deltas=data_deltas)
 
 
 @receiver(update_data, sender=Store)
 def handle_store_data_update(**kwargs):
     store = kwargs.get("instance")
-    data_tool.get(Store)(store).update()
+    data_tool.get(Store)(store).update(
+        unit_deltas=kwargs.get("unit_deltas"))
 
 
 @receiver(update_data, sender=TranslationProject)
@@ -92,7 +114,14 @@ def handle_tp_data_update(**kwargs):
             tp,
             object_list=kwargs["object_list"]).update()
     else:
-        data_tool.get(TranslationProject)(tp).update()
+        data_tool.get(TranslationProject)(tp).update(
+            data_deltas=kwargs.get("data_deltas"))
+
+
+@receiver(update_data, sender=Directory)
+def handle_directory_data_update(**kwargs):
+    data_updater.get(Directory)(
+        object_list=kwargs["object_list"]).update()
 
 
 @receiver(post_save, sender=Store)
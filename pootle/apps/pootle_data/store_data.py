@@ -13,6 +13,7 @@ from django.db.models import Case, Count, Max, Q, When
 
 from pootle.core.bulk import BulkCRUD
 from pootle.core.signals import update_data, update_revisions
+from pootle_app.models import Directory
 from pootle_statistics.models import Submission
 from pootle_store.constants import FUZZY, OBSOLETE, TRANSLATED
 from pootle_store.models import QualityCheck
@@ -26,13 +27,18 @@ class StoreDataCRUD(BulkCRUD):
 
     def update_tps_and_revisions(self, stores):
         tps = {}
+        parent_ids = set()
         for store in stores:
+            parent_ids.add(store.parent_id)
             if store.translation_project_id not in tps:
                 tps[store.translation_project_id] = store.translation_project
             update_revisions.send(
                 store.__class__,
                 instance=store,
                 keys=["stats", "checks"])
+        update_data.send(
+            Directory,
+            object_list=Directory.objects.filter(pk__in=parent_ids))
         for tp in tps.values():
             update_data.send(
                 tp.__class__,
@@ -125,6 +131,44 @@ class StoreDataUpdater(DataUpdater):
     def aggregate_max_unit_mtime(self):
         return dict(max_unit_mtime=Max("mtime"))
 
+    def get_data_deltas(self, **kwargs):
+        """Returns the changes to the word counts and max unit
+        revision/mtime calculated from the `unit_deltas` sent when units
+        are saved.
+
+        Each unit delta has the `before` and `after` (state, wordcount)
+        of the unit, and its new `revision` and `mtime`.
+        """
+        unit_deltas = kwargs.get("unit_deltas")
+        if not unit_deltas or not self.data.pk or self.store.obsolete:
+            return None
+        return self.combine_deltas(
+            [self.get_unit_delta(**unit_delta)
+             for unit_delta
+             in unit_deltas],
+            self.delta_fields)
+
+    def get_unit_delta(self, before, after, revision=None, mtime=None):
+        delta = dict(
+            max_unit_revision=revision,
+            max_unit_mtime=mtime)
+        for sign, (state, wordcount) in ((-1, before), (1, after)):
+            if state is None or not wordcount > 0:
+                continue
+            for k, v in self.get_unit_words(state, wordcount).items():
+                delta[k] = delta.get(k, 0) + sign * v
+        return delta
+
+    def get_unit_words(self, state, wordcount):
+        words = {}
+        if state > OBSOLETE:
+            words["total_words"] = wordcount
+        if state == TRANSLATED:
+            words["translated_words"] = wordcount
+        elif state == FUZZY:
+            words["fuzzy_words"] = wordcount
+        return words
+
     def get_last_created_unit(self, **kwargs):
         order_by = ("-creation_time", "-revision", "-id")
         units = self.store.unit_set.filter(
@@ -113,6 +113,10 @@ class TPDataTool(RelatedStoresDataTool):
             "/%s" % (self.dir_path), "", 1)
         return remainder.split("/")[0]
 
+    @property
+    def children_stats(self):
+        return self.context.directory.data_tool.children_stats
+
     @property
     def rev_cache_key(self):
         return revision.get(self.context.directory.__class__)(
@@ -7,7 +7,8 @@
 # AUTHORS file for copyright and authorship information.
 
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.functional import cached_property
 
 from pootle.core.decorators import persistent_property
@@ -92,6 +93,13 @@ class DataUpdater(object):
     fk_fields = (
         "last_created_unit",
         "last_submission")
+    delta_fields = (
+        "total_words",
+        "fuzzy_words",
+        "translated_words")
+    delta_max_fields = (
+        "max_unit_revision",
+        "max_unit_mtime")
     aggregate_defaults = dict(
         total_words=0,
         fuzzy_words=0,
@@ -128,6 +136,10 @@ class DataUpdater(object):
         for f in ["max_unit_revision", "max_unit_mtime"]:
             if f not in fields_to_get:
                 aggregate_fields.remove(f)
+        if "words" in aggregate_fields:
+            word_fields = set(self.aggregate_words.keys())
+            if not word_fields & set(fields_to_get):
+                aggregate_fields.remove("words")
         return aggregate_fields
 
     def filter_fields(self, **kwargs):
@@ -172,6 +184,54 @@ class DataUpdater(object):
             kwargs["data"].update(field_data)
         return field_data
 
+    def get_data_deltas(self, **kwargs):
+        """Returns the changes to the data fields that can be updated from
+        the `data_deltas` of a child object, or `None` if a full update is
+        required.
+        """
+        data_deltas = kwargs.get("data_deltas")
+        if not data_deltas or not self.data.pk:
+            return None
+        return self.combine_deltas(
+            [data_deltas],
+            [f for f in self.delta_fields if f in data_deltas])
+
+    def combine_deltas(self, deltas, sum_fields):
+        """Combines word count `deltas` into one delta, the max fields are
+        set to the greatest value found in the `deltas`.
+        """
+        data = {k: 0 for k in sum_fields}
+        data.update({k: None for k in self.delta_max_fields})
+        for delta in deltas:
+            for k in sum_fields:
+                data[k] += delta.get(k, 0)
+            for k in self.delta_max_fields:
+                if delta.get(k) is not None:
+                    data[k] = (
+                        max(data[k], delta[k])
+                        if data[k] is not None
+                        else delta[k])
+        return data
+
+    def set_deltas(self, deltas):
+        """Sets the data fields to expressions that apply the `deltas` to
+        the values in the database when the data is saved, so that
+        concurrent updates are not lost.
+        """
+        changed = set()
+        for k, v in deltas.items():
+            if k in self.delta_max_fields:
+                if v is None:
+                    continue
+                value = Value(v, output_field=self.data._meta.get_field(k))
+                setattr(self.data, k, Greatest(Coalesce(F(k), value), value))
+            elif v:
+                setattr(self.data, k, F(k) + v)
+            else:
+                continue
+            changed.add(k)
+        return changed
+
     def get_max_unit_mtime(self, **kwargs):
         return self.get_aggregate_data(
             fields=["max_unit_mtime"])["max_unit_mtime"]
@@ -245,13 +305,22 @@ class DataUpdater(object):
             return k
 
     def update(self, **kwargs):
+        update_fields = self.filter_fields(**kwargs)
+        deltas = self.get_data_deltas(**kwargs)
+        if deltas:
+            # fields with deltas are not re-aggregated
+            update_fields = [k for k in update_fields if k not in deltas]
+            kwargs["fields"] = update_fields
         store_data = self.get_store_data(**kwargs)
+        self.data.data_deltas = deltas
         data_changed = set(
             filter(
                 None,
                 [self.set_data(k, store_data[k])
                  for k
-                 in self.filter_fields(**kwargs)]))
+                 in update_fields]))
+        if deltas:
+            data_changed |= self.set_deltas(deltas)
         # set the checks
         if "checks" in store_data:
             self.set_check_data(store_data)
@@ -262,6 +331,8 @@ class DataUpdater(object):
             self.model.data = self.data
         elif data_changed:
             self.save_data(fields=data_changed)
+            if deltas:
+                self.data.refresh_from_db(fields=list(deltas))
 
     def save_data(self, fields=None):
         update.send(
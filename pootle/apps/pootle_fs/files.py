@@ -20,6 +20,8 @@ from pootle_statistics.models import SubmissionTypes
 from pootle_store.constants import POOTLE_WINS, SOURCE_WINS
 from pootle_store.models import Store
 
+from .manifest import get_file_digest, get_mtime_hash
+
 
 logger = logging.getLogger(__name__)
 
@@ -75,14 +77,16 @@ class FSFile(object):
 
     @property
     def fs_changed(self):
+        last_sync_hash = self.store_fs.last_sync_hash
         return (
-            self.latest_hash
-            != self.store_fs.last_sync_hash)
+            self.latest_hash != last_sync_hash
+            # synced before file hashes were content digests
+            and get_mtime_hash(self.file_path) != last_sync_hash)
 
     @property
     def latest_hash(self):
         if self.file_exists:
-            return str(os.stat(self.file_path).st_mtime)
+            return get_file_digest(self.file_path)
 
     @property
     def latest_author(self):
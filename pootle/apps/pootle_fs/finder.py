@@ -9,6 +9,8 @@
 import fnmatch
 import os
 import re
+import time
+from hashlib import md5
 
 import scandir
 
@@ -16,9 +18,14 @@ from django.core.exceptions import ValidationError
 from django.utils.functional import cached_property
 from django.utils.lru_cache import lru_cache
 
+from pootle.core.cache import get_cache
 from pootle.core.decorators import persistent_property
 
 from .apps import PootleFSConfig
+from .manifest import RACY_MTIME
+
+
+cache = get_cache('redis')
 
 
 PATH_MAPPING = (
@@ -77,18 +84,109 @@ class TranslationFileFinder(object):
                 os.path.basename(file_path))[0]
         return file_path, matched
 
-    def walk(self):
-        """Walk a filesystem"""
-        for root, dirs_, files in scandir.walk(self.file_root):
-            for filename in files:
-                yield os.path.join(root, filename)
+    @cached_property
+    def dir_regexes(self):
+        """Regexes for the directories below file_root that can contain
+        matching files, by depth. The last is ``None`` if directories at that
+        depth and below can all contain matching files.
+        """
+        parts = self.translation_mapping[len(self.file_root):].strip("/")
+        parts = parts.split("/")
+        regexes = []
+        for part in parts[:-1]:
+            if "<dir_path>" in part:
+                regexes.append(None)
+                return regexes
+            for k, v in self.path_mapping:
+                part = part.replace(k, v)
+            regexes.append(
+                re.compile(r"%s$" % re.sub(r"\(\?P<\w+>", "(", part)))
+        if "<dir_path>" in parts[-1]:
+            regexes.append(None)
+        return regexes
+
+    def match_dir(self, dir_path):
+        """Returns ``True`` if the directory at `dir_path` can contain
+        matching files.
+        """
+        parts = dir_path[len(self.file_root):].strip("/").split("/")
+        for i, part in enumerate(parts):
+            if i >= len(self.dir_regexes):
+                return False
+            if self.dir_regexes[i] is None:
+                return True
+            if not self.dir_regexes[i].match(part):
+                return False
+        return True
+
+    def walk(self, visited=None):
+        """Walk the directories of a filesystem that can contain matching
+        files, adding their mtimes to `visited`.
+        """
+        dirs = [self.file_root]
+        while dirs:
+            root = dirs.pop()
+            try:
+                mtime = os.stat(root).st_mtime
+                entries = list(scandir.scandir(root))
+            except OSError:
+                continue
+            if visited is not None:
+                visited[root] = mtime
+            for entry in entries:
+                if not entry.is_dir():
+                    yield entry.path
+                elif not entry.is_symlink() and self.match_dir(entry.path):
+                    dirs.append(entry.path)
+
+    @property
+    def walk_cache_key(self):
+        key = "%s::%s" % (
+            self.regex.pattern,
+            "::".join(self.exclude_languages))
+        return (
+            "%s.%s.walk.%s"
+            % (self.ns,
+               self.sw_version,
+               md5(key.encode("utf-8")).hexdigest()))
+
+    def is_unchanged(self, visited):
+        """Returns ``True`` if none of the `visited` directories have had
+        files added or removed since their mtimes were recorded.
+        """
+        try:
+            return all(
+                os.stat(dir_path).st_mtime == mtime
+                for dir_path, mtime
+                in visited.items())
+        except OSError:
+            return False
 
     def find(self):
-        """Find matching files anywhere in file_root"""
-        for filepath in self.walk():
+        """Find matching files anywhere in file_root
+
+        Matches are cached until files are added to or removed from the
+        directories that were walked.
+        """
+        cached = cache.get(self.walk_cache_key)
+        if cached and self.is_unchanged(cached["visited"]):
+            for match in cached["found"]:
+                yield match
+            return
+        visited = {}
+        found = []
+        for filepath in self.walk(visited):
             match = self.match(filepath)
             if match:
+                found.append(match)
                 yield match
+        racy = (
+            not visited
+            or max(visited.values()) > time.time() - RACY_MTIME)
+        if not racy:
+            cache.set(
+                self.walk_cache_key,
+                dict(visited=visited, found=found))
 
     @property
     def cache_key(self):
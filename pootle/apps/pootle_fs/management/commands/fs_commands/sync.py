@@ -12,3 +12,20 @@ from pootle_fs.management.commands import FSAPISubCommand
 class SyncCommand(FSAPISubCommand):
     help = "Sync translations from FS into Pootle."
     api_method = "sync"
+
+    def add_arguments(self, parser):
+        super(SyncCommand, self).add_arguments(parser)
+        parser.add_argument(
+            "--workers",
+            action="store",
+            dest="workers",
+            type=int,
+            default=None,
+            help=("Number of processes to sync stores with, each store is "
+                  "then synced in its own transaction"))
+
+    def handle_api_options(self, options):
+        api_options = super(SyncCommand, self).handle_api_options(options)
+        if options.get("workers"):
+            api_options["workers"] = options["workers"]
+        return api_options
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import os
+import time
+from hashlib import md5
+
+from django.utils.functional import cached_property
+
+from pootle.core.cache import get_cache
+
+from .apps import PootleFSConfig
+
+
+cache = get_cache('redis')
+
+# files modified this recently are hashed but not added to the manifest, as
+# they could change again without changing their mtime
+RACY_MTIME = 2
+
+READ_SIZE = 64 * 1024
+
+
+def get_file_digest(file_path):
+    """Returns a digest of the content of the file at `file_path`."""
+    digest = md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_mtime_hash(file_path):
+    """Returns the mtime hash that was used to detect changed files before
+    content digests.
+    """
+    try:
+        return str(os.stat(file_path).st_mtime)
+    except OSError:
+        return None
+
+
+class FSFileManifest(object):
+    """Records the (size, mtime, digest) of a project's files, so that their
+    content is only hashed again when their size or mtime changes.
+    """
+
+    ns = "pootle.fs.manifest"
+    sw_version = PootleFSConfig.version
+
+    def __init__(self, project):
+        self.project = project
+        self.changed = False
+
+    @property
+    def cache_key(self):
+        return (
+            "%s.%s.%s"
+            % (self.ns, self.sw_version, self.project.code))
+
+    @cached_property
+    def entries(self):
+        return cache.get(self.cache_key) or {}
+
+    def get_file_path(self, path):
+        return os.path.join(
+            self.project.local_fs_path,
+            path.strip("/"))
+
+    def get_entry(self, path):
+        """Returns the (size, mtime, digest) of the file at `path`,
+        or `None` if it does not exist.
+        """
+        try:
+            stat = os.stat(self.get_file_path(path))
+        except OSError:
+            if self.entries.pop(path, None):
+                self.changed = True
+            return None
+        entry = self.entries.get(path)
+        if entry and entry[:2] == (stat.st_size, stat.st_mtime):
+            return entry
+        entry = (
+            stat.st_size,
+            stat.st_mtime,
+            get_file_digest(self.get_file_path(path)))
+        if stat.st_mtime < time.time() - RACY_MTIME:
+            self.entries[path] = entry
+            self.changed = True
+        elif self.entries.pop(path, None):
+            self.changed = True
+        return entry
+
+    def get_hash(self, path):
+        entry = self.get_entry(path)
+        if entry:
+            return entry[2]
+
+    def is_synced(self, path, last_sync_hash):
+        """Returns `True` if the content of the file at `path` is unchanged
+        since it was synced with `last_sync_hash`.
+        """
+        entry = self.get_entry(path)
+        if not entry:
+            return last_sync_hash is None
+        return (
+            last_sync_hash == entry[2]
+            or last_sync_hash == str(entry[1]))
+
+    def save(self):
+        if self.changed:
+            cache.set(self.cache_key, self.entries)
+            self.changed = False
+
+    def clear(self):
+        cache.delete(self.cache_key)
+        self.__dict__.pop("entries", None)
+        self.changed = False
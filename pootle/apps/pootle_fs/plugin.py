@@ -10,6 +10,7 @@ import logging
 import os
 import shutil
 import uuid
+from itertools import izip
 
 from bulk_update.helper import bulk_update
 
@@ -21,10 +22,14 @@ from django.utils.lru_cache import lru_cache
 
 from pootle.core.delegate import (
     config, response as pootle_response, revision, state as pootle_state)
+from pootle.core.utils.db import get_pool
 from pootle_app.models import Directory
 from pootle_project.models import Project
+from pootle_revision.contextmanagers import coalesce_revisions
 from pootle_store.constants import POOTLE_WINS, SOURCE_WINS
 from pootle_store.models import Store
+from pootle_translationproject.contextmanagers import (
+    Deferred, defer_tps_updates, send_deferred_updates, update_tps_after)
 
 from .apps import PootleFSConfig
 from .decorators import emits_state, responds_to_state
@@ -37,6 +42,22 @@ from .signals import fs_post_pull, fs_post_push, fs_pre_pull, fs_pre_push
 logger = logging.getLogger(__name__)
 
 
+def _sync_store(args):
+    """Sync a store in a worker, using its own transaction.
+
+    The data, checks, scores and revisions updates are deferred, and are
+    returned with the result for the parent to run once for all of the
+    synced stores.
+    """
+    method, store_fs_id, kwargs = args
+    store_fs = StoreFS.objects.select_related(
+        "project", "store", "store__data").get(pk=store_fs_id)
+    with transaction.atomic():
+        with defer_tps_updates() as deferred:
+            result = getattr(store_fs.plugin, method)(store_fs, **kwargs)
+    return result, deferred
+
+
 class Plugin(object):
     """Base Plugin implementation"""
 
@@ -410,12 +431,13 @@ class Plugin(object):
 
     @responds_to_state
     def sync_merge(self, state, response, fs_path=None,
-                   pootle_path=None, update="all"):
+                   pootle_path=None, update="all", workers=None):
         """
         Perform merge between Pootle and working directory
 
         :param fs_path: FS path glob to filter translations
         :param pootle_path: Pootle path glob to filter translations
+        :param workers: Number of processes to merge stores with
         :returns response: Where ``response`` is an instance of self.respose_class
         """
         sfs = {}
@@ -423,37 +445,48 @@ class Plugin(object):
             sfs[fs_state.kwargs["store_fs"]] = fs_state
         _sfs = StoreFS.objects.filter(
             id__in=sfs.keys()).select_related("store", "store__data")
-        for store_fs in _sfs:
+        # stores merged in workers are pushed once their data is updated
+        merge_update = (
+            "pootle"
+            if workers > 1 and update == "all"
+            else update)
+        synced = self.sync_stores(
+            "merge_store",
+            [(store_fs,
+              dict(pootle_wins=(
+                  sfs[store_fs.id].state_type == "merge_pootle_wins"),
+                   update=merge_update))
+             for store_fs in _sfs],
+            workers=workers,
+            sync_revision=False)
+        for store_fs, synced_store in synced:
             fs_state = sfs[store_fs.id]
             fs_state.store_fs = store_fs
             pootle_wins = (fs_state.state_type == "merge_pootle_wins")
-            store_fs = fs_state.store_fs
-            update_revision = store_fs.file.pull(
-                merge=True,
-                pootle_wins=pootle_wins,
-                user=self.pootle_user)
-            if update == "all":
-                update_revision = store_fs.file.push()
             state.resources.pootle_revisions[
-                store_fs.store_id] = update_revision
+                store_fs.store_id] = synced_store["pootle_revision"]
             state.resources.file_hashes[
-                store_fs.pootle_path] = store_fs.file.latest_hash
+                store_fs.pootle_path] = synced_store["file_hash"]
             if pootle_wins:
                 response.add("merged_from_pootle", fs_state=fs_state)
             else:
                 response.add("merged_from_fs", fs_state=fs_state)
+        if merge_update != update:
+            self.push_merged(state, response)
         if response.made_changes:
             self.expire_sync_cache()
         return response
 
     @responds_to_state
     @emits_state(pre=fs_pre_pull, post=fs_post_pull)
-    def sync_pull(self, state, response, fs_path=None, pootle_path=None):
+    def sync_pull(self, state, response, fs_path=None, pootle_path=None,
+                  workers=None):
         """
         Pull translations from working directory to Pootle
 
         :param fs_path: FS path glob to filter translations
         :param pootle_path: Pootle path glob to filter translations
+        :param workers: Number of processes to pull stores with
         :returns response: Where ``response`` is an instance of self.respose_class
         """
         sfs = {}
@@ -461,13 +494,16 @@ class Plugin(object):
             sfs[fs_state.kwargs["store_fs"]] = fs_state
         _sfs = StoreFS.objects.filter(
             id__in=sfs.keys()).select_related("store", "store__data")
-        for store_fs in _sfs:
-            store_fs.file.pull(user=self.pootle_user)
-            if store_fs.store and store_fs.store.data:
+        synced = self.sync_stores(
+            "pull_store",
+            [(store_fs, {}) for store_fs in _sfs],
+            workers=workers)
+        for store_fs, synced_store in synced:
+            if "pootle_revision" in synced_store:
                 state.resources.pootle_revisions[
-                    store_fs.store_id] = store_fs.store.data.max_unit_revision
+                    store_fs.store_id] = synced_store["pootle_revision"]
             state.resources.file_hashes[
-                store_fs.pootle_path] = store_fs.file.latest_hash
+                store_fs.pootle_path] = synced_store["file_hash"]
             fs_state = sfs[store_fs.id]
             fs_state.store_fs = store_fs
             response.add("pulled_to_pootle", fs_state=fs_state)
@@ -475,12 +511,14 @@ class Plugin(object):
 
     @responds_to_state
     @emits_state(pre=fs_pre_push, post=fs_post_push)
-    def sync_push(self, state, response, fs_path=None, pootle_path=None):
+    def sync_push(self, state, response, fs_path=None, pootle_path=None,
+                  workers=None):
         """
         Push translations from Pootle to working directory.
 
         :param fs_path: FS path glob to filter translations
         :param pootle_path: Pootle path glob to filter translations
+        :param workers: Number of processes to push stores with
         :returns response: Where ``response`` is an instance of self.respose_class
         """
         pushable = state['pootle_staged'] + state['pootle_ahead']
@@ -490,17 +528,125 @@ class Plugin(object):
                 for fs_state
                 in pushable])
         stores_fs = {sfs.id: sfs for sfs in stores_fs.select_related("store")}
-        for fs_state in pushable:
-            store_fs = stores_fs[fs_state.store_fs.id]
+        synced = self.sync_stores(
+            "push_store",
+            [(stores_fs[fs_state.store_fs.id], {})
+             for fs_state in pushable],
+            workers=workers)
+        for fs_state, (store_fs, synced_store) in zip(pushable, synced):
             fs_state.store_fs = store_fs
-            store_fs.file.push()
             state.resources.pootle_revisions[
-                store_fs.store_id] = store_fs.store.data.max_unit_revision
+                store_fs.store_id] = synced_store["pootle_revision"]
             state.resources.file_hashes[
-                store_fs.pootle_path] = store_fs.file.latest_hash
+                store_fs.pootle_path] = synced_store["file_hash"]
             response.add('pushed_to_fs', fs_state=fs_state)
         return response
 
+    def sync_stores(self, method, stores, workers=None, sync_revision=True):
+        """Calls the per-store sync ``method`` for each of the ``stores``,
+        a list of ``(store_fs, kwargs)``.
+
+        With more than one worker the stores are synced in a pool of
+        processes, each in its own transaction. The sync of each store is
+        recorded as it completes, so that the stores already committed are
+        not synced again if another store fails. The data, checks, scores
+        and revisions updates deferred by the workers are then sent for all
+        of the synced stores, and the ``StoreFS`` are reloaded.
+
+        :param sync_revision: record the synced Pootle revision, rather than
+          only the file hash, for stores synced in workers
+        :returns: a list of ``(store_fs, result)`` in the order of ``stores``
+        """
+        pool = (
+            get_pool(workers)
+            if workers > 1 and len(stores) > 1
+            else None)
+        if not pool:
+            return [
+                (store_fs, getattr(self, method)(store_fs, **kwargs))
+                for store_fs, kwargs
+                in stores]
+        results = []
+        deferred = Deferred()
+        try:
+            synced = pool.imap(
+                _sync_store,
+                [(method, store_fs.id, kwargs)
+                 for store_fs, kwargs
+                 in stores])
+            for (store_fs, kwargs), (result, store_deferred) in izip(
+                    stores, synced):
+                self.on_store_synced(store_fs, result, sync_revision)
+                deferred.update(store_deferred)
+                results.append(result)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            send_deferred_updates(deferred)
+        # the store data is loaded once the deferred updates have run
+        stores_fs = StoreFS.objects.select_related("store").in_bulk(
+            [store_fs.id for store_fs, kwargs in stores])
+        return [
+            (stores_fs[store_fs.id], result)
+            for (store_fs, kwargs), result
+            in zip(stores, results)]
+
+    def on_store_synced(self, store_fs, result, sync_revision=True):
+        """Records the sync of a store that was synced in a worker"""
+        store_fs.file.on_sync(
+            result["file_hash"],
+            (result.get("pootle_revision", store_fs.last_sync_revision)
+             if sync_revision
+             else store_fs.last_sync_revision),
+            save=False)
+        store_fs.save(
+            update_fields=[
+                "last_sync_revision", "last_sync_hash",
+                "resolve_conflict", "staged_for_merge"])
+
+    def merge_store(self, store_fs, pootle_wins=False, update="all"):
+        update_revision = store_fs.file.pull(
+            merge=True,
+            pootle_wins=pootle_wins,
+            user=self.pootle_user)
+        if update == "all":
+            update_revision = store_fs.file.push()
+        return dict(
+            pootle_revision=update_revision,
+            file_hash=store_fs.file.latest_hash)
+
+    def pull_store(self, store_fs):
+        store_fs.file.pull(user=self.pootle_user)
+        synced = dict(file_hash=store_fs.file.latest_hash)
+        if store_fs.store:
+            # read from the units, as the store data is not updated until
+            # a batch of stores has been pulled
+            synced["pootle_revision"] = store_fs.store.get_max_unit_revision()
+        return synced
+
+    def push_merged(self, state, response):
+        """Pushes the stores that have been merged from FS, once their data
+        has been updated
+        """
+        for sync_type in ["merged_from_pootle", "merged_from_fs"]:
+            if sync_type not in response:
+                continue
+            for response_item in response.completed(sync_type):
+                store_fs = response_item.store_fs
+                state.resources.pootle_revisions[
+                    store_fs.store_id] = store_fs.file.push()
+                state.resources.file_hashes[
+                    store_fs.pootle_path] = store_fs.file.latest_hash
+
+    def push_store(self, store_fs):
+        store_fs.file.push()
+        return dict(
+            pootle_revision=store_fs.store.data.max_unit_revision,
+            file_hash=store_fs.file.latest_hash)
+
     @responds_to_state
     def sync_rm(self, state, response, fs_path=None, pootle_path=None):
         """
@@ -524,29 +670,48 @@ class Plugin(object):
         return response
 
     @responds_to_state
-    @transaction.atomic
-    def sync(self, state, response, fs_path=None, pootle_path=None, update="all"):
+    def sync(self, state, response, fs_path=None, pootle_path=None,
+             update="all", workers=None):
         """
         Synchronize all staged and non-conflicting files and Stores, and push
         changes upstream if required.
 
         :param fs_path: FS path glob to filter translations
         :param pootle_path: Pootle path glob to filter translations
+        :param workers: Number of processes to sync stores with. With more
+          than one worker each store is synced in its own transaction,
+          otherwise the sync is run in a single transaction.
         :returns response: Where ``response`` is an instance of self.respose_class
         """
+        if workers > 1:
+            return self._sync(
+                state, response, fs_path=fs_path, pootle_path=pootle_path,
+                update=update, workers=workers)
+        with transaction.atomic(), coalesce_revisions():
+            return self._sync(
+                state, response, fs_path=fs_path, pootle_path=pootle_path,
+                update=update)
+
+    def _sync(self, state, response, fs_path=None, pootle_path=None,
+              update="all", workers=None):
+        sync_kwargs = dict(fs_path=fs_path, pootle_path=pootle_path)
+        if workers:
+            sync_kwargs["workers"] = workers
         self.sync_rm(
             state, response, fs_path=fs_path, pootle_path=pootle_path)
         if update in ["all", "pootle"]:
-            self.sync_merge(
-                state, response,
-                fs_path=fs_path,
-                pootle_path=pootle_path,
-                update=update)
-            self.sync_pull(
-                state, response, fs_path=fs_path, pootle_path=pootle_path)
+            # the data, checks and scores of the pulled stores are updated
+            # once for each translation project
+            with update_tps_after():
+                self.sync_merge(
+                    state, response,
+                    update="pootle",
+                    **sync_kwargs)
+                self.sync_pull(state, response, **sync_kwargs)
+            if update == "all":
+                self.push_merged(state, response)
         if update in ["all", "fs"]:
-            self.sync_push(
-                state, response, fs_path=fs_path, pootle_path=pootle_path)
+            self.sync_push(state, response, **sync_kwargs)
             self.push(response)
         sync_types = [
             "pushed_to_fs", "pulled_to_pootle",
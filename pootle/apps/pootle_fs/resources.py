@@ -6,7 +6,6 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
-import os
 from fnmatch import fnmatch
 
 from django.db.models import F, Max
@@ -16,6 +15,7 @@ from pootle.core.decorators import persistent_property
 from pootle_store.models import Store
 
 from .apps import PootleFSConfig
+from .manifest import FSFileManifest
 from .models import StoreFS
 from .utils import StoreFSPathFilter, StorePathFilter
 
@@ -91,6 +91,12 @@ class FSProjectStateResources(object):
             qs.exclude(staged_for_removal=True)
               .exclude(staged_for_merge=True))
 
+    def filter_stores(self, qs):
+        return self.store_filter.filtered(qs)
+
+    def filter_store_fs(self, qs):
+        return self.storefs_filter.filtered(qs)
+
     @persistent_property
     def found_file_matches(self):
         return sorted(self.context.find_translations(
@@ -125,14 +131,14 @@ class FSProjectStateResources(object):
         """Returns tracked StoreFSs that have sync information, and are not
         currently staged for any kind of operation
         """
-        return self.storefs_filter.filtered(
+        return self.filter_store_fs(
             self._exclude_staged(self.resources.synced))
 
     @cached_property
     def trackable_stores(self):
         """Stores that are not currently tracked but could be"""
         _trackable = []
-        stores = self.store_filter.filtered(self.resources.trackable_stores)
+        stores = self.filter_stores(self.resources.trackable_stores)
         for store in stores:
             fs_path = self.match_fs_path(
                 self.context.get_fs_path(store.pootle_path))
@@ -157,7 +163,7 @@ class FSProjectStateResources(object):
     @cached_property
     def tracked(self):
         """StoreFS queryset of tracked resources"""
-        return self.storefs_filter.filtered(self.resources.tracked)
+        return self.filter_store_fs(self.resources.tracked)
 
     def _tracked_paths(self):
         """Dictionary of fs_path, path for tracked StoreFS"""
@@ -171,7 +177,7 @@ class FSProjectStateResources(object):
         """Returns tracked StoreFSs that have NO sync information, and are not
         currently staged for any kind of operation
         """
-        return self.storefs_filter.filtered(
+        return self.filter_store_fs(
             self._exclude_staged(
                 self.resources.unsynced))
 
@@ -193,18 +199,17 @@ class FSProjectStateResources(object):
                        .exclude(store__obsolete=True)
                        .values_list("store_id", "store__data__max_unit_revision"))
 
+    @cached_property
+    def file_manifest(self):
+        """Size, mtime and content digest of the project's files"""
+        return FSFileManifest(self.context.project)
+
     @cached_property
     def file_hashes(self):
         hashes = {}
-
-        def _get_file_hash(path):
-            file_path = os.path.join(
-                self.context.project.local_fs_path,
-                path.strip("/"))
-            if os.path.exists(file_path):
-                return str(os.stat(file_path).st_mtime)
         for pootle_path, path in self.found_file_matches:
-            hashes[pootle_path] = _get_file_hash(path)
+            hashes[pootle_path] = self.file_manifest.get_hash(path)
+        self.file_manifest.save()
         return hashes
 
     @cached_property
@@ -214,10 +219,18 @@ class FSProjectStateResources(object):
         """
         hashes = self.file_hashes
         tracked_files = []
-        for store_fs in self.synced.iterator():
-            if store_fs.last_sync_hash == hashes.get(store_fs.pootle_path):
+        synced = self.synced.values_list(
+            "pk", "pootle_path", "path", "last_sync_hash")
+        for pk, pootle_path, path, last_sync_hash in synced.iterator():
+            if last_sync_hash == hashes.get(pootle_path):
+                continue
+            legacy_synced = (
+                pootle_path in hashes
+                and self.file_manifest.is_synced(path, last_sync_hash))
+            if legacy_synced:
+                # synced before file hashes were content digests
                 continue
-            tracked_files.append(store_fs.pk)
+            tracked_files.append(pk)
         return tracked_files
 
     def reload(self):
@@ -253,3 +266,49 @@ class FSProjectStateResources(object):
         return (
             "%s.%s"
             % (self.context.cache_key, self.sync_revision))
+
+
+class FSProjectStatePathResources(FSProjectStateResources):
+    """State resources restricted to a set of ``pootle_paths``, used to
+    recalculate the state of paths that have changed.
+
+    The paths of all files found in the filesystem are kept, so that
+    trackable Stores can still be matched against them.
+    """
+
+    def __init__(self, context, pootle_paths):
+        super(FSProjectStatePathResources, self).__init__(context)
+        self.pootle_paths = set(pootle_paths)
+
+    def filter_stores(self, qs):
+        return super(FSProjectStatePathResources, self).filter_stores(
+            qs).filter(pootle_path__in=self.pootle_paths)
+
+    def filter_store_fs(self, qs):
+        return super(FSProjectStatePathResources, self).filter_store_fs(
+            qs).filter(pootle_path__in=self.pootle_paths)
+
+    @cached_property
+    def found_file_matches(self):
+        return [
+            (pootle_path, path)
+            for pootle_path, path
+            in super(FSProjectStatePathResources, self).found_file_matches
+            if pootle_path in self.pootle_paths]
+
+    @cached_property
+    def found_file_paths(self):
+        return set(
+            path
+            for __, path
+            in super(FSProjectStatePathResources, self).found_file_matches)
+
+    @cached_property
+    def tracked_paths(self):
+        return self._tracked_paths()
+
+    @cached_property
+    def missing_file_paths(self):
+        return [
+            path for path in self.tracked_paths.keys()
+            if path not in self.found_file_paths]
@@ -9,15 +9,22 @@
 from collections import OrderedDict
 from copy import copy
 
-from django.db.models import Q
+from django.db.models import Max, Q
 from django.utils.functional import cached_property
 from django.utils.lru_cache import lru_cache
 
+from pootle.core.cache import get_cache
+from pootle.core.models import Revision
 from pootle.core.state import ItemState, State
 from pootle_store.constants import POOTLE_WINS, SOURCE_WINS
+from pootle_store.models import Store
 
+from .apps import PootleFSConfig
 from .models import StoreFS
-from .resources import FSProjectStateResources
+from .resources import FSProjectStatePathResources, FSProjectStateResources
+
+
+cache = get_cache('redis')
 
 
 FS_STATE = OrderedDict()
@@ -114,13 +121,143 @@ class FSItemState(ItemState):
         return object.__gt__(other)
 
 
+class ProjectFSStateCache(object):
+    """Keeps the last state calculated for a project, so that only the paths
+    that have changed since need to be checked again.
+
+    Paths have changed if their file was added, removed or changed in the
+    filesystem, or their Store was created, obsoleted or has units with a
+    newer revision. The whole state is recalculated when tracked resources
+    have been staged or synced.
+    """
+
+    ns = "pootle.fs.state"
+    sw_version = PootleFSConfig.version
+    # recalculate the whole state if more paths than this have changed
+    max_changed = 500
+
+    def __init__(self, context):
+        self.context = context
+
+    @property
+    def project(self):
+        return self.context.project
+
+    @property
+    def cache_key(self):
+        return (
+            "%s.%s.%s"
+            % (self.ns, self.sw_version, self.project.code))
+
+    @property
+    def config_key(self):
+        return (
+            self.project.config.get("pootle_fs.translation_mapping"),
+            self.project.config.get("pootle.fs.excluded_languages"))
+
+    @cached_property
+    def resources(self):
+        return FSProjectStateResources(self.context)
+
+    @property
+    def stores(self):
+        return Store.objects.filter(
+            translation_project__project=self.project)
+
+    def get_files(self):
+        hashes = self.resources.file_hashes
+        return {
+            pootle_path: (path, hashes.get(pootle_path))
+            for pootle_path, path
+            in self.resources.found_file_matches}
+
+    def get_stores(self):
+        return dict(
+            count=self.stores.count(),
+            max_id=self.stores.aggregate(max_id=Max("pk"))["max_id"] or 0,
+            obsolete=dict(
+                self.stores.filter(obsolete=True).values_list(
+                    "pk", "pootle_path")))
+
+    def get_changed_paths(self, cached):
+        """Returns the ``pootle_paths`` that may have changed state since
+        the ``cached`` state was calculated, or ``None`` if the whole state
+        should be recalculated.
+        """
+        recalculate = (
+            not cached
+            or cached["sync_revision"] != self.context.sync_revision
+            or cached["config"] != self.config_key)
+        if recalculate:
+            return None
+        stores = self.get_stores()
+        changed_stores = self.stores.filter(
+            Q(data__max_unit_revision__gt=cached["revision"])
+            | Q(pk__gt=cached["stores"]["max_id"]))
+        new_stores = changed_stores.filter(
+            pk__gt=cached["stores"]["max_id"]).count()
+        if stores["count"] != cached["stores"]["count"] + new_stores:
+            # stores have been deleted
+            return None
+        changed = set(changed_stores.values_list("pootle_path", flat=True))
+        obsolete = stores["obsolete"]
+        cached_obsolete = cached["stores"]["obsolete"]
+        for pk in set(obsolete) ^ set(cached_obsolete):
+            changed.add(obsolete.get(pk) or cached_obsolete[pk])
+        files = self.get_files()
+        cached_files = cached["files"]
+        for pootle_path in set(files) | set(cached_files):
+            if files.get(pootle_path) != cached_files.get(pootle_path):
+                changed.add(pootle_path)
+        if len(changed) > self.max_changed:
+            return None
+        return changed
+
+    def dump_item(self, item):
+        kwargs = item.kwargs.copy()
+        if "store" in kwargs:
+            kwargs["store"] = kwargs["store"].pk
+        return item.pootle_path, kwargs
+
+    def load_items(self, items):
+        stores = Store.objects.in_bulk(
+            [kwargs["store"]
+             for __, kwargs in items
+             if "store" in kwargs])
+        for pootle_path, kwargs in items:
+            if "store" in kwargs:
+                kwargs = kwargs.copy()
+                kwargs["store"] = stores[kwargs["store"]]
+            yield pootle_path, kwargs
+
+    def get(self):
+        return cache.get(self.cache_key)
+
+    def set(self, state, revision, stores=None, files=None):
+        cache.set(
+            self.cache_key,
+            dict(revision=revision,
+                 sync_revision=self.context.sync_revision,
+                 config=self.config_key,
+                 stores=stores or self.get_stores(),
+                 files=files or self.get_files(),
+                 state={
+                     k: [self.dump_item(item) for item in state[k]]
+                     for k in state.states}))
+
+    def clear(self):
+        cache.delete(self.cache_key)
+
+
 class ProjectFSState(State):
 
     item_state_class = FSItemState
 
-    def __init__(self, context, fs_path=None, pootle_path=None, load=True):
+    def __init__(self, context, fs_path=None, pootle_path=None, load=True,
+                 pootle_paths=None):
         self.fs_path = fs_path
         self.pootle_path = pootle_path
+        self.pootle_paths = pootle_paths
         super(ProjectFSState, self).__init__(
             context, fs_path=fs_path, pootle_path=pootle_path,
             load=load)
@@ -133,13 +270,64 @@ class ProjectFSState(State):
     def states(self):
         return FS_STATE.keys()
 
+    @property
+    def incremental(self):
+        """Whether to only recalculate the paths that have changed since the
+        state was last calculated. This is enabled by the project's
+        `pootle_fs.incremental_state` config, for unfiltered states.
+        """
+        return bool(
+            self.pootle_paths is None
+            and not self.fs_path
+            and not self.pootle_path
+            and self.project.config.get("pootle_fs.incremental_state"))
+
     @cached_property
     def resources(self):
+        if self.pootle_paths is not None:
+            return FSProjectStatePathResources(
+                self.context,
+                pootle_paths=self.pootle_paths)
         return FSProjectStateResources(
             self.context,
             pootle_path=self.pootle_path,
             fs_path=self.fs_path)
 
+    def reload(self):
+        if not self.incremental:
+            return super(ProjectFSState, self).reload()
+        revision = Revision.get() or 0
+        state_cache = ProjectFSStateCache(self.context)
+        cached = state_cache.get()
+        changed = state_cache.get_changed_paths(cached)
+        if changed is None:
+            super(ProjectFSState, self).reload()
+            self.__dict__["resources"] = state_cache.resources
+            for k in self.states:
+                self.__state__[k].sort(key=lambda item: item.pootle_path)
+            state_cache.set(self, revision)
+            return self
+        self.clear_cache()
+        self.__dict__["resources"] = state_cache.resources
+        changed_state = (
+            self.__class__(self.context, pootle_paths=changed)
+            if changed
+            else None)
+        for k in self.states:
+            items = [
+                (pootle_path, kwargs)
+                for pootle_path, kwargs
+                in state_cache.load_items(cached["state"][k])
+                if pootle_path not in changed]
+            if changed_state:
+                items += [
+                    (item.pootle_path, item.kwargs)
+                    for item in changed_state[k]]
+            for pootle_path_, kwargs in sorted(items, key=lambda x: x[0]):
+                self.add(k, self.item_state_class(self, k, **kwargs))
+        state_cache.set(self, revision)
+        return self
+
     @property
     def state_conflict(self):
         conflict = self.resources.pootle_changed.exclude(
@@ -233,27 +233,50 @@ class Log(object):
                 "unit_created",
                 created_unit)
 
+    def get_submission_event(self, submission):
+        event_name = "state_changed"
+        if submission.field == SubmissionFields.CHECK:
+            event_name = (
+                "check_muted"
+                if submission.new_value == "0"
+                else "check_unmuted")
+        elif submission.field == SubmissionFields.TARGET:
+            event_name = "target_updated"
+        elif submission.field == SubmissionFields.SOURCE:
+            event_name = "source_updated"
+        elif submission.field == SubmissionFields.COMMENT:
+            event_name = "comment_updated"
+        return self.event(
+            submission.unit,
+            submission.submitter,
+            submission.creation_time,
+            event_name,
+            submission,
+            revision=submission.revision)
+
     def get_submission_events(self, **kwargs):
         for submission in self.filtered_submissions(**kwargs):
-            event_name = "state_changed"
-            if submission.field == SubmissionFields.CHECK:
-                event_name = (
-                    "check_muted"
-                    if submission.new_value == "0"
-                    else "check_unmuted")
-            elif submission.field == SubmissionFields.TARGET:
-                event_name = "target_updated"
-            elif submission.field == SubmissionFields.SOURCE:
-                event_name = "source_updated"
-            elif submission.field == SubmissionFields.COMMENT:
-                event_name = "comment_updated"
-            yield self.event(
-                submission.unit,
-                submission.submitter,
-                submission.creation_time,
-                event_name,
-                submission,
-                revision=submission.revision)
+            yield self.get_submission_event(submission)
+
+    def get_suggestion_created_event(self, suggestion):
+        return self.event(
+            suggestion.unit,
+            suggestion.user,
+            suggestion.creation_time,
+            "suggestion_created",
+            suggestion)
+
+    def get_suggestion_reviewed_event(self, suggestion):
+        event_name = (
+            "suggestion_accepted"
+            if suggestion.is_accepted
+            else "suggestion_rejected")
+        return self.event(
+            suggestion.unit,
+            suggestion.reviewer,
+            suggestion.review_time,
+            event_name,
+            suggestion)
 
     def get_suggestion_events(self, **kwargs):
         users = kwargs.get("users")
@@ -278,23 +301,9 @@ class Log(object):
                      and (not users
                           or (suggestion.reviewer_id in users))))
             if add_event:
-                yield self.event(
-                    suggestion.unit,
-                    suggestion.user,
-                    suggestion.creation_time,
-                    "suggestion_created",
-                    suggestion)
+                yield self.get_suggestion_created_event(suggestion)
             if review_event:
-                event_name = (
-                    "suggestion_accepted"
-                    if suggestion.is_accepted
-                    else "suggestion_rejected")
-                yield self.event(
-                    suggestion.unit,
-                    suggestion.reviewer,
-                    suggestion.review_time,
-                    event_name,
-                    suggestion)
+                yield self.get_suggestion_reviewed_event(suggestion)
 
     def get_events(self, **kwargs):
         event_sources = kwargs.pop("event_sources",
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import logging
+from contextlib import contextmanager
+
+from django.dispatch import receiver
+
+from pootle.core.cache import get_cache
+from pootle.core.contextmanagers import keep_data
+from pootle.core.delegate import revision_updater
+from pootle.core.signals import update_revisions
+from pootle_app.models import Directory
+from pootle_store.models import Store
+
+
+logger = logging.getLogger(__name__)
+
+cache = get_cache('redis')
+
+COALESCED_KEY = "pootle.revision.coalesced"
+
+
+class Coalesced(object):
+
+    def __init__(self):
+        # set of pootle_paths by revision keys
+        self.paths = {}
+        # project instances by revision keys
+        self.projects = {}
+        # number of revisions that would have been written
+        self.requested = 0
+
+
+def get_coalesced_stats():
+    """Returns the number of Directory revisions that were requested and
+    that were written by ``coalesce_revisions``.
+    """
+    return dict(
+        requested=cache.get("%s.requested" % COALESCED_KEY) or 0,
+        written=cache.get("%s.written" % COALESCED_KEY) or 0)
+
+
+def _incr_stat(name, delta):
+    key = "%s.%s" % (COALESCED_KEY, name)
+    cache.add(key, 0)
+    cache.incr(key, delta)
+
+
+def _get_paths(sender, **kwargs):
+    if kwargs.get("instance") is not None:
+        if sender is Store:
+            return set([kwargs["instance"].parent.pootle_path])
+        return set([kwargs["instance"].pootle_path])
+    if kwargs.get("object_list") is not None:
+        return set(
+            kwargs["object_list"].values_list("pootle_path", flat=True))
+    return set(kwargs.get("paths") or [])
+
+
+def _coalesce_handler(coalesced, sender, **kwargs):
+    keys = tuple(kwargs.get("keys") or [""])
+    if sender is Directory or sender is Store:
+        paths = _get_paths(sender, **kwargs)
+        coalesced.paths[keys] = coalesced.paths.get(keys, set()) | paths
+        updater = revision_updater.get(Directory)(paths=paths)
+    else:
+        instance = kwargs["instance"]
+        coalesced.projects.setdefault(keys, {})[instance.pk] = instance
+        updater = revision_updater.get(sender)(context=instance)
+    coalesced.requested += len(updater.parent_paths) * len(keys)
+
+
+def _flush_handler(coalesced):
+    written = 0
+    for keys, paths in coalesced.paths.items():
+        written += (
+            len(revision_updater.get(Directory)(paths=paths).parent_paths)
+            * len(keys))
+        update_revisions.send(
+            Directory,
+            paths=paths,
+            keys=list(keys))
+    for keys, projects in coalesced.projects.items():
+        for project in projects.values():
+            written += (
+                len(revision_updater.get(project.__class__)(
+                    context=project).parent_paths)
+                * len(keys))
+            update_revisions.send(
+                project.__class__,
+                instance=project,
+                keys=list(keys))
+    if coalesced.requested:
+        logger.debug(
+            "[revision] Coalesced %s Directory revision updates into %s",
+            coalesced.requested,
+            written)
+        _incr_stat("requested", coalesced.requested)
+        _incr_stat("written", written)
+
+
+@contextmanager
+def coalesce_revisions(**kwargs):
+    """Buffers the Directory revision updates that are sent while in this
+    context, and writes each updated revision once on leaving it.
+
+    The revisions shared by many stores, such as ``/projects/`` and
+    ``/<language_code>/``, are then only locked once, at the end of the
+    bulk operation rather than for every store that is updated. As the
+    revisions are written before the enclosing transaction is committed,
+    cache keys still change whenever the data they cache has changed.
+    """
+    coalesced = Coalesced()
+    coalesce_handler = kwargs.get("coalesce", _coalesce_handler)
+    flush_handler = kwargs.get("flush", _flush_handler)
+
+    with keep_data(signals=(update_revisions, )):
+
+        @receiver(update_revisions)
+        def handle_update_revisions(**kwargs):
+            coalesce_handler(coalesced, **kwargs)
+        yield
+    flush_handler(coalesced)
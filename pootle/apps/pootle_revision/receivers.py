@@ -6,7 +6,8 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
-from django.db.models.signals import post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from pootle.core.delegate import crud, revision_updater
@@ -18,6 +19,7 @@ from pootle_store.models import Store
 from pootle_translationproject.models import TranslationProject
 
 from .models import Revision
+from .utils import directory_index
 
 
 @receiver(create, sender=Revision)
@@ -96,3 +98,23 @@ def handle_project_save(**kwargs):
         Project,
         instance=kwargs["instance"],
         keys=["stats", "checks"])
+
+
+def _invalidate_directory_index():
+    directory_index.invalidate()
+    # other processes can fill the index from the data before the change is
+    # committed, so it is invalidated again once it is
+    transaction.on_commit(directory_index.invalidate)
+
+
+@receiver(post_save, sender=Directory)
+@receiver(post_save, sender=TranslationProject)
+def handle_directory_index_save(**kwargs):
+    if kwargs.get("created"):
+        _invalidate_directory_index()
+
+
+@receiver(post_delete, sender=Directory)
+@receiver(post_delete, sender=TranslationProject)
+def handle_directory_index_delete(**kwargs):
+    _invalidate_directory_index()
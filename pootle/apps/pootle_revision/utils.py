@@ -12,6 +12,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.functional import cached_property
 
 from pootle.core.bulk import BulkCRUD
+from pootle.core.cache import get_cache
 from pootle.core.signals import create, update
 from pootle.core.url_helpers import split_pootle_path
 from pootle_app.models import Directory
@@ -20,6 +21,9 @@ from pootle_translationproject.models import TranslationProject
 from .models import Revision
 
 
+cache = get_cache('redis')
+
+
 class RevisionCRUD(BulkCRUD):
     model = Revision
 
@@ -98,6 +102,72 @@ class TPRevision(RevisionContext):
     pass
 
 
+class DirectoryIndex(object):
+    """Index of Directory ids by ``pootle_path``, and of the language codes
+    of each project, shared by the revision updaters of a process.
+
+    The index is cleared in all processes when Directories or
+    TranslationProjects are added or removed.
+    """
+
+    version_key = "pootle.revision.directory_index"
+
+    def __init__(self):
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        self.ids = {}
+        self.project_languages = {}
+
+    def check(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex)
+            version = cache.get(self.version_key)
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid.uuid4().hex)
+
+    def get_ids(self, pootle_paths):
+        """Returns the ids of the Directories with the given `pootle_paths`
+        """
+        self.check()
+        missing = set(pootle_paths) - set(self.ids)
+        if missing:
+            self.ids.update(
+                Directory.objects.filter(
+                    pootle_path__in=missing).values_list(
+                        "pootle_path", "id"))
+        return [
+            self.ids[pootle_path]
+            for pootle_path in pootle_paths
+            if pootle_path in self.ids]
+
+    def get_languages(self, project_codes):
+        """Returns the language codes of the translation projects of the
+        projects with the given `project_codes`
+        """
+        self.check()
+        missing = set(project_codes) - set(self.project_languages)
+        if missing:
+            languages = {code: set() for code in missing}
+            tps = TranslationProject.objects.filter(
+                project__code__in=missing).values_list(
+                    "project__code", "language__code")
+            for project_code, language_code in tps.iterator():
+                languages[project_code].add(language_code)
+            self.project_languages.update(languages)
+        return set().union(
+            *[self.project_languages[code] for code in project_codes])
+
+
+directory_index = DirectoryIndex()
+
+
 class RevisionUpdater(object):
 
     def __init__(self, context=None, object_list=None, paths=None):
@@ -125,11 +195,15 @@ class RevisionUpdater(object):
             return self.paths
         return []
 
+    @property
+    def parent_paths(self):
+        return self.get_parent_paths(self.all_pootle_paths)
+
     @property
     def parents(self):
         """calculate unit parents for cache update"""
         return Directory.objects.filter(
-            pootle_path__in=self.get_parent_paths(self.all_pootle_paths))
+            pootle_path__in=self.parent_paths)
 
     def get_parent_paths(self, pootle_paths):
         if set(pootle_paths) == set(["/"]):
@@ -168,8 +242,12 @@ class RevisionUpdater(object):
             key__in=keys or [""],
             object_id__in=parents)
 
+    @property
+    def parent_ids(self):
+        return directory_index.get_ids(self.parent_paths)
+
     def update(self, keys=None):
-        parents = list(self.parents.values_list("id", flat=True))
+        parents = self.parent_ids
         revisions = self.get_revisions(parents, keys=keys)
         missing_revisions = []
         existing_ids = []
@@ -247,8 +325,6 @@ class ProjectRevisionUpdater(RevisionUpdater):
             lang_code, proj_code, dir_path, __ = split_pootle_path(pootle_path)
             paths.add("/projects/%s/" % proj_code)
             projects.add(proj_code)
-        tps = TranslationProject.objects.filter(
-            project__code__in=projects).values_list("language__code", flat=True)
-        for lang_code in tps.iterator():
+        for lang_code in directory_index.get_languages(projects):
             paths.add("/%s/" % lang_code)
         return paths
@@ -8,18 +8,20 @@
 
 from django.contrib.auth import get_user_model
 
-from pootle.core.delegate import crud, display, score_updater, scores
+from pootle.core.delegate import (
+    crud, display, score_accumulator, score_updater, scores)
 from pootle.core.plugin import getter
 from pootle_language.models import Language
 from pootle_project.models import Project, ProjectSet
-from pootle_store.models import Store
+from pootle_statistics.models import Submission
+from pootle_store.models import Store, Suggestion
 from pootle_translationproject.models import TranslationProject
 
 from .display import TopScoreDisplay
 from .models import UserStoreScore, UserTPScore
 from .updater import (
-    StoreScoreUpdater, TPScoreUpdater, UserScoreUpdater, UserStoreScoreCRUD,
-    UserTPScoreCRUD)
+    ScoreAccumulator, StoreScoreUpdater, TPScoreUpdater, UserScoreUpdater,
+    UserStoreScoreCRUD, UserTPScoreCRUD)
 from .utils import (
     LanguageScores, ProjectScores, ProjectSetScores, Scores, TPScores,
     UserScores)
@@ -80,3 +82,8 @@ def tp_score_updater_getter(**kwargs_):
 @getter(score_updater, sender=get_user_model())
 def users_score_updater_getter(**kwargs_):
     return UserScoreUpdater
+
+
+@getter(score_accumulator, sender=(Submission, Suggestion))
+def score_accumulator_getter(**kwargs_):
+    return ScoreAccumulator
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import calendar
+from datetime import timedelta
+
+from django_redis import get_redis_connection
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils.functional import cached_property
+
+from pootle.core.delegate import scores
+from pootle.core.utils.timezone import localdate
+from pootle_project.models import ProjectSet
+from pootle_translationproject.models import TranslationProject
+
+from .apps import PootleScoreConfig
+
+
+# sorted sets are deleted by Redis when they are empty, so all of the
+# buckets and rankings include this member to mark them as built
+BUILT = "-"
+
+# sets the score of a user in a day bucket, and adds the difference to the
+# ranking if it has been built
+SET_SCORE = """
+local old = tonumber(redis.call("zscore", KEYS[1], ARGV[1]) or 0)
+redis.call("zadd", KEYS[1], ARGV[2], ARGV[1])
+if redis.call("exists", KEYS[2]) == 1 then
+    redis.call("zincrby", KEYS[2], tonumber(ARGV[2]) - old, ARGV[1])
+end
+"""
+
+
+def _timestamp(date):
+    return calendar.timegm(date.timetuple())
+
+
+class Leaderboard(object):
+    """Keeps the daily scores of the users in a context in Redis sorted
+    sets, and a ranking of their scores over the last ``days`` days.
+
+    The day buckets and the ranking are built from the database when they
+    are first needed, and are then updated as the scores change. When the
+    day changes, the new ranking is the union of the buckets that are
+    already built.
+    """
+    ns = "pootle.score.leaderboard"
+    sw_version = PootleScoreConfig.version
+    days = 30
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    @cached_property
+    def redis(self):
+        return get_redis_connection("redis")
+
+    @property
+    def key(self):
+        return (
+            "%s.%s.%s"
+            % (self.ns,
+               self.sw_version,
+               self.scores.leaderboard_key))
+
+    @property
+    def dates(self):
+        start, end = self.scores.get_daterange(self.days)
+        return [
+            start + timedelta(days=i)
+            for i
+            in range((end - start).days + 1)]
+
+    @property
+    def ranking_key(self):
+        return "%s.ranking.%s" % (self.key, localdate().isoformat())
+
+    def get_bucket_key(self, date):
+        return "%s.day.%s" % (self.key, date.isoformat())
+
+    def get_day_scores(self, dates, users=None):
+        qs = self.scores.filter_scores(
+            self.scores.score_model.filter(date__in=dates))
+        if users is not None:
+            qs = qs.filter(user_id__in=users)
+        return qs.order_by("date", "user").values_list(
+            "date", "user").annotate(Sum("score"))
+
+    def build_buckets(self, dates):
+        if not dates:
+            return
+        buckets = {date: {BUILT: 0} for date in dates}
+        for date, user, score in self.get_day_scores(dates).iterator():
+            buckets[date][user] = score
+        pipeline = self.redis.pipeline()
+        for date, bucket in buckets.items():
+            key = self.get_bucket_key(date)
+            pipeline.zadd(key, bucket)
+            # buckets are kept until they leave the last ranking they are in
+            pipeline.expireat(
+                key,
+                _timestamp(date + timedelta(days=self.days + 2)))
+        pipeline.execute()
+
+    def build(self):
+        """Builds the ranking for today from the day buckets, building any
+        of the buckets that are missing first.
+        """
+        if self.redis.exists(self.ranking_key):
+            return
+        dates = self.dates
+        pipeline = self.redis.pipeline()
+        for date in dates:
+            pipeline.exists(self.get_bucket_key(date))
+        self.build_buckets(
+            [date
+             for date, exists
+             in zip(dates, pipeline.execute())
+             if not exists])
+        pipeline = self.redis.pipeline()
+        pipeline.zunionstore(
+            self.ranking_key,
+            [self.get_bucket_key(date) for date in dates])
+        pipeline.expire(
+            self.ranking_key,
+            int(timedelta(days=2).total_seconds()))
+        pipeline.execute()
+
+    def get_ranking(self, offset=0, limit=None):
+        """Returns a list of ``(user_id, score)`` for users with a positive
+        score, in order of score.
+        """
+        self.build()
+        ranking = self.redis.zrevrangebyscore(
+            self.ranking_key,
+            "+inf",
+            "(0",
+            start=offset,
+            num=limit or -1,
+            withscores=True)
+        return [(int(user), score) for user, score in ranking]
+
+    def count(self):
+        self.build()
+        return self.redis.zcount(self.ranking_key, "(0", "+inf")
+
+    def rank(self, user):
+        """Returns the position of the user in the ranking, starting at 0,
+        or ``None`` if the user has not scored.
+        """
+        self.build()
+        score = self.redis.zscore(self.ranking_key, user)
+        if not score or score <= 0:
+            return
+        return self.redis.zrevrank(self.ranking_key, user)
+
+    def update(self, dates):
+        """Updates the day buckets and ranking with the scores of the users
+        that have changed.
+
+        :param dates: dictionary of sets of user ids by date
+        """
+        ranked_dates = set(self.dates)
+        dates = {
+            date: users
+            for date, users
+            in dates.items()
+            if date in ranked_dates}
+        if not dates:
+            return
+        pipeline = self.redis.pipeline()
+        for date in dates:
+            pipeline.exists(self.get_bucket_key(date))
+        # buckets that are not built yet are built when they are needed
+        dates = {
+            date: dates[date]
+            for date, exists
+            in zip(dates.keys(), pipeline.execute())
+            if exists}
+        if not dates:
+            return
+        updated = {
+            (date, user): 0
+            for date, users in dates.items()
+            for user in users}
+        users = set(user for (date, user) in updated)
+        for date, user, score in self.get_day_scores(dates.keys(), users):
+            if (date, user) in updated:
+                updated[(date, user)] = score
+        set_score = self.redis.register_script(SET_SCORE)
+        pipeline = self.redis.pipeline()
+        for (date, user), score in updated.items():
+            set_score(
+                keys=[self.get_bucket_key(date), self.ranking_key],
+                args=[user, score],
+                client=pipeline)
+        pipeline.execute()
+
+
+def get_leaderboards(tp):
+    """Returns the leaderboards that include the scores in ``tp``"""
+    return [
+        scores.get(context.__class__)(context).leaderboard
+        for context
+        in [tp, tp.language, tp.project]] + [
+            scores.get(ProjectSet)(None).leaderboard]
+
+
+def _update_leaderboards(tp_scores):
+    updated = {}
+    for tp, date, user in tp_scores:
+        updated[tp] = updated.get(tp, {})
+        updated[tp][date] = updated[tp].get(date, set()) | set([user])
+    if not updated:
+        return
+    leaderboards = {}
+    tps = TranslationProject.objects.filter(
+        id__in=updated.keys()).select_related("language", "project")
+    for tp in tps:
+        for leaderboard in get_leaderboards(tp):
+            dates = leaderboards.setdefault(
+                leaderboard.key,
+                (leaderboard, {}))[1]
+            for date, users in updated[tp.id].items():
+                dates[date] = dates.get(date, set()) | users
+    for leaderboard, dates in leaderboards.values():
+        leaderboard.update(dates)
+
+
+def update_leaderboards(tp_scores):
+    """Updates the leaderboards for changed TP scores once the current
+    transaction is committed, so that they never include scores that are
+    rolled back.
+
+    :param tp_scores: iterable of ``(tp_id, date, user_id)``
+    """
+    tp_scores = list(tp_scores)
+    if tp_scores:
+        transaction.on_commit(lambda: _update_leaderboards(tp_scores))
+
+
+def _clear_leaderboards():
+    connection = get_redis_connection("redis")
+    keys = list(connection.scan_iter("%s.*" % Leaderboard.ns))
+    if keys:
+        connection.delete(*keys)
+
+
+def clear_leaderboards():
+    _clear_leaderboards()
+    # leaderboards built by other processes before the commit are cleared
+    # again once it is
+    transaction.on_commit(_clear_leaderboards)
@@ -7,12 +7,11 @@
 # AUTHORS file for copyright and authorship information.
 
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 
-from pootle.core.delegate import crud, score_updater
+from pootle.core.delegate import crud, score_accumulator, score_updater
 from pootle.core.signals import create, update, update_scores
-from pootle.core.utils.timezone import localdate
 from pootle_statistics.models import Submission
 from pootle_store.models import Store, Suggestion
 from pootle_translationproject.models import TranslationProject
@@ -55,6 +54,12 @@ def update_tp_scores_handler(**kwargs):
         date=kwargs.get("date"))
 
 
+@receiver(update_scores, sender=Submission)
+def update_submission_scores_handler(**kwargs):
+    score_accumulator.get(Submission)().add_submissions(
+        kwargs["submissions"])
+
+
 @receiver(update_scores, sender=Store)
 def update_store_scores_handler(**kwargs):
     store = kwargs["instance"]
@@ -73,42 +78,32 @@ def handle_store_score_updated(**kwargs):
         date=kwargs["instance"].date)
 
 
+@receiver(pre_save, sender=Suggestion)
+def handle_suggestion_pre_save(**kwargs):
+    suggestion = kwargs["instance"]
+    # a suggestion is scored as reviewed when it is saved with a review,
+    # and was pending before
+    suggestion._score_review = (
+        not suggestion.is_pending
+        and (not suggestion.pk
+             or suggestion.__class__.objects.pending().filter(
+                 pk=suggestion.pk).exists()))
+
+
 @receiver(post_save, sender=Suggestion)
 def handle_suggestion_change(**kwargs):
     suggestion = kwargs["instance"]
-    is_system_user = (
-        (suggestion.is_pending
-         and (suggestion.user_id
-              == get_user_model().objects.get_system_user().id))
-        or (not suggestion.is_pending
-            and (suggestion.reviewer_id
-                 == get_user_model().objects.get_system_user().id)))
-    if is_system_user:
-        return
-    change_date = (
-        suggestion.review_time
-        if not suggestion.is_pending
-        else suggestion.creation_time)
-    update_scores.send(
-        suggestion.unit.store.__class__,
-        instance=suggestion.unit.store,
-        users=[
-            suggestion.user_id
-            if suggestion.is_pending
-            else suggestion.reviewer_id],
-        date=localdate(change_date))
+    score_accumulator.get(suggestion.__class__)().add_suggestion(
+        suggestion,
+        created=kwargs["created"],
+        reviewed=getattr(suggestion, "_score_review", False))
 
 
 @receiver(post_save, sender=Submission)
 def handle_submission_added(**kwargs):
-    submission = kwargs["instance"]
-    is_system_user = (
-        submission.submitter
-        == get_user_model().objects.get_system_user())
-    if is_system_user:
+    if not kwargs["created"]:
         return
+    submission = kwargs["instance"]
     update_scores.send(
-        submission.unit.store.__class__,
-        instance=submission.unit.store,
-        users=[submission.submitter_id],
-        date=localdate(submission.creation_time))
+        submission.__class__,
+        submissions=[submission])
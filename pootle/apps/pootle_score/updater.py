@@ -9,7 +9,8 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
 from django.utils.functional import cached_property
 
 from pootle.core.bulk import BulkCRUD
@@ -17,10 +18,11 @@ from pootle.core.contextmanagers import bulk_operations, keep_data
 from pootle.core.delegate import event_score, log, score_updater
 from pootle.core.signals import create, update, update_scores
 from pootle.core.utils.timezone import localdate
-from pootle_log.utils import LogEvent
+from pootle_log.utils import Log, LogEvent
 from pootle_score.models import UserStoreScore, UserTPScore
 from pootle_translationproject.models import TranslationProject
 
+from .leaderboard import clear_leaderboards, update_leaderboards
 from .utils import to_datetime
 
 
@@ -68,12 +70,12 @@ class UserTPScoreCRUD(UserRelatedScoreCRUD):
         return qs.select_related("tp")
 
     def update_scores(self, objects):
-        users = (
-            set(user
-                for user
-                in objects.values_list("user_id", flat=True))
+        tp_scores = (
+            set(objects.values_list("tp_id", "date", "user_id"))
             if not isinstance(objects, list)
-            else set(x.user_id for x in objects))
+            else set((x.tp_id, x.date, x.user_id) for x in objects))
+        update_leaderboards(tp_scores)
+        users = set(user for tp, date, user in tp_scores)
         update_scores.send(
             get_user_model(),
             users=users)
@@ -94,6 +96,14 @@ class ScoreUpdater(object):
     def scoring(self):
         return event_score.gather(self.event_class)
 
+    def get_event_score(self, event):
+        if event.action not in self.scoring:
+            return
+        scores = self.scoring[event.action](event).get_score()
+        if not scores or not any(x > 0 for x in scores.values()):
+            return
+        return scores
+
     def set_scores(self, calculated_scores, existing=None):
         calculated_scores = list(self.iterate_scores(calculated_scores))
         score_dict = {
@@ -138,6 +148,13 @@ class ScoreUpdater(object):
             if len(users) == 1
             else qs.filter(**{"%s__in" % field: users}))
 
+    def filter_dates(self, qs, start=None, end=None):
+        if start is not None:
+            qs = qs.filter(date__gte=start)
+        if end is not None:
+            qs = qs.filter(date__lt=end)
+        return qs
+
     def find_existing_scores(self, scores):
         existing_scores = self.score_model.objects.none()
         users = set()
@@ -179,12 +196,11 @@ class ScoreUpdater(object):
             objects=created)
         return created
 
-    def update(self, users=None, existing=None, date=None):
+    def update(self, users=None, existing=None, date=None, start=None,
+               end=None):
         if date is not None:
             start = date
             end = date + timedelta(days=1)
-        else:
-            start = end = None
         return self.set_scores(
             self.calculate(users=users, start=start, end=end),
             existing=existing)
@@ -206,9 +222,13 @@ class ScoreUpdater(object):
             scores[tp].append(tp_score[1:])
         return scores
 
-    def get_store_scores(self, tp):
-        store_scores = self.store_score_model.objects.filter(
-            store__translation_project_id=tp.id).order_by("store_id").values_list(
+    def get_store_scores(self, tp, start=None, end=None):
+        store_scores = self.filter_dates(
+            self.store_score_model.objects.filter(
+                store__translation_project_id=tp.id),
+            start,
+            end)
+        store_scores = store_scores.order_by("store_id").values_list(
                 "store_id",
                 "id",
                 "date",
@@ -239,10 +259,8 @@ class StoreScoreUpdater(ScoreUpdater):
         return self.context
 
     def score_event(self, event, calculated_scores):
-        if event.action not in self.scoring:
-            return
-        scores = self.scoring[event.action](event).get_score()
-        if not scores or not any(x > 0 for x in scores.values()):
+        scores = self.get_event_score(event)
+        if not scores:
             return
         event_date = localdate(event.timestamp)
         calculated_scores[event_date] = (
@@ -318,7 +336,10 @@ class TPScoreUpdater(ScoreUpdater):
 
     def calculate(self, start=None, end=None, users=None):
         qs = self.filter_users(self.store_score_model.objects, users)
-        qs = qs.filter(store__translation_project=self.tp)
+        qs = self.filter_dates(
+            qs.filter(store__translation_project=self.tp),
+            start,
+            end)
         return qs.order_by(
             "date", "user").values_list(
                 "date", "user").annotate(
@@ -342,22 +363,31 @@ class TPScoreUpdater(ScoreUpdater):
         tp_scores.delete()
         store_scores.delete()
         user_scores.update(score=0)
+        clear_leaderboards()
         user_score_updater = score_updater.get(get_user_model())(users=users)
         user_score_updater.update(users=users)
 
-    def refresh_scores(self, users=None, existing=None, existing_tps=None):
+    def refresh_scores(self, users=None, existing=None, existing_tps=None,
+                       start=None, end=None):
         suppress_tp_scores = keep_data(
             signals=(update_scores, ),
             suppress=(TranslationProject, ))
-        existing = existing or self.get_store_scores(self.tp)
+        existing = existing or self.get_store_scores(
+            self.tp, start=start, end=end)
         with bulk_operations(UserTPScore):
             with suppress_tp_scores:
                 with bulk_operations(UserStoreScore):
                     for store in self.tp.stores.iterator():
                         score_updater.get(store.__class__)(store).update(
                             users=users,
-                            existing=existing.get(store.id))
-            self.update(users=users, existing=existing_tps)
+                            existing=existing.get(store.id),
+                            start=start,
+                            end=end)
+            self.update(
+                users=users,
+                existing=existing_tps,
+                start=start,
+                end=end)
 
 
 class UserScoreUpdater(ScoreUpdater):
@@ -395,6 +425,7 @@ class UserScoreUpdater(ScoreUpdater):
         tp_scores.delete()
         store_scores.delete()
         scores.update(score=0)
+        clear_leaderboards()
 
     def refresh_scores(self, users=None, **kwargs):
         suppress_user_scores = keep_data(
@@ -409,3 +440,115 @@ class UserScoreUpdater(ScoreUpdater):
                         users=users,
                         existing_tps=tp_scores.get(tp.id))
                 self.update(users=users)
+
+
+class ScoreAccumulator(ScoreUpdater):
+    """Adds the scores of new submissions and suggestions to the existing
+    store and TP scores, rather than recalculating the scores from all of
+    the events.
+    """
+    store_score_model = UserStoreScore
+    tp_score_model = UserTPScore
+
+    def __init__(self, *args, **kwargs):
+        self.context = None
+
+    @cached_property
+    def logs(self):
+        return Log()
+
+    @cached_property
+    def meta_users(self):
+        User = get_user_model()
+        return set(
+            User.objects.filter(
+                username__in=User.objects.META_USERS).values_list(
+                    "id", flat=True))
+
+    def add_submissions(self, submissions):
+        return self.add(
+            self.logs.get_submission_event(submission)
+            for submission
+            in submissions)
+
+    def add_suggestion(self, suggestion, created=False, reviewed=False):
+        events = []
+        if created and suggestion.creation_time:
+            events.append(
+                self.logs.get_suggestion_created_event(suggestion))
+        if reviewed and suggestion.review_time:
+            events.append(
+                self.logs.get_suggestion_reviewed_event(suggestion))
+        return self.add(events)
+
+    def calculate(self, events):
+        calculated_scores = {}
+        for event in events:
+            if not event.user or event.user.id in self.meta_users:
+                continue
+            scores = self.get_event_score(event)
+            if not scores:
+                continue
+            key = (
+                event.unit.store.translation_project_id,
+                event.unit.store_id,
+                localdate(event.timestamp),
+                event.user.id)
+            calculated_scores[key] = calculated_scores.get(key, {})
+            for k, score in scores.items():
+                if not score:
+                    continue
+                calculated_scores[key][k] = (
+                    calculated_scores[key].get(k, 0)
+                    + score)
+        return calculated_scores
+
+    def add_score(self, model, score, **kwargs):
+        increments = {
+            k: F(k) + value
+            for k, value
+            in score.items()}
+        if model.objects.filter(**kwargs).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                # bulk_create doesnt send post_save, which would
+                # recalculate the scores
+                model.objects.bulk_create([model(**dict(kwargs, **score))])
+        except IntegrityError:
+            # created by another process since it was updated
+            model.objects.filter(**kwargs).update(**increments)
+
+    def add(self, events):
+        calculated_scores = self.calculate(events)
+        if not calculated_scores:
+            return calculated_scores
+        tp_scores = {}
+        with transaction.atomic():
+            for key, score in calculated_scores.items():
+                tp, store, date, user = key
+                self.add_score(
+                    self.store_score_model,
+                    score,
+                    store_id=store,
+                    date=date,
+                    user_id=user)
+                tp_scores[(tp, date, user)] = tp_scores.get(
+                    (tp, date, user), {})
+                for k, value in score.items():
+                    tp_scores[(tp, date, user)][k] = (
+                        tp_scores[(tp, date, user)].get(k, 0)
+                        + value)
+            for (tp, date, user), score in tp_scores.items():
+                self.add_score(
+                    self.tp_score_model,
+                    score,
+                    tp_id=tp,
+                    date=date,
+                    user_id=user)
+        update_leaderboards(tp_scores.keys())
+        # user scores are the sum of the last 30 days of TP scores, so
+        # they are recalculated rather than incremented
+        users = set(key[3] for key in calculated_scores)
+        score_updater.get(get_user_model())(users=users).update(users=users)
+        return calculated_scores
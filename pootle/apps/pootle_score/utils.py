@@ -21,6 +21,7 @@ from pootle_app.models import Directory
 from pootle_language.models import Language
 
 from .apps import PootleScoreConfig
+from .leaderboard import Leaderboard
 from .models import UserTPScore
 
 
@@ -43,10 +44,16 @@ def to_datetime(possible_dt):
 class Scores(object):
     ns = "pootle.score"
     sw_version = PootleScoreConfig.version
+    leaderboard_key = None
 
     def __init__(self, context):
         self.context = context
 
+    @cached_property
+    def leaderboard(self):
+        if self.leaderboard_key:
+            return Leaderboard(self)
+
     @property
     def revision(self):
         return revision.get(Directory)(
@@ -84,18 +91,52 @@ class Scores(object):
     def filter_scores(self, qs):
         return qs
 
-    @persistent_property
+    def get_ranked_scorers(self, offset=0, limit=None):
+        """Returns the top scorers from the leaderboard, with the same
+        values as ``get_top_scorers``.
+        """
+        ranking = self.leaderboard.get_ranking(offset=offset, limit=limit)
+        if not ranking:
+            return ()
+        scorers = self.get_scores(self.leaderboard.days).filter(
+            user_id__in=[user for user, score in ranking]).order_by(
+                "user").values(
+                    "user", "user__username", "user__email",
+                    "user__full_name").annotate(
+                        Sum("score"),
+                        Sum("suggested"),
+                        Sum("reviewed"),
+                        Sum("translated"))
+        scorers = {scorer.pop("user"): scorer for scorer in scorers}
+        return tuple(
+            scorers[user]
+            for user, score
+            in ranking
+            if user in scorers)
+
+    @property
     def top_scorers(self):
-        return tuple(self.get_top_scorers())
+        if not self.leaderboard:
+            return tuple(self.get_top_scorers())
+        return self.get_ranked_scorers()
+
+    @property
+    def top_scorer_count(self):
+        if not self.leaderboard:
+            return len(self.top_scorers)
+        return self.leaderboard.count()
 
     def display(self, offset=0, limit=5, language=None, formatter=None):
-        scorers = self.top_scorers
-        if offset or limit:
-            scorers = list(scorers)
-        if offset:
-            scorers = scorers[offset:]
-        if limit:
-            scorers = scorers[:limit]
+        if self.leaderboard:
+            scorers = self.get_ranked_scorers(offset=offset, limit=limit)
+        else:
+            scorers = self.top_scorers
+            if offset or limit:
+                scorers = list(scorers)
+            if offset:
+                scorers = scorers[offset:]
+            if limit:
+                scorers = scorers[:limit]
         return display.get(Scores)(
             top_scores=scorers,
             formatter=formatter,
@@ -105,6 +146,10 @@ class Scores(object):
 class LanguageScores(Scores):
     ns = "pootle.score.language"
 
+    @property
+    def leaderboard_key(self):
+        return "language.%s" % self.context.id
+
     @cached_property
     def cache_key(self):
         return (
@@ -120,6 +165,10 @@ class LanguageScores(Scores):
 class ProjectScores(Scores):
     ns = "pootle.score.project"
 
+    @property
+    def leaderboard_key(self):
+        return "project.%s" % self.context.id
+
     @cached_property
     def cache_key(self):
         return (
@@ -134,6 +183,7 @@ class ProjectScores(Scores):
 
 class ProjectSetScores(Scores):
     ns = "pootle.score.projects"
+    leaderboard_key = "projects"
 
     @cached_property
     def cache_key(self):
@@ -146,6 +196,10 @@ class ProjectSetScores(Scores):
 class TPScores(Scores):
     ns = "pootle.score.tp"
 
+    @property
+    def leaderboard_key(self):
+        return "tp.%s" % self.context.id
+
     @cached_property
     def cache_key(self):
         return (
@@ -217,9 +271,10 @@ class UserScores(Scores):
         """
         language = self.get_top_language_within(days)
         if language:
-            # this only gets scores for the last 30 days as that is cached
-            language_scores = self.get_language_top_scores(language)
-            for index, user_score in enumerate(language_scores):
-                if user_score['user__username'] == self.context.username:
-                    return index + 1, language
+            # this only gets the rank for the last 30 days as that is what
+            # the leaderboard holds
+            rank = scores.get(language.__class__)(
+                language).leaderboard.rank(self.context.id)
+            if rank is not None:
+                return rank + 1, language
         return -1, language
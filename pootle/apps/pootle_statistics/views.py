@@ -102,5 +102,5 @@ class TopContributorsJSON(PootleJSON):
         return dict(
             items=list(top_scorers),
             has_more_items=(
-                len(self.scores.top_scorers)
+                self.scores.top_scorer_count
                 > (self.offset + self.limit)))
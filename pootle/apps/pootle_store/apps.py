@@ -15,6 +15,7 @@ class PootleStoreConfig(AppConfig):
 
     name = "pootle_store"
     verbose_name = "Pootle Store"
+    version = "0.1.0"
 
     def ready(self):
         importlib.import_module("pootle_store.getters")
@@ -14,7 +14,9 @@ from pootle.core.contextmanagers import bulk_operations, keep_data
 from pootle.core.signals import (
     update_checks, update_data, update_revisions, update_scores)
 from pootle_data.models import StoreChecksData, StoreData, TPChecksData, TPData
+from pootle_revision.contextmanagers import coalesce_revisions
 from pootle_score.models import UserStoreScore
+from pootle_statistics.models import Submission
 
 from .models import Unit
 
@@ -24,6 +26,7 @@ class Updated(object):
     scores = None
     checks = None
     revisions = False
+    submissions = None
 
 
 def _callback_handler(sender, updated, **kwargs):
@@ -60,6 +63,10 @@ def _callback_handler(sender, updated, **kwargs):
                     instance=sender,
                     users=updated.scores,
                     **kwargs)
+    if updated.submissions:
+        update_scores.send(
+            Submission,
+            submissions=updated.submissions)
     if updated.revisions:
         update_revisions.send(
             sender.__class__,
@@ -98,9 +105,16 @@ def update_store_after(sender, **kwargs):
             updated.scores = (
                 updated.scores
                 | set(kwargs.get("users") or []))
+
+        @receiver(update_scores, sender=Submission)
+        def handle_update_submission_scores(**kwargs):
+            if updated.submissions is None:
+                updated.submissions = []
+            updated.submissions.extend(kwargs["submissions"])
         yield
 
     if "kwargs" in kwargs:
         kwargs.update(kwargs.pop("kwargs"))
-    kwargs.get("callback", _callback_handler)(
-        sender, updated, **kwargs)
+    with coalesce_revisions():
+        kwargs.get("callback", _callback_handler)(
+            sender, updated, **kwargs)
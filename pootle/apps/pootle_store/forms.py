@@ -338,6 +338,10 @@ class UnitSearchForm(forms.Form):
     uids = MultipleArgsField(
         field=forms.IntegerField(),
         required=False)
+    cursor = forms.IntegerField(required=False)
+    total = forms.IntegerField(
+        required=False,
+        min_value=0)
     filter = forms.ChoiceField(
         required=False,
         choices=UNIT_SEARCH_FILTER_CHOICES)
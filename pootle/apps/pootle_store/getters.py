@@ -18,7 +18,6 @@ from pootle_config.delegate import (
 from pootle_misc.util import import_func
 
 from .models import Store, Suggestion, SuggestionState, Unit
-from .unit.search import DBSearchBackend
 from .unit.timeline import (
     ComparableUnitTimelineLogEvent, UnitTimelineGroupedEvents, UnitTimelineLog)
 from .utils import (
@@ -57,7 +56,7 @@ def get_frozen_unit(**kwargs_):
 
 @getter(search_backend, sender=Unit)
 def get_search_backend(**kwargs_):
-    return DBSearchBackend
+    return import_func(settings.POOTLE_SEARCH_BACKEND)
 
 
 @getter(review, sender=Suggestion)
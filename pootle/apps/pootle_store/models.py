@@ -286,6 +286,7 @@ class Unit(AbstractUnit):
         if should_expire_cache:
             del self.__dict__[field.get_cache_name()]
         self._frozen = frozen.get(Unit)(self)
+        self._data_state = None
 
     def save(self, *args, **kwargs):
         created = self.id is None
@@ -303,6 +304,7 @@ class Unit(AbstractUnit):
             timestamp = self.creation_time
         elif self.source_updated:
             unit_source = self.unit_source
+        data_before = self.get_data_state()
         if created or self.source_updated:
             unit_source.save()
         if self.updated and (created or not self.changed):
@@ -330,8 +332,32 @@ class Unit(AbstractUnit):
                 self.change.reviewed_by = reviewed_by
                 self.change.reviewed_on = timestamp
             self.change.save()
+        if data_before is not None:
+            data_after = self._data_state = (
+                self.state, self.unit_source.source_wordcount)
         update_data.send(
-            self.store.__class__, instance=self.store)
+            self.store.__class__,
+            instance=self.store,
+            unit_deltas=(
+                [dict(before=data_before,
+                      after=data_after,
+                      revision=self.revision,
+                      mtime=self.mtime)]
+                if data_before is not None
+                else None))
+
+    def get_data_state(self):
+        """Returns the state and source wordcount that this unit last
+        contributed to its store's data, or `None` if unknown
+        """
+        if getattr(self, "_data_state", None) is not None:
+            return self._data_state
+        if self._frozen.pk is None:
+            return None, 0
+        try:
+            return self._frozen.state, self.unit_source.source_wordcount
+        except UnitSource.DoesNotExist:
+            return None
 
     def get_absolute_url(self):
         return self.store.get_absolute_url()
@@ -967,6 +993,10 @@ class Store(AbstractStore):
         return StoreSerialization(self).serialize(
             include_obsolete=include_obsolete, raw=raw)
 
+    def serialize_stream(self, include_obsolete=False, raw=False):
+        return StoreSerialization(self).stream(
+            include_obsolete=include_obsolete, raw=raw)
+
 # # # # # # # # # # # #  TranslationStore # # # # # # # # # # # # #
 
     suggestions_in_format = True
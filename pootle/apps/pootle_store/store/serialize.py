@@ -6,10 +6,124 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+import re
+import zlib
+from hashlib import md5
+from itertools import islice
+
+from translate.storage.pocommon import pofile
+from translate.storage.xliff import xlifffile
+
+from django.conf import settings
+from django.db.models import Count, Max
 from django.utils.functional import cached_property
 
+from pootle.core.cache import get_cache
 from pootle.core.delegate import config, serializers
 
+from ..apps import PootleStoreConfig
+
+
+cache = get_cache("lru")
+
+# number of units converted and serialized at a time when streaming
+UNIT_CHUNK_SIZE = 500
+
+
+class StoreStream(object):
+    """Serializes a Store as an iterator of chunks.
+
+    Formats that cannot be serialized in parts are converted in full and
+    yielded as a single chunk.
+    """
+
+    def __init__(self, serialization, include_obsolete=False, raw=False,
+                 chunk_size=None):
+        self.serialization = serialization
+        self.include_obsolete = include_obsolete
+        self.raw = raw
+        self.chunk_size = chunk_size or UNIT_CHUNK_SIZE
+
+    def __iter__(self):
+        yield self.serialization.tostring(
+            include_obsolete=self.include_obsolete,
+            raw=self.raw)
+
+    @property
+    def syncer(self):
+        return self.serialization.store.syncer
+
+    @property
+    def unit_chunks(self):
+        units = self.syncer.get_units(
+            include_obsolete=self.include_obsolete).iterator()
+        while True:
+            chunk = list(islice(units, self.chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+
+class POStoreStream(StoreStream):
+    """Yields the PO header, and then the units in chunks"""
+
+    def __iter__(self):
+        header = self.serialization.get_header_store()
+        yield str(header)
+        for units in self.unit_chunks:
+            yield "".join(
+                "\n%s" % (
+                    self.syncer.convert_unit(
+                        unit,
+                        header.UnitClass,
+                        raw=self.raw)._getoutput().encode(header.encoding))
+                for unit
+                in units)
+
+
+class XLIFFStoreStream(StoreStream):
+    """Yields the XLIFF document up to its first file, the units in chunks
+    with their enclosing files, and then the end of the document.
+    """
+
+    file_re = re.compile(
+        r"(?P<opening><file\b(?P<attrs>[^>]*)>.*?<body>)"
+        r"(?P<units>.*?)"
+        r"(?P<closing>\s*</body>\s*</file>)",
+        re.S)
+    original_re = re.compile(r"\boriginal=(\"[^\"]*\"|'[^']*')")
+
+    def get_original(self, match):
+        original = self.original_re.search(match.group("attrs"))
+        return original and original.group(1)
+
+    def __iter__(self):
+        document = str(self.serialization.get_header_store())
+        start = document.find("<file")
+        if start == -1:
+            for chunk in super(XLIFFStoreStream, self).__iter__():
+                yield chunk
+            return
+        head = document[:start]
+        indent = head[len(head.rstrip()):]
+        end = document[document.rindex("</file>") + len("</file>"):]
+        original = closing = None
+        for units in self.unit_chunks:
+            chunk = str(self.syncer.convert(raw=self.raw, units=units))
+            for match in self.file_re.finditer(chunk):
+                file_original = self.get_original(match)
+                if closing is None:
+                    yield head + match.group("opening")
+                elif file_original != original:
+                    yield closing + indent + match.group("opening")
+                original = file_original
+                closing = match.group("closing")
+                yield match.group("units")
+        if closing is None:
+            yield document
+        else:
+            yield closing + end
+
 
 class StoreSerialization(object):
     """Calls configured deserializers for Store"""
@@ -31,6 +145,10 @@ class StoreSerialization(object):
     def pootle_path(self):
         return self.store.pootle_path
 
+    @property
+    def max_cache_size(self):
+        return settings.POOTLE_SERIALIZED_CACHE_MAX_SIZE
+
     @cached_property
     def max_unit_revision(self):
         return self.store.data.max_unit_revision
@@ -46,24 +164,146 @@ class StoreSerialization(object):
             found_serializers.append(available_serializers[serializer])
         return found_serializers
 
-    def tostring(self, include_obsolete=False, raw=False):
-        store = self.store.syncer.convert(
-            include_obsolete=include_obsolete, raw=raw)
+    @property
+    def stream_class(self):
+        file_class = self.store.syncer.file_class
+        if issubclass(file_class, pofile):
+            return POStoreStream
+        if issubclass(file_class, xlifffile):
+            return XLIFFStoreStream
+        return StoreStream
+
+    def get_header_store(self, store=None):
+        if store is None:
+            store = self.store.syncer.convert(units=[])
         if hasattr(store, "updateheader"):
             # FIXME We need those headers on import
             # However some formats just don't support setting metadata
             max_unit_revision = self.max_unit_revision or 0
             store.updateheader(add=True, X_Pootle_Path=self.pootle_path)
             store.updateheader(add=True, X_Pootle_Revision=max_unit_revision)
-        return str(store)
+        return store
+
+    def tostring(self, include_obsolete=False, raw=False):
+        store = self.store.syncer.convert(
+            include_obsolete=include_obsolete, raw=raw)
+        return str(self.get_header_store(store))
+
+    def iterstring(self, include_obsolete=False, raw=False, chunk_size=None):
+        return iter(
+            self.stream_class(
+                self,
+                include_obsolete=include_obsolete,
+                raw=raw,
+                chunk_size=chunk_size))
 
     def pipeline(self, data):
+        """Runs the configured serializers on `data`, which can be either
+        the serialized data or an iterator of serialized chunks.
+
+        Serializers that stream receive an iterator of chunks, and other
+        serializers receive the data joined into a string. The result is of
+        the same kind as `data`.
+        """
         if not self.serializers:
             return data
+        chunked = not isinstance(data, basestring)
         for serializer in self.serializers:
+            streams = getattr(serializer, "streams", False)
+            is_string = isinstance(data, basestring)
+            if streams and is_string:
+                data = iter([data])
+            elif not streams and not is_string:
+                data = "".join(data)
             data = serializer(self.store, data).output
-        return data
+        if data is None or isinstance(data, basestring) != chunked:
+            return data
+        return iter([data]) if chunked else "".join(data)
+
+    def get_cache_key(self, include_obsolete=False, raw=False):
+        """The key changes whenever a unit in the Store is added, removed or
+        changed, or the serializers configured for its project change.
+        """
+        serialization = md5(
+            repr((self.pootle_path,
+                  self.project_serializers,
+                  include_obsolete,
+                  raw)))
+        # read from the units, as the store data is only updated once a
+        # bulk update has completed
+        units = self.store.unit_set.aggregate(
+            max_unit_revision=Max("revision"),
+            unit_count=Count("id"))
+        return (
+            "pootle.store.serialized.%s.%s.%s.%s.%s"
+            % (PootleStoreConfig.version,
+               self.store.pk,
+               units["max_unit_revision"] or 0,
+               units["unit_count"],
+               serialization.hexdigest()))
+
+    def get_cached(self, cache_key):
+        if not self.max_cache_size:
+            return
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return zlib.decompress(cached)
+
+    def set_cached(self, cache_key, compressed):
+        if self.max_cache_size and len(compressed) <= self.max_cache_size:
+            cache.set(cache_key, compressed)
+
+    def cache_chunks(self, cache_key, chunks):
+        """Yields the `chunks` while compressing them, and caches the
+        compressed data once they have all been yielded.
+        """
+        compressor = zlib.compressobj()
+        compressed = []
+        size = 0
+        for chunk in chunks:
+            yield chunk
+            if size is None:
+                continue
+            compressed.append(compressor.compress(chunk))
+            size += len(compressed[-1])
+            if size > self.max_cache_size:
+                # too big to cache
+                compressed = size = None
+        if size is not None:
+            compressed.append(compressor.flush())
+            self.set_cached(cache_key, "".join(compressed))
 
     def serialize(self, include_obsolete=False, raw=False):
-        return self.pipeline(
+        if not self.max_cache_size:
+            return self.pipeline(
+                self.tostring(include_obsolete=include_obsolete, raw=raw))
+        cache_key = self.get_cache_key(
+            include_obsolete=include_obsolete, raw=raw)
+        cached = self.get_cached(cache_key)
+        if cached is not None:
+            return cached
+        data = self.pipeline(
             self.tostring(include_obsolete=include_obsolete, raw=raw))
+        if data is not None:
+            self.set_cached(cache_key, zlib.compress(data))
+        return data
+
+    def stream(self, include_obsolete=False, raw=False, chunk_size=None):
+        """Returns an iterator of serialized chunks, which together are the
+        serialized Store. Only `chunk_size` units are held in memory at a
+        time for formats that support it.
+        """
+        if self.max_cache_size:
+            cache_key = self.get_cache_key(
+                include_obsolete=include_obsolete, raw=raw)
+            cached = self.get_cached(cache_key)
+            if cached is not None:
+                return iter([cached])
+        chunks = self.pipeline(
+            self.iterstring(
+                include_obsolete=include_obsolete,
+                raw=raw,
+                chunk_size=chunk_size))
+        if chunks is None or not self.max_cache_size:
+            return chunks
+        return self.cache_chunks(cache_key, chunks)
@@ -158,8 +158,12 @@ class StoreSyncer(object):
                          str(self.store.filetype.extension)])))
         return self._getclass(self.store)
 
-    def convert(self, fileclass=None, include_obsolete=False, raw=False):
-        """export to fileclass"""
+    def convert(self, fileclass=None, include_obsolete=False, raw=False,
+                units=None):
+        """export to fileclass
+
+        If `units` are given only those units are converted.
+        """
         fileclass = fileclass or self.file_class
         logger.debug(
             u"[sync] Converting: %s to %s",
@@ -168,14 +172,20 @@ class StoreSyncer(object):
         output = fileclass()
         output.settargetlanguage(self.language.code)
         # FIXME: we should add some headers
-        units = (
+        if units is None:
+            units = self.get_units(include_obsolete=include_obsolete).iterator()
+        for unit in units:
+            output.addunit(self.convert_unit(unit, output.UnitClass, raw=raw))
+        return output
+
+    def convert_unit(self, unit, unitclass, raw=False):
+        return self.unit_sync_class(unit, raw=raw).convert(unitclass)
+
+    def get_units(self, include_obsolete=False):
+        return (
             self.store.unit_set
             if include_obsolete
             else self.store.units)
-        for unit in units.iterator():
-            output.addunit(
-                self.unit_sync_class(unit, raw=raw).convert(output.UnitClass))
-        return output
 
     def _getclass(self, obj):
         try:
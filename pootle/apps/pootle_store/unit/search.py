@@ -6,9 +6,16 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
-from django.db.models import Max
+from hashlib import md5
+
+from django.db.models import Max, Q
+from django.utils.encoding import force_bytes
 from django.utils.functional import cached_property
 
+from pootle.core.decorators import persistent_property
+from pootle.core.delegate import revision
+from pootle_app.models import Directory
+from pootle_store.apps import PootleStoreConfig
 from pootle_store.constants import SIMPLY_SORTED
 from pootle_store.models import Unit
 from pootle_store.unit.filters import UnitSearchFilter, UnitTextSearch
@@ -16,7 +23,13 @@ from pootle_store.unit.filters import UnitSearchFilter, UnitTextSearch
 
 class DBSearchBackend(object):
 
+    ns = "pootle.unit.search"
+    sw_version = PootleStoreConfig.version
+    cache_kwargs = (
+        "category", "checks", "filter", "modified-since", "month",
+        "search", "sfields", "soptions", "sort_by", "sort_on", "user")
     default_chunk_size = None
+    text_search_class = UnitTextSearch
     default_order = "store__pootle_path", "index"
     select_related = (
         'store__translation_project__project',
@@ -60,6 +73,14 @@ class DBSearchBackend(object):
     def previous_uids(self):
         return self.kwargs.get("previous_uids", []) or []
 
+    @property
+    def cursor(self):
+        return self.kwargs.get("cursor")
+
+    @property
+    def known_total(self):
+        return self.kwargs.get("total")
+
     @property
     def sort_by(self):
         return self.kwargs.get("sort_by")
@@ -136,7 +157,7 @@ class DBSearchBackend(object):
                     change__submitted_on__lte=month[1]).distinct()
 
         if sfields and search:
-            qs = UnitTextSearch(qs).search(
+            qs = self.text_search_class(qs).search(
                 search, sfields, exact=exact, case=case)
         return qs
 
@@ -144,8 +165,129 @@ class DBSearchBackend(object):
     def results(self):
         return self.sort_qs(self.filter_qs(self.units_qs))
 
+    @property
+    def revision_path(self):
+        if not self.language_code:
+            return (
+                "/projects/%s/" % self.project_code
+                if self.project_code
+                else "/projects/")
+        if not self.project_code:
+            return "/%s/" % self.language_code
+        return (
+            "/%s/%s/%s"
+            % (self.language_code,
+               self.project_code,
+               self.dir_path or ""))
+
+    @property
+    def revision_context(self):
+        return Directory.objects.filter(
+            pootle_path=self.revision_path).first()
+
+    @property
+    def rev_cache_key(self):
+        rev_context = self.revision_context
+        if not rev_context:
+            return
+        revisions = revision.get(rev_context.__class__)(rev_context)
+        stats = revisions.get(key="stats")
+        checks = revisions.get(key="checks")
+        if stats or checks:
+            return "%s.%s" % (stats, checks)
+
+    @property
+    def search_cache_key(self):
+        search_kwargs = [
+            (k, getattr(self.kwargs.get(k), "pk", self.kwargs.get(k)))
+            for k in self.cache_kwargs]
+        search_kwargs += [
+            (k, getattr(self, k))
+            for k in ["project_code", "language_code", "dir_path", "filename"]]
+        search_kwargs.append(("request_user", self.request_user.pk))
+        return md5(force_bytes(repr(search_kwargs))).hexdigest()
+
+    @cached_property
+    def cache_key(self):
+        rev_cache_key = self.rev_cache_key
+        if not rev_cache_key:
+            return
+        return "%s.%s" % (rev_cache_key, self.search_cache_key)
+
+    @persistent_property
+    def result_uids(self):
+        """Ordered list of the ids of the units matching the search, cached
+        until the revision of the search path changes
+        """
+        return list(self.results.values_list("pk", flat=True))
+
+    @cached_property
+    def cached_uids(self):
+        if self.cache_key:
+            return self.result_uids
+
+    def get_total(self):
+        if self.cached_uids is not None:
+            return len(self.cached_uids)
+        return self.results.count()
+
+    def get_uids(self, start, end):
+        if self.cached_uids is not None:
+            return self.cached_uids[start:end]
+        return self.results[start:end].values_list("pk", flat=True)
+
+    def get_all_uids(self):
+        if self.cached_uids is not None:
+            return self.cached_uids
+        return list(self.results.values_list("pk", flat=True))
+
+    @property
+    def can_seek(self):
+        # keyset pagination only works with the default ordering
+        return bool(
+            self.cursor
+            and self.chunk_size
+            and not (self.unit_filter and self.sort_by is not None))
+
+    def get_cursor_key(self):
+        return Unit.objects.filter(pk=self.cursor).values_list(
+            "store__pootle_path", "index", "pk").first()
+
+    def seek_qs(self, qs, key):
+        pootle_path, index, pk = key
+        return qs.filter(
+            Q(store__pootle_path__gt=pootle_path)
+            | Q(store__pootle_path=pootle_path, index__gt=index)
+            | Q(store__pootle_path=pootle_path, index=index, pk__gt=pk)
+        ).order_by(*(self.default_order + ("pk", )))
+
+    def seek(self):
+        """Returns the chunk of results following the cursor unit, without
+        counting or offsetting into the result set.
+
+        The start offset is trusted from the client, as is the total if it
+        has been provided.
+        """
+        key = self.get_cursor_key()
+        if key is None:
+            return
+        uid_list = list(
+            self.seek_qs(self.results, key)[:2 * self.chunk_size]
+                .values_list("pk", flat=True))
+        start = self.offset or 0
+        end = start + len(uid_list)
+        total = (
+            self.known_total
+            if self.known_total is not None
+            else self.get_total())
+        return max(total, end), start, end, uid_list
+
     def search(self):
-        total = self.results.count()
+        if self.can_seek:
+            result = self.seek()
+            if result is not None:
+                return result
+        total = self.get_total()
         start = self.offset
 
         if start > (total + len(self.previous_uids)):
@@ -166,7 +308,7 @@ class DBSearchBackend(object):
             # result set
             _start = start = max(self.offset - len(self.previous_uids), 0)
             end = min(self.offset + (2 * self.chunk_size), total)
-            uid_list = self.results[start:end].values_list("pk", flat=True)
+            uid_list = self.get_uids(start, end)
             offset = 0
             for i, uid in enumerate(uid_list):
                 if uid in self.previous_uids:
@@ -181,7 +323,7 @@ class DBSearchBackend(object):
                 uid_list[offset:offset + (2 * self.chunk_size)])
         if find_unit:
             # find the uid in the Store
-            uid_list = list(self.results.values_list("pk", flat=True))
+            uid_list = self.get_all_uids()
             if self.chunk_size and self.uids[0] in uid_list:
                 unit_index = uid_list.index(self.uids[0])
                 start = (
@@ -195,4 +337,4 @@ class DBSearchBackend(object):
             total,
             start,
             end,
-            list(self.results[start:end].values_list("pk", flat=True)))
+            list(self.get_uids(start, end)))
@@ -14,6 +14,7 @@ from django.utils.functional import cached_property
 from pootle.core.delegate import frozen, review, versioned
 from pootle.core.models import Revision
 from pootle_store.contextmanagers import update_store_after
+from pootle_translationproject.contextmanagers import update_tps_after
 
 from .constants import OBSOLETE, PARSED, POOTLE_WINS
 from .diff import StoreDiff
@@ -441,3 +442,31 @@ class StoreUpdater(object):
             if suggested:
                 suggestion_count += 1
         return update_count, suggestion_count
+
+
+def update_stores(updates, **kwargs):
+    """Updates many Stores, running the data, checks, scores and revisions
+    updates once for each of their translation projects when all of the
+    Stores have been updated, rather than once for each Store.
+
+    Each Store should only be updated once in a batch, as the Store data
+    is not updated until the batch has completed.
+
+    If updating a Store fails when not in a transaction, the data of the
+    Stores already updated is still updated before the error is raised.
+
+    :param updates: an iterable of ``(store, source_store)`` or
+      ``(store, source_store, update_kwargs)`` tuples, where
+      ``update_kwargs`` are used in place of ``kwargs`` for that Store.
+    :param kwargs: arguments for ``Store.update``.
+    :returns: a list of the ``(update_revision, changes)`` of each update.
+    """
+    updated = []
+    with update_tps_after():
+        for update in updates:
+            store, source_store = update[:2]
+            update_kwargs = dict(kwargs)
+            if len(update) > 2:
+                update_kwargs.update(update[2])
+            updated.append(store.update(source_store, **update_kwargs))
+    return updated
@@ -17,7 +17,7 @@ from django.utils.functional import cached_property
 from pootle.core.delegate import site, states, unitid
 from pootle.core.mail import send_mail
 from pootle.core.signals import update_data, update_scores
-from pootle.core.utils.timezone import datetime_min, localdate, make_aware
+from pootle.core.utils.timezone import datetime_min, make_aware
 from pootle.i18n.gettext import ugettext as _
 from pootle_statistics.models import (
     MUTED, UNMUTED, SubmissionFields, SubmissionTypes)
@@ -349,10 +349,8 @@ class UnitLifecycle(object):
             return
         self.unit.submission_set.bulk_create(subs)
         update_scores.send(
-            self.unit.store.__class__,
-            instance=self.unit.store,
-            users=[sub.submitter_id for sub in subs],
-            date=localdate(self.unit.mtime))
+            self.submission_model,
+            submissions=subs)
 
     def sub_comment_update(self, **kwargs):
         _kwargs = dict(
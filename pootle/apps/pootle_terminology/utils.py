@@ -6,8 +6,12 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+from collections import namedtuple
+
 from django.utils.functional import cached_property
+from django.utils.lru_cache import lru_cache
 
+from pootle.core.cache import get_cache
 from pootle.core.decorators import persistent_property
 from pootle.core.delegate import revision, text_comparison
 from pootle_store.constants import TRANSLATED
@@ -87,6 +91,78 @@ class UnitTerminology(TextStemmer):
             self.associate_stems(stems - existing_stems)
 
 
+TermText = namedtuple("TermText", ["text", "tokens", "stems"])
+
+
+class TerminologyIndex(object):
+    """Pre-tokenised terminology for a language
+
+    `terms` is a list of `(unit_id, (source, target), TermText)` for the
+    terminology units, ordered by unit id, and `stems` maps each stem to the
+    positions in `terms` of the units that contain it.
+    """
+
+    ns = "pootle.terminology.index"
+    sw_version = PootleTerminologyConfig.version
+
+    def __init__(self, language_id, revision):
+        self.language_id = language_id
+        self.revision = revision
+
+    @property
+    def cache_key(self):
+        return (
+            "%s.%s.%s.%s"
+            % (self.ns,
+               self.sw_version,
+               self.language_id,
+               self.revision))
+
+    @property
+    def terminology_units(self):
+        return Unit.objects.filter(
+            state=TRANSLATED,
+            store__translation_project__project__code="terminology",
+            store__translation_project__language_id=self.language_id)
+
+    def build(self):
+        terms = []
+        stems = {}
+        units = self.terminology_units.order_by("id").values_list(
+            "id", "source_f", "target_f")
+        for unit_id, source, target in units.iterator():
+            comparison = text_comparison.get()(source)
+            for stem in comparison.stems:
+                stems.setdefault(stem, []).append(len(terms))
+            terms.append(
+                (unit_id,
+                 (source.lower().strip(), target.lower().strip()),
+                 TermText(
+                     comparison.text,
+                     comparison.tokens,
+                     comparison.stems)))
+        return dict(terms=terms, stems=stems)
+
+    def get(self):
+        cache = get_cache("lru")
+        index = cache.get(self.cache_key)
+        if index is None:
+            index = self.build()
+            cache.set(self.cache_key, index)
+        return index
+
+
+@lru_cache(maxsize=32)
+def get_terminology_index(language_id, revision):
+    """Return the terminology index for a language at the given revision of
+    its terminology TP.
+
+    Indexes are held in process, falling back to the `lru` cache and
+    otherwise built from the db.
+    """
+    return TerminologyIndex(language_id, revision).get()
+
+
 class UnitTerminologyMatcher(TextStemmer):
 
     ns = "pootle.terminology.matcher"
@@ -94,7 +170,7 @@ class UnitTerminologyMatcher(TextStemmer):
     similarity_threshold = .2
     max_matches = 10
 
-    @property
+    @cached_property
     def revision_context(self):
         term_tp = TranslationProject.objects.select_related("directory").filter(
             language_id=self.language_id,
@@ -148,8 +224,39 @@ class UnitTerminologyMatcher(TextStemmer):
                 matched.append(target_pair)
         return sorted(matches, key=lambda x: -x[0])[:self.max_matches]
 
+    @property
+    def index(self):
+        if self.revision_context is None:
+            return dict(terms=[], stems={})
+        return get_terminology_index(
+            self.language_id,
+            self.rev_cache_key)
+
+    def similar_terms(self, index):
+        candidates = set()
+        for stem in self.stems:
+            candidates.update(index["stems"].get(stem, []))
+        matches = []
+        matched = set()
+        for position in sorted(candidates):
+            unit_id, target_pair, term = index["terms"][position]
+            if target_pair in matched:
+                continue
+            similarity = self.comparison.compare(term)
+            if similarity > self.similarity_threshold:
+                matches.append((similarity, unit_id))
+                matched.add(target_pair)
+        return sorted(matches, key=lambda x: -x[0])[:self.max_matches]
+
     @persistent_property
     def matches(self):
-        return self.similar(
-            self.terminology_units.filter(
-                stems__root__in=self.stems).distinct())
+        matches = self.similar_terms(self.index)
+        if not matches:
+            return []
+        units = self.terminology_units.in_bulk(
+            [unit_id for similarity, unit_id in matches])
+        return [
+            (similarity, units[unit_id])
+            for similarity, unit_id
+            in matches
+            if unit_id in units]
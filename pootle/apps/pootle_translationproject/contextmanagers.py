@@ -9,6 +9,7 @@
 from contextlib import contextmanager
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.dispatch import receiver
 
 from pootle.core.contextmanagers import bulk_operations, keep_data
@@ -16,7 +17,9 @@ from pootle.core.signals import (
     update_checks, update_data, update_revisions, update_scores)
 from pootle_app.models import Directory
 from pootle_data.models import StoreChecksData, StoreData, TPChecksData, TPData
+from pootle_revision.contextmanagers import coalesce_revisions
 from pootle_score.models import UserStoreScore, UserTPScore
+from pootle_statistics.models import Submission
 from pootle_store.models import QualityCheck, Store
 
 
@@ -27,10 +30,16 @@ class Updated(object):
     revisions = None
     score_stores = None
     score_users = None
+    submissions = None
     tp_scores = False
 
 
 def _handle_update_stores(sender, updated):
+    """Sends the deferred signals for the updated stores.
+
+    The receivers for the TP are returned, as they are only called when the
+    bulk operations have completed, and must be referenced until then.
+    """
 
     @receiver(update_data, sender=sender.__class__)
     def update_tp_data_handler(**kwargs):
@@ -78,6 +87,7 @@ def _handle_update_stores(sender, updated):
                 store.__class__,
                 instance=store,
                 users=updated.score_users)
+    return update_tp_data_handler, update_tp_scores_handler
 
 
 def _update_stores(sender, updated):
@@ -89,7 +99,8 @@ def _update_stores(sender, updated):
             StoreChecksData))
     with keep_data(suppress=(sender.__class__, )):
         with bulk_stores:
-            _handle_update_stores(sender, updated)
+            handlers = _handle_update_stores(sender, updated)
+    del handlers
 
 
 def _callback_handler(sender, updated, **kwargs):
@@ -124,6 +135,10 @@ def _callback_handler(sender, updated, **kwargs):
                     sender.__class__,
                     instance=sender,
                     users=updated.score_users)
+    if updated.submissions:
+        update_scores.send(
+            Submission,
+            submissions=updated.submissions)
     if updated.revisions:
         update_revisions.send(
             Directory,
@@ -131,45 +146,217 @@ def _callback_handler(sender, updated, **kwargs):
             keys=["stats", "checks"])
 
 
+def _connect_handlers(get_updated):
+    """Connects receivers that record the updates sent for Stores and Units,
+    on the ``Updated`` returned by ``get_updated`` for the Store.
+
+    The receivers are returned, and must be referenced while they are in
+    use.
+    """
+
+    @receiver(update_data, sender=Store)
+    def update_data_handler(**kwargs):
+        updated = get_updated(kwargs["instance"])
+        if updated.data is None:
+            updated.data = {}
+        updated.data[kwargs["instance"].id] = kwargs["instance"]
+
+    @receiver(update_checks)
+    def update_check_handler(**kwargs):
+        units = None
+        if isinstance(kwargs.get("instance"), Store):
+            store = kwargs["instance"]
+            units = set(kwargs.get("units") or [])
+        else:
+            store = kwargs["instance"].store
+            units = set([kwargs["instance"].id])
+        updated = get_updated(store)
+        if updated.checks is None:
+            updated.checks = {}
+        updated.checks[store.id] = updated.checks.get(
+            store.id,
+            dict(store=store, units=set()))
+        if units is not None:
+            updated.checks[store.id]["units"] |= units
+
+    @receiver(update_scores, sender=Store)
+    def update_scores_handler(**kwargs):
+        updated = get_updated(kwargs.get("instance"))
+        if updated is None:
+            return
+        if not updated.score_stores:
+            updated.score_stores = {}
+        if "instance" in kwargs:
+            updated.score_stores[kwargs["instance"].id] = kwargs["instance"]
+        if "users" in kwargs:
+            updated.score_users = (
+                (updated.score_users or set())
+                | set(kwargs["users"]))
+
+    @receiver(update_scores, sender=Submission)
+    def update_submission_scores_handler(**kwargs):
+        for submission in kwargs["submissions"]:
+            updated = get_updated(submission.unit.store)
+            if updated.submissions is None:
+                updated.submissions = []
+            updated.submissions.append(submission)
+    return (
+        update_data_handler,
+        update_check_handler,
+        update_scores_handler,
+        update_submission_scores_handler)
+
+
 @contextmanager
 def update_tp_after(sender, **kwargs):
     updated = Updated()
 
     with keep_data():
-
-        @receiver(update_data, sender=Store)
-        def update_data_handler(**kwargs):
-            if updated.data is None:
-                updated.data = {}
-            updated.data[kwargs["instance"].id] = kwargs["instance"]
-
-        @receiver(update_checks)
-        def update_check_handler(**kwargs):
-            if updated.checks is None:
-                updated.checks = {}
-            units = None
-            if isinstance(kwargs.get("instance"), Store):
-                store = kwargs["instance"]
-                units = set(kwargs.get("units") or [])
-            else:
-                store = kwargs["instance"].store
-                units = set([kwargs["instance"].id])
-            updated.checks[store.id] = updated.checks.get(
-                store.id,
-                dict(store=store, units=set()))
-            if units is not None:
-                updated.checks[store.id]["units"] |= units
-
-        @receiver(update_scores, sender=Store)
-        def update_scores_handler(**kwargs):
-            if not updated.score_stores:
-                updated.score_stores = {}
-            if "instance" in kwargs:
-                updated.score_stores[kwargs["instance"].id] = kwargs["instance"]
-            if "users" in kwargs:
-                updated.score_users = (
-                    (updated.score_users or set())
-                    | set(kwargs["users"]))
+        handlers = _connect_handlers(lambda store: updated)
         yield
-    kwargs.get("callback", _callback_handler)(
-        sender, updated, **kwargs)
+    del handlers
+    with coalesce_revisions():
+        kwargs.get("callback", _callback_handler)(
+            sender, updated, **kwargs)
+
+
+def _update_tps_callback_handler(tps, updated, **kwargs):
+    submissions = []
+    with coalesce_revisions():
+        for tp_id, tp_updated in updated.items():
+            # the scores for the submissions are added for all of the tps
+            # together
+            submissions += tp_updated.submissions or []
+            tp_updated.submissions = None
+            _callback_handler(tps[tp_id], tp_updated, **kwargs)
+    if submissions:
+        update_scores.send(
+            Submission,
+            submissions=submissions)
+
+
+@contextmanager
+def update_tps_after(**kwargs):
+    """Defers the data, checks, scores and revisions updates for Stores
+    updated while in this context, and runs them once for each of their
+    translation projects on leaving it.
+
+    Directory revisions are coalesced across all of the translation
+    projects.
+
+    If an error is raised in the context the updates are only run when not
+    in a transaction, as the Stores updated before the error have then
+    already been committed. Otherwise they are left to be rolled back.
+    """
+    tps = {}
+    updated = {}
+
+    def get_updated(store):
+        if store is None:
+            return
+        tp_id = store.translation_project_id
+        if tp_id not in updated:
+            tps[tp_id] = store.translation_project
+            updated[tp_id] = Updated()
+        return updated[tp_id]
+
+    callback = kwargs.get("callback", _update_tps_callback_handler)
+    try:
+        with keep_data():
+            handlers = _connect_handlers(get_updated)
+            yield
+        del handlers
+    except BaseException:
+        if not connection.in_atomic_block:
+            callback(tps, updated, **kwargs)
+        raise
+    callback(tps, updated, **kwargs)
+
+
+class Deferred(object):
+    """The updates recorded by ``defer_tps_updates``, by Store id so that
+    they can be sent to another process.
+
+    The Submissions are kept as they are, as they are created in bulk
+    without ids.
+    """
+
+    def __init__(self):
+        self.data = set()
+        # sets of unit ids by store id, empty to check all of the units
+        self.checks = {}
+        # sets of user ids by store id, ``None`` to update all of the users
+        self.scores = {}
+        self.submissions = []
+
+    def add(self, updated):
+        """Adds the updates recorded by ``update_tps_after`` in ``updated``,
+        a dictionary of ``Updated`` by TP id.
+        """
+        for tp_updated in updated.values():
+            self.data |= set(tp_updated.data or [])
+            for store_id, to_check in (tp_updated.checks or {}).items():
+                self.checks[store_id] = (
+                    self.checks.get(store_id, set())
+                    | to_check["units"])
+            for store_id in tp_updated.score_stores or []:
+                self.add_scores(store_id, tp_updated.score_users)
+            self.submissions.extend(tp_updated.submissions or [])
+
+    def add_scores(self, store_id, users):
+        if store_id in self.scores and self.scores[store_id] is None:
+            return
+        self.scores[store_id] = (
+            None
+            if users is None
+            else self.scores.get(store_id, set()) | set(users))
+
+    def update(self, other):
+        """Adds the updates deferred in another ``Deferred``"""
+        self.data |= other.data
+        for store_id, units in other.checks.items():
+            self.checks[store_id] = self.checks.get(store_id, set()) | units
+        for store_id, users in other.scores.items():
+            self.add_scores(store_id, users)
+        self.submissions.extend(other.submissions)
+
+
+@contextmanager
+def defer_tps_updates():
+    """Records the updates that ``update_tps_after`` would run for the
+    Stores updated in this context, without running them.
+
+    Yields a ``Deferred``, which can be sent to another process and run
+    there with ``send_deferred_updates``.
+    """
+    deferred = Deferred()
+
+    def defer_callback(tps, updated, **kwargs):
+        deferred.add(updated)
+
+    with update_tps_after(callback=defer_callback):
+        yield deferred
+
+
+def send_deferred_updates(deferred):
+    """Sends the updates recorded in a ``Deferred``, which are run once for
+    each translation project when sent in ``update_tps_after``
+    """
+    stores = Store.objects.select_related("translation_project").in_bulk(
+        deferred.data | set(deferred.checks) | set(deferred.scores))
+    for store_id in deferred.data:
+        update_data.send(Store, instance=stores[store_id])
+    for store_id, units in deferred.checks.items():
+        update_checks.send(
+            Store,
+            instance=stores[store_id],
+            units=list(units) or None)
+    for store_id, users in deferred.scores.items():
+        score_kwargs = dict(instance=stores[store_id])
+        if users is not None:
+            score_kwargs["users"] = list(users)
+        update_scores.send(Store, **score_kwargs)
+    if deferred.submissions:
+        update_scores.send(
+            Submission,
+            submissions=deferred.submissions)
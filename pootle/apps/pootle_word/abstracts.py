@@ -23,3 +23,17 @@ class AbstractStem(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super(AbstractStem, self).save(*args, **kwargs)
+
+
+class AbstractUnitTrigram(models.Model):
+
+    class Meta(object):
+        abstract = True
+
+    field = models.PositiveSmallIntegerField(
+        null=False,
+        blank=False)
+    trigram = models.CharField(
+        max_length=3,
+        null=False,
+        blank=False)
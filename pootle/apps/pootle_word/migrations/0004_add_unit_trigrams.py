@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:17
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from pootle.core.utils.db import set_mysql_collation_for_column
+
+
+def make_trigram_cs(apps, schema_editor):
+    cursor = schema_editor.connection.cursor()
+    set_mysql_collation_for_column(
+        apps,
+        cursor,
+        "pootle_word.UnitTrigram",
+        "trigram",
+        "utf8_bin",
+        "varchar(3)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pootle_store', '0034_limit_text_fields'),
+        ('pootle_word', '0003_add_word_stems'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.PositiveSmallIntegerField()),
+                ('trigram', models.CharField(max_length=3)),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='pootle_store.Unit')),
+            ],
+            options={
+                'abstract': False,
+                'db_table': 'pootle_word_unit_trigram',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='unittrigram',
+            unique_together=set([('unit', 'field', 'trigram')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='unittrigram',
+            index_together=set([('trigram', 'field')]),
+        ),
+        migrations.RunPython(make_trigram_cs),
+    ]
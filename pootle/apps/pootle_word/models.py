@@ -10,7 +10,7 @@ from django.db import models
 
 from pootle_store.models import Unit
 
-from .abstracts import AbstractStem
+from .abstracts import AbstractStem, AbstractUnitTrigram
 
 
 class UnitStem(models.Model):
@@ -37,3 +37,21 @@ class Stem(AbstractStem):
             "\"%s\", units: %s"
             % (self.root,
                list(self.units.values_list("id", flat=True))))
+
+
+class UnitTrigram(AbstractUnitTrigram):
+
+    unit = models.ForeignKey(
+        Unit,
+        related_name="trigrams",
+        on_delete=models.CASCADE)
+
+    class Meta(AbstractUnitTrigram.Meta):
+        db_table = "pootle_word_unit_trigram"
+        unique_together = ["unit", "field", "trigram"]
+        index_together = [["trigram", "field"]]
+
+    def __unicode__(self):
+        return (
+            "\"%s\", unit: %s, field: %s"
+            % (self.trigram, self.unit_id, self.field))
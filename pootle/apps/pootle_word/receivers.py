@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from pootle.core.delegate import search_backend
+from pootle_store.models import Unit
+
+
+@receiver(post_save, sender=Unit)
+def handle_unit_search_index(**kwargs):
+    unit = kwargs["instance"]
+    indexer = getattr(search_backend.get(Unit), "indexer", None)
+    if indexer is None:
+        return
+    indexer(unit).index()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from django.db.models import Count
+
+from pootle_store.unit.filters import UnitTextSearch
+from pootle_store.unit.search import DBSearchBackend
+
+from .models import UnitTrigram
+from .utils import TextTrigrams, UnitTrigrams
+
+
+class UnitTrigramSearch(UnitTextSearch):
+    """Search Unit's fields for text strings, using the trigram index to
+    narrow the candidate units before matching
+    """
+
+    def get_trigrams(self, words):
+        trigrams = set()
+        for word in words:
+            trigrams.update(TextTrigrams(word).trigrams)
+        return trigrams
+
+    def get_candidates(self, k, trigrams):
+        return (
+            UnitTrigram.objects.filter(
+                field=UnitTrigrams.search_fields.index(k),
+                trigram__in=trigrams)
+                               .values("unit_id")
+                               .annotate(matched=Count("trigram"))
+                               .filter(matched=len(trigrams))
+                               .values("unit_id"))
+
+    def search_field(self, k, words, exact=False, case=False):
+        subresult = super(UnitTrigramSearch, self).search_field(
+            k, words, exact=exact, case=case)
+        trigrams = self.get_trigrams(words)
+        if not trigrams:
+            # all of the words are too short to be indexed
+            return subresult
+        return subresult.filter(pk__in=self.get_candidates(k, trigrams))
+
+
+class TrigramSearchBackend(DBSearchBackend):
+
+    indexer = UnitTrigrams
+    text_search_class = UnitTrigramSearch
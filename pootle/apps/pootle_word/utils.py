@@ -13,27 +13,47 @@ import Levenshtein
 import translate
 
 from django.utils.functional import cached_property
+from django.utils.lru_cache import lru_cache
 
 from pootle.core.delegate import stemmer, stopwords
 
+from .models import UnitTrigram
+
+
+STEM_CACHE_SIZE = 10000
+
+
+@lru_cache(maxsize=None)
+def get_stoplist():
+    """Return the Translate Toolkit stoplist as a frozen set, read once per
+    process
+    """
+    ttk_path = translate.__path__[0]
+    fpath = (
+        os.path.join(ttk_path, "share", "stoplist-en")
+        if "share" in os.listdir(ttk_path)
+        else os.path.join(ttk_path, "..", "share", "stoplist-en"))
+    words = set()
+    with open(fpath) as f:
+        for line in f.read().split("\n"):
+            if not line:
+                continue
+            if line[0] in "<>=@":
+                words.add(line[1:].strip().lower())
+    return frozenset(words)
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def get_stem(stemmer, token):
+    """Return the stem of a token, caching the most recently used stems"""
+    return stemmer(token)
+
 
 class Stopwords(object):
 
-    @cached_property
+    @property
     def words(self):
-        ttk_path = translate.__path__[0]
-        fpath = (
-            os.path.join(ttk_path, "share", "stoplist-en")
-            if "share" in os.listdir(ttk_path)
-            else os.path.join(ttk_path, "..", "share", "stoplist-en"))
-        words = set()
-        with open(fpath) as f:
-            for line in f.read().split("\n"):
-                if not line:
-                    continue
-                if line[0] in "<>=@":
-                    words.add(line[1:].strip().lower())
-        return words
+        return get_stoplist()
 
 
 class TextStemmer(object):
@@ -50,12 +70,7 @@ class TextStemmer(object):
 
     @property
     def tokens(self):
-        return [
-            t.lower()
-            for t
-            in self.split(self.text)
-            if (len(t) > 2
-                and t.lower() not in self.stopwords)]
+        return self.get_tokens(self.text)
 
     @property
     def text(self):
@@ -69,8 +84,150 @@ class TextStemmer(object):
     def stems(self):
         return self.get_stems(self.tokens)
 
-    def get_stems(self, tokens):
-        return set(self.stemmer(t) for t in tokens)
+    def get_tokens(self, text, stops=None):
+        if stops is None:
+            stops = self.stopwords
+        tokens = []
+        for token in self.split(text):
+            if len(token) < 3:
+                continue
+            token = token.lower()
+            if token not in stops:
+                tokens.append(token)
+        return tokens
+
+    def get_stems(self, tokens, stem_func=None):
+        stem_func = stem_func or self.stemmer
+        return set(get_stem(stem_func, t) for t in tokens)
+
+    def get_stems_many(self, texts):
+        """Return a set of stems for each of the given texts, looking up the
+        stemmer and stopwords only once
+        """
+        stops = self.stopwords
+        stem_func = self.stemmer
+        return [
+            self.get_stems(
+                self.get_tokens(text, stops),
+                stem_func)
+            for text
+            in texts]
+
+
+class TextTrigrams(object):
+
+    def __init__(self, text):
+        self.text = text
+
+    @property
+    def trigrams(self):
+        text = self.text.lower()
+        return set(
+            text[i:i + 3]
+            for i
+            in range(len(text) - 2))
+
+
+class UnitTrigrams(object):
+    """Maintains the search trigrams for a Unit's searchable fields"""
+
+    search_fields = (
+        "source_f", "target_f", "locations",
+        "translator_comment", "developer_comment")
+
+    def __init__(self, context):
+        self.context = context
+
+    @property
+    def trigram_set(self):
+        return self.context.trigrams
+
+    @property
+    def trigram_model(self):
+        return self.trigram_set.model
+
+    @property
+    def existing_trigrams(self):
+        return set(self.trigram_set.values_list("field", "trigram"))
+
+    @property
+    def trigrams(self):
+        trigrams = set()
+        for field, text in self.field_values(self.context):
+            trigrams.update(
+                (field, trigram)
+                for trigram
+                in TextTrigrams(text).trigrams)
+        return trigrams
+
+    @classmethod
+    def field_values(cls, unit):
+        for i, name in enumerate(cls.search_fields):
+            field = unit._meta.get_field(name)
+            yield i, field.get_prep_value(getattr(unit, name)) or u""
+
+    def clear_trigrams(self, trigrams):
+        fields = {}
+        for field, trigram in trigrams:
+            fields[field] = fields.get(field, set())
+            fields[field].add(trigram)
+        for field, field_trigrams in fields.items():
+            self.trigram_set.filter(
+                field=field,
+                trigram__in=field_trigrams).delete()
+
+    def create_trigrams(self, trigrams):
+        self.trigram_model.objects.bulk_create(
+            self.trigram_model(
+                unit_id=self.context.id,
+                field=field,
+                trigram=trigram)
+            for field, trigram
+            in trigrams)
+
+    def index(self):
+        trigrams = self.trigrams
+        existing_trigrams = self.existing_trigrams
+        if existing_trigrams - trigrams:
+            self.clear_trigrams(existing_trigrams - trigrams)
+        if trigrams - existing_trigrams:
+            self.create_trigrams(trigrams - existing_trigrams)
+
+
+class StoreTrigrams(object):
+    """Rebuilds the search trigrams for all of a Store's units"""
+
+    batch_size = 500
+
+    def __init__(self, context):
+        self.context = context
+
+    @property
+    def trigram_model(self):
+        return UnitTrigram
+
+    @property
+    def units(self):
+        return self.context.unit_set.only(
+            "id", *UnitTrigrams.search_fields)
+
+    def clear(self):
+        self.trigram_model.objects.filter(
+            unit__store_id=self.context.id).delete()
+
+    def iterate_trigrams(self):
+        for unit in self.units.iterator():
+            for field, trigram in UnitTrigrams(unit).trigrams:
+                yield self.trigram_model(
+                    unit_id=unit.id,
+                    field=field,
+                    trigram=trigram)
+
+    def index(self):
+        self.clear()
+        self.trigram_model.objects.bulk_create(
+            self.iterate_trigrams(),
+            batch_size=self.batch_size)
 
 
 class TextComparison(TextStemmer):
@@ -79,6 +236,14 @@ class TextComparison(TextStemmer):
     def text(self):
         return self.context
 
+    @cached_property
+    def tokens(self):
+        return super(TextComparison, self).tokens
+
+    @cached_property
+    def stems(self):
+        return super(TextComparison, self).stems
+
     def jaccard_similarity(self, other):
         return (
             len(other.stems.intersection(self.stems))
@@ -100,7 +265,12 @@ class TextComparison(TextStemmer):
             / float(len(other.stems)))
 
     def similarity(self, other):
-        other = self.__class__(other)
+        return self.compare(self.__class__(other))
+
+    def compare(self, other):
+        """Compare with an object that has precomputed `text`, `tokens`
+        and `stems`
+        """
         return (
             (self.jaccard_similarity(other)
              + self.levenshtein_distance(other)
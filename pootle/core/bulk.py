@@ -175,15 +175,17 @@ class BulkCRUD(object):
             self.post_update(objects=objects, pre=pre, result=result)
         return result
 
-    def update_object_instance(self, instance):
+    def update_object_instance(self, instance, fields=None):
         pre = self.pre_update(instance=instance)
-        result = instance.save()
+        result = instance.save(update_fields=fields)
         self.post_update(instance=instance, pre=pre, result=result)
         return result
 
     def update(self, **kwargs):
         if kwargs.get("instance") is not None:
-            return self.update_object_instance(kwargs["instance"])
+            return self.update_object_instance(
+                kwargs["instance"],
+                kwargs.get("update_fields"))
         objects, fields = self.update_object_list(**kwargs)
         updated = self.update_object_dict(objects, kwargs.get("updates"), fields)
         total = (updated or 0) + len(objects)
@@ -29,43 +29,67 @@ class BulkUpdated(object):
     update_objects = None
 
 
+_suppressed = threading.local()
+_suppressible_lock = threading.Lock()
+
+
+def _get_suppressed(signal):
+    """Returns the stack of ``(temp_signal, suppress)`` that ``signal`` is
+    suppressed with in the current thread
+    """
+    if not hasattr(_suppressed, "signals"):
+        _suppressed.signals = {}
+    return _suppressed.signals.setdefault(signal, [])
+
+
+def _get_temp_signal(signal, *args, **kwargs):
+    """Returns the innermost temporary signal that suppresses this sender of
+    ``signal`` in the current thread, if any
+    """
+    sender = args[0] if args else kwargs.get("sender")
+    for temp_signal, suppress in reversed(_get_suppressed(signal)):
+        if not suppress or not sender or sender in suppress:
+            return temp_signal
+
+
+def _make_suppressible(signal):
+    """Wraps the ``send`` and ``connect`` methods of ``signal`` once, so that
+    they can be suppressed per thread without being swapped on each use
+    """
+    with _suppressible_lock:
+        if getattr(signal, "_suppressible", False):
+            return
+        _orig_send = signal.send
+        _orig_connect = signal.connect
+
+        def suppressible_send(self, *args, **kwargs):
+            temp_signal = _get_temp_signal(self, *args, **kwargs)
+            return (
+                _orig_send(*args, **kwargs)
+                if temp_signal is None
+                else temp_signal.send(*args, **kwargs))
+
+        def suppressible_connect(self, func, *args, **kwargs):
+            temp_signal = _get_temp_signal(self, *args, **kwargs)
+            return (
+                _orig_connect(func, *args, **kwargs)
+                if temp_signal is None
+                else temp_signal.connect(func, *args, **kwargs))
+        signal.send = types.MethodType(suppressible_send, signal)
+        signal.connect = types.MethodType(suppressible_connect, signal)
+        signal._suppressible = True
+
+
 @contextmanager
 def suppress_signal(signal, suppress=None):
-    lock = threading.Lock()
-    suppressed_thread = threading.current_thread().ident
-
-    _orig_send = signal.send
-    _orig_connect = signal.connect
-    temp_signal = Signal()
-
-    def _should_suppress(*args, **kwargs):
-        sender = args[0] if args else kwargs.get("sender")
-        return (
-            threading.current_thread().ident == suppressed_thread
-            and (not suppress
-                 or not sender
-                 or sender in suppress))
-
-    def suppressed_send(self, *args, **kwargs):
-        return (
-            _orig_send(*args, **kwargs)
-            if not _should_suppress(*args, **kwargs)
-            else temp_signal.send(*args, **kwargs))
-
-    def suppressed_connect(self, func, *args, **kwargs):
-        return (
-            _orig_connect(func, *args, **kwargs)
-            if not _should_suppress(*args, **kwargs)
-            else temp_signal.connect(func, *args, **kwargs))
-    with lock:
-        signal.send = types.MethodType(suppressed_send, signal)
-        signal.connect = types.MethodType(suppressed_connect, signal)
+    _make_suppressible(signal)
+    suppressed = _get_suppressed(signal)
+    suppressing = (Signal(), suppress)
+    suppressed.append(suppressing)
     try:
         yield
     finally:
-        with lock:
-            signal.send = _orig_send
-            signal.connect = _orig_connect
+        suppressed.remove(suppressing)
 
 
 @contextmanager
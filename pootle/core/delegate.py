@@ -50,6 +50,7 @@ revision = Getter()
 revision_updater = Getter()
 scores = Getter()
 score_updater = Getter()
+score_accumulator = Getter()
 site = Getter()
 states = Getter()
 stopwords = Getter()
@@ -8,7 +8,9 @@
 
 from .base import SearchBackend
 from .broker import SearchBroker
-from .backends import ElasticSearchBackend
+from .backends import ElasticSearchBackend, NgramSearchBackend
 
 
-__all__ = ('SearchBackend', 'SearchBroker', 'ElasticSearchBackend')
+__all__ = (
+    'SearchBackend', 'SearchBroker', 'ElasticSearchBackend',
+    'NgramSearchBackend')
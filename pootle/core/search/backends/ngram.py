@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from __future__ import absolute_import
+
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+from array import array
+
+import Levenshtein
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ..base import SearchBackend
+
+
+__all__ = ('NgramSearchBackend',)
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MIN_SIMILARITY = 0.7
+
+# seconds to wait for other processes writing to the database
+DEFAULT_TIMEOUT = 10
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries ("
+    " id INTEGER PRIMARY KEY,"
+    " language TEXT NOT NULL,"
+    " unit_id TEXT NOT NULL,"
+    " ngrams INTEGER NOT NULL,"
+    " source TEXT NOT NULL,"
+    " target TEXT NOT NULL,"
+    " data TEXT NOT NULL,"
+    " UNIQUE (language, unit_id))",
+    "CREATE TABLE IF NOT EXISTS postings ("
+    " language TEXT NOT NULL,"
+    " ngram TEXT NOT NULL,"
+    " entry INTEGER NOT NULL,"
+    " PRIMARY KEY (language, ngram, entry)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS postings_entry ON postings (entry)",
+    "CREATE TABLE IF NOT EXISTS checkpoint ("
+    " id INTEGER PRIMARY KEY,"
+    " revision INTEGER NOT NULL)")
+
+ENTRY_FIELDS = (
+    'revision', 'project', 'path', 'username', 'fullname', 'email_md5',
+    'iso_submitted_on', 'display_submitted_on')
+
+
+def get_ngrams(text, size=3):
+    """Returns the set of (space padded) character n-grams of `text`."""
+    text = u" %s " % text.lower()
+    return set(
+        text[i:i + size]
+        for i
+        in range(len(text) - size + 1))
+
+
+class NgramSearchBackend(SearchBackend):
+    """TM backend that keeps an n-gram index of translations in an sqlite
+    database on disk.
+
+    Candidates are ranked by the n-grams they share with the searched text,
+    and only the best ranked candidates are compared using their Levenshtein
+    distance.
+    """
+
+    # max number of variables in an sqlite query
+    batch_size = 500
+    # number of ranked candidates to compare using Levenshtein distance
+    max_candidates = 50
+
+    def __init__(self, config_name):
+        super(NgramSearchBackend, self).__init__(config_name)
+        self.weight = min(max(self._settings.get('WEIGHT', self.weight),
+                              0.0), 1.0)
+        self.min_similarity = self._settings.get(
+            'MIN_SIMILARITY', DEFAULT_MIN_SIMILARITY)
+        if self.min_similarity <= 0 or self.min_similarity >= 1:
+            self.min_similarity = DEFAULT_MIN_SIMILARITY
+        self.timeout = self._settings.get('TIMEOUT', DEFAULT_TIMEOUT)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._create_index_if_missing()
+
+    @property
+    def connection(self):
+        # sqlite connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(
+                self._settings['PATH'],
+                timeout=self.timeout)
+            # readers don't block the writer, which is shared between the web
+            # processes and update_tmserver
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _log_error(self, e):
+        logger.error("SQLite TM error for database(%s): %s",
+                     self._settings.get("PATH"), e)
+
+    def _create_index_if_missing(self):
+        try:
+            with self.connection as connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+        except sqlite3.Error as e:
+            self._log_error(e)
+
+    def _index_entry(self, connection, language, unit_id, doc):
+        unit_id = unicode(unit_id)
+        source = unicode(doc['source'])
+        ngrams = get_ngrams(source)
+        existing = connection.execute(
+            "SELECT id FROM entries WHERE language = ? AND unit_id = ?",
+            (language, unit_id)).fetchone()
+        if existing:
+            connection.execute(
+                "DELETE FROM postings WHERE entry = ?", existing)
+            connection.execute(
+                "DELETE FROM entries WHERE id = ?", existing)
+        entry = connection.execute(
+            "INSERT INTO entries "
+            "(language, unit_id, ngrams, source, target, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (language, unit_id, len(ngrams), source,
+             unicode(doc['target']),
+             json.dumps(
+                 dict((k, doc.get(k)) for k in ENTRY_FIELDS),
+                 cls=DjangoJSONEncoder))).lastrowid
+        connection.executemany(
+            "INSERT INTO postings (language, ngram, entry) VALUES (?, ?, ?)",
+            ((language, ngram, entry) for ngram in ngrams))
+
+    def bulk(self, actions):
+        """Add or replace translations using the `_type` (language) and
+        `_id` (unit id) of the bulk `actions` created by `update_tmserver`
+        """
+        with self._lock, self.connection as connection:
+            for action in actions:
+                self._index_entry(
+                    connection, action['_type'], action['_id'], action)
+
+    def update(self, language, obj):
+        # errors must not stop the translation from being saved
+        try:
+            with self._lock, self.connection as connection:
+                self._index_entry(connection, language, obj['id'], obj)
+        except sqlite3.Error as e:
+            self._log_error(e)
+
+    def clear(self):
+        with self._lock, self.connection as connection:
+            for table in ("postings", "entries", "checkpoint"):
+                connection.execute("DELETE FROM %s" % table)
+
+    def count(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_checkpoint(self):
+        checkpoint = self.connection.execute(
+            "SELECT revision FROM checkpoint WHERE id = 0").fetchone()
+        if checkpoint:
+            return checkpoint[0]
+
+    def set_checkpoint(self, revision):
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoint (id, revision) "
+                "VALUES (0, ?)",
+                (revision, ))
+
+    def get_overlaps(self, language, ngrams, exclude=None):
+        """Returns arrays of candidate entry ids, the number of n-grams they
+        share with `ngrams` and their total number of n-grams.
+
+        :param exclude: unit id of an entry to exclude from the candidates
+        """
+        overlaps = {}
+        sizes = {}
+        ngrams = list(ngrams)
+        for i in range(0, len(ngrams), self.batch_size):
+            batch = ngrams[i:i + self.batch_size]
+            rows = self.connection.execute(
+                "SELECT p.entry, COUNT(*), e.ngrams "
+                "FROM postings p JOIN entries e ON e.id = p.entry "
+                "WHERE p.language = ? AND p.ngram IN (%s) "
+                "AND e.unit_id != ? "
+                "GROUP BY p.entry" % ",".join("?" * len(batch)),
+                [language] + batch + [unicode(exclude)])
+            for entry, overlap, size in rows:
+                overlaps[entry] = overlaps.get(entry, 0) + overlap
+                sizes[entry] = size
+        entries = array('l', overlaps.keys())
+        return (
+            entries,
+            array('l', (overlaps[entry] for entry in entries)),
+            array('l', (sizes[entry] for entry in entries)))
+
+    def rank(self, ngrams, entries, overlaps, sizes):
+        """Returns the ids of the `max_candidates` entries with the best
+        Dice coefficient of shared n-grams.
+        """
+        total = float(len(ngrams))
+        scores = array(
+            'd',
+            (2 * overlap / (total + size)
+             for overlap, size
+             in zip(overlaps, sizes)))
+        best = heapq.nlargest(
+            self.max_candidates,
+            range(len(entries)),
+            key=scores.__getitem__)
+        return [entries[i] for i in best]
+
+    def get_entries(self, ids):
+        return self.connection.execute(
+            "SELECT unit_id, source, target, data FROM entries "
+            "WHERE id IN (%s)" % ",".join("?" * len(ids)),
+            ids).fetchall()
+
+    def similarity(self, text, other):
+        return 1 - (
+            Levenshtein.distance(text, other)
+            / float(max(len(text), len(other))))
+
+    def search(self, unit):
+        source = unicode(unit.source)
+        language = unit.store.translation_project.language.code
+        ngrams = get_ngrams(source)
+        try:
+            entries, overlaps, sizes = self.get_overlaps(
+                language, ngrams, exclude=unit.id)
+            candidates = (
+                self.get_entries(
+                    self.rank(ngrams, entries, overlaps, sizes))
+                if entries
+                else [])
+        except sqlite3.Error as e:
+            # eg a locked, missing or corrupt database
+            self._log_error(e)
+            return []
+        hits = []
+        for unit_id, hit_source, target, data in candidates:
+            similarity = self.similarity(source, hit_source)
+            if similarity >= self.min_similarity:
+                hits.append((similarity, unit_id, hit_source, target, data))
+        counter = {}
+        res = []
+        for similarity, unit_id, hit_source, target, data in sorted(
+                hits, key=lambda hit: -hit[0]):
+            translation_pair = hit_source + target
+            if translation_pair in counter:
+                counter[translation_pair] += 1
+                continue
+            counter[translation_pair] = 1
+            data = json.loads(data)
+            res.append({
+                'unit_id': unit_id,
+                'source': hit_source,
+                'target': target,
+                'project': data['project'],
+                'path': data['path'],
+                'username': data['username'],
+                'fullname': data['fullname'],
+                'email_md5': data['email_md5'],
+                'iso_submitted_on': data['iso_submitted_on'],
+                'display_submitted_on': data['display_submitted_on'],
+                'score': similarity * 100 * self.weight,
+            })
+        for item in res:
+            item['count'] = counter[item['source'] + item['target']]
+        return res
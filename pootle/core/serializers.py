@@ -9,6 +9,10 @@
 
 class Serializer(object):
 
+    # whether the serializer transforms an iterator of chunks rather than
+    # the complete serialized data
+    streams = False
+
     def __init__(self, context, data):
         self.context = context
         self.original_data = data
@@ -18,6 +22,22 @@ class Serializer(object):
         return self.original_data
 
 
+class StreamSerializer(Serializer):
+    """Serializer for an iterator of serialized chunks, its output is also
+    an iterator of chunks.
+    """
+
+    streams = True
+
+    @property
+    def output(self):
+        for chunk in self.data:
+            yield self.transform(chunk)
+
+    def transform(self, chunk):
+        return chunk
+
+
 class Deserializer(object):
 
     def __init__(self, context, data):
@@ -7,8 +7,9 @@
 # AUTHORS file for copyright and authorship information.
 
 from contextlib import contextmanager
+from multiprocessing import Pool
 
-from django.db import connection
+from django.db import connection, connections
 
 
 @contextmanager
@@ -18,6 +19,22 @@ def useable_connection():
     connection.close_if_unusable_or_obsolete()
 
 
+def close_connections():
+    # processes must not share their parent's database connections
+    connections.close_all()
+
+
+def get_pool(workers):
+    """Returns a pool of ``workers`` processes, each with its own database
+    connections, or ``None`` when in a transaction as its changes would not
+    be visible to the workers
+    """
+    if connection.in_atomic_block:
+        return None
+    close_connections()
+    return Pool(workers, initializer=close_connections)
+
+
 def set_mysql_collation_for_column(apps, cursor, model, column, collation, schema):
     """Set the collation for a mysql column if it is not set already
     """
@@ -150,7 +150,7 @@ class PootleBrowseView(PootleDetailView):
             formatter=scores_to_json)
         return dict(
             items=list(top_scorers),
-            has_more_items=len(self.scores.top_scorers) > chunk_size)
+            has_more_items=self.scores.top_scorer_count > chunk_size)
 
     @property
     def panels(self):
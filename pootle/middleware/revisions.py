@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from pootle_revision.contextmanagers import coalesce_revisions
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class CoalesceRevisionsMiddleware(object):
+    """Writes each Directory revision that is updated while handling a
+    request once, after the view has returned.
+
+    As ``ATOMIC_REQUESTS`` is set the view's transaction has already been
+    committed by then.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+        with coalesce_revisions():
+            return self.get_response(request)
@@ -1477,6 +1477,7 @@ PTL.editor = {
     let offsetToFetch = -1;
     let uidToFetch = -1;
     let previousUids = [];
+    let cursor = -1;
     if (initial) {
       this.initialOffset = -1;
       this.offset = 0;
@@ -1493,6 +1494,8 @@ PTL.editor = {
         // the last chunk of uids to allow server to adjust results
         previousUids = this.getPreviousUids();
         offsetToFetch = this.offset;
+        // The last unit held lets the server seek straight to the next chunk
+        cursor = previousUids[previousUids.length - 1];
       } else if (this.needsPreviousUnitBatch()) {
         // The unit is in the first 7, try and get the previous chunk
         offsetToFetch = Math.max(this.initialOffset - (2 * this.units.chunkSize), 0);
@@ -1516,6 +1519,10 @@ PTL.editor = {
       if (previousUids.length > 0) {
         reqData.previous_uids = previousUids;
       }
+      if (cursor > -1) {
+        reqData.cursor = cursor;
+        reqData.total = this.units.frozenTotal;
+      }
       return UnitAPI.fetchUnits(reqData)
         .then(
           (data) => this.storeUnitData(data, { isInitial: initial }),
@@ -385,6 +385,7 @@ class PootleTestEnv(object):
         from django.utils import timezone
 
         from pootle.core.contextmanagers import bulk_operations
+        from pootle.core.delegate import score_updater
         from pootle_data.models import TPChecksData, TPData
         from pootle_score.models import UserTPScore
         from pootle_statistics.models import SubmissionTypes
@@ -423,6 +424,12 @@ class PootleTestEnv(object):
                     self._add_subs_to_stores(
                         tp.stores, admin, member, member2)
 
+        # scores are added as events happen, so they need to be rebuilt
+        # for the backdated submissions
+        updater = score_updater.get(get_user_model())()
+        updater.clear()
+        updater.refresh_scores()
+
     def _add_subs_to_stores(self, stores, admin, member, member2):
         for store in stores.select_related("data", "parent"):
             self._add_subs_to_store(store, admin, member, member2)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from itertools import imap
+
+import pytest
+
+
+class InlinePool(object):
+    """Stands in for a ``multiprocessing.Pool``, running the work in the
+    test process
+    """
+
+    def map(self, func, iterable):
+        return [func(item) for item in iterable]
+
+    def imap(self, func, iterable):
+        return imap(func, iterable)
+
+    imap_unordered = imap
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+@pytest.fixture
+def inline_pool():
+    return InlinePool()
@@ -104,3 +104,10 @@ def exported_tp_view_response(client, request_users, tp0):
 
     response = client.get(reverse('pootle-tp-browse', kwargs=kwargs))
     return response
+
+
+@pytest.fixture
+def exports_dir(settings, tmpdir):
+    exports_dir = str(tmpdir.mkdir("exports"))
+    settings.POOTLE_EXPORTS_DIRECTORY = exports_dir
+    return exports_dir
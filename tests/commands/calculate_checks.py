@@ -7,9 +7,13 @@
 # AUTHORS file for copyright and authorship information.
 
 import pytest
+from mock import patch
 
 from django.core.management import call_command
 
+from pootle_app.management.commands.calculate_checks import Command
+from pootle_store.models import QualityCheck
+
 
 @pytest.mark.cmd
 @pytest.mark.django_db
@@ -35,3 +39,43 @@ def test_calculate_checks_language(capfd, project1):
     call_command('calculate_checks', '--language=language0')
     out, err = capfd.readouterr()
     assert 'Running calculate_checks for /language0/project0/' in out
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+@patch('pootle_app.management.commands.calculate_checks.get_pool')
+def test_calculate_checks_workers(pool_mock, capfd, tp0, inline_pool):
+    pool_mock.return_value = inline_pool
+    checks = QualityCheck.objects.filter(
+        unit__store__translation_project=tp0)
+    expected = sorted(checks.values_list("unit_id", "name"))
+    assert expected
+    checks.delete()
+    call_command(
+        'calculate_checks',
+        '--workers=2',
+        '--project=%s' % tp0.project.code,
+        '--language=%s' % tp0.language.code)
+    out, err = capfd.readouterr()
+    assert 'Running calculate_checks with 2 workers' in out
+    assert pool_mock.call_args[0] == (2, )
+    assert sorted(checks.values_list("unit_id", "name")) == expected
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_calculate_checks_shards(tp0):
+    command = Command()
+    command.projects = [tp0.project.code]
+    command.languages = [tp0.language.code]
+    command.shard_size = 2
+    shards = list(command.get_shards(["printf"]))
+    store_ids = list(
+        tp0.stores.order_by("id").values_list("id", flat=True))
+    assert len(shards) == (len(store_ids) + 1) // 2
+    assert all(tp == tp0.pk for tp, stores, names in shards)
+    assert all(names == ["printf"] for tp, stores, names in shards)
+    assert all(len(stores) <= 2 for tp, stores, names in shards)
+    assert (
+        [store for tp, stores, names in shards for store in stores]
+        == store_ids)
@@ -7,7 +7,9 @@
 # AUTHORS file for copyright and authorship information.
 
 import os
+
 import pytest
+from mock import patch
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
@@ -175,3 +177,32 @@ def test_export_tmx_tp_rotate(capfd, tp0, project1, media_test_dir):
     assert os.path.exists(os.path.join(export_dir, filename_for_tp1))
     assert os.path.exists(os.path.join(export_dir, filename_2))
     assert os.path.exists(os.path.join(export_dir, filename_3))
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+@patch('import_export.management.commands.export.get_pool')
+def test_export_tmx_workers(pool_mock, capfd, tp0, media_test_dir,
+                            inline_pool):
+    pool_mock.return_value = inline_pool
+    project = tp0.project
+    call_command('export', '--tmx', '--workers=2',
+                 '--project=%s' % project.code)
+    out, err = capfd.readouterr()
+    pool_mock.assert_called_with(2)
+    tps = project.translationproject_set.live()
+    assert tps.count() > 1
+    for tp in tps:
+        rev = revision.get(tp.__class__)(tp.directory).get(key="stats")
+        filename = os.path.join(
+            tp.language.code,
+            '%s.%s.%s.tmx.zip' % (tp.project.code, tp.language.code, rev[:10]))
+        assert '%s" has been saved' % filename in out
+        assert os.path.exists(
+            os.path.join(media_test_dir, 'offline_tm', filename))
+
+    call_command('export', '--tmx', '--workers=2',
+                 '--project=%s' % project.code)
+    out, err = capfd.readouterr()
+    for tp in tps:
+        assert 'Translation project (%s) has not been changed' % tp in out
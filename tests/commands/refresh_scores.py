@@ -6,19 +6,30 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+import time
+from datetime import date, timedelta
+
 from mock import patch
 
 import pytest
+from django_redis import get_redis_connection
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
+from pootle.core.utils.timezone import localdate
 from pootle_app.management.commands.refresh_scores import Command
+from pootle_score.models import UserStoreScore, UserTPScore
 from pootle_translationproject.models import TranslationProject
 
 
 DEFAULT_OPTIONS = {
     'reset': False,
     'users': None,
+    'since': None,
+    'until': None,
+    'workers': None,
+    'restart': False,
     'settings': None,
     'pythonpath': None,
     'verbosity': 1,
@@ -31,35 +42,25 @@ DEFAULT_OPTIONS = {
 
 
 @pytest.mark.cmd
-@patch('pootle_app.management.commands.refresh_scores.get_user_model')
+@patch('pootle_app.management.commands.refresh_scores.Command.refresh_partitions')
 @patch('pootle_app.management.commands.refresh_scores.Command.get_users')
-@patch('pootle_app.management.commands.refresh_scores.score_updater')
-def test_cmd_refresh_scores_recalculate(updater_mock, users_mock, user_mock):
+def test_cmd_refresh_scores_recalculate(users_mock, refresh_mock):
     """Recalculate scores."""
-    user_mock.return_value = 7
     users_mock.return_value = 23
     call_command('refresh_scores')
     assert (
         list(users_mock.call_args)
         == [(), DEFAULT_OPTIONS])
     assert (
-        list(updater_mock.get.call_args)
-        == [(7,), {}])
-    assert (
-        list(updater_mock.get.return_value.call_args)
-        == [(), {}])
-    assert (
-        list(updater_mock.get.return_value.return_value.refresh_scores.call_args)
-        == [(23,), {}])
+        list(refresh_mock.call_args)
+        == [(23,), {'restart': False}])
 
 
 @pytest.mark.cmd
-@patch('pootle_app.management.commands.refresh_scores.get_user_model')
+@patch('pootle_app.management.commands.refresh_scores.Command.refresh_partitions')
 @patch('pootle_app.management.commands.refresh_scores.Command.get_users')
-@patch('pootle_app.management.commands.refresh_scores.score_updater')
-def test_cmd_refresh_scores_recalculate_user(updater_mock, users_mock, user_mock):
+def test_cmd_refresh_scores_recalculate_user(users_mock, refresh_mock):
     """Recalculate scores for given users."""
-    user_mock.return_value = 7
     users_mock.return_value = 23
     call_command('refresh_scores', '--user=member')
     options = DEFAULT_OPTIONS.copy()
@@ -68,14 +69,8 @@ def test_cmd_refresh_scores_recalculate_user(updater_mock, users_mock, user_mock
         list(users_mock.call_args)
         == [(), options])
     assert (
-        list(updater_mock.get.call_args)
-        == [(7,), {}])
-    assert (
-        list(updater_mock.get.return_value.call_args)
-        == [(), {}])
-    assert (
-        list(updater_mock.get.return_value.return_value.refresh_scores.call_args)
-        == [(23,), {}])
+        list(refresh_mock.call_args)
+        == [(23,), {'restart': False}])
 
 
 @pytest.mark.cmd
@@ -395,3 +390,169 @@ def test_cmd_refresh_scores_handle_all_stores(updater_mock, users_mock):
     assert (
         list(updater_mock.get.return_value.return_value.clear.call_args)
         == [(7,), {}])
+
+
+def _get_scores(model, **kwargs):
+    return sorted(
+        model.objects.filter(**kwargs).values_list(
+            "date", "user_id", "score", "translated", "reviewed",
+            "suggested"))
+
+
+@pytest.mark.cmd
+def test_cmd_refresh_scores_date_ranges():
+    command = Command()
+    command.partition_days = 10
+    assert (
+        list(command.get_date_ranges())
+        == [(None, None)])
+    assert (
+        list(command.get_date_ranges(until=date(2016, 1, 24)))
+        == [(None, date(2016, 1, 25))])
+    assert (
+        list(command.get_date_ranges(
+            since=date(2016, 1, 1),
+            until=date(2016, 1, 24)))
+        == [(date(2016, 1, 1), date(2016, 1, 11)),
+            (date(2016, 1, 11), date(2016, 1, 21)),
+            (date(2016, 1, 21), date(2016, 1, 25))])
+    since = localdate() - timedelta(days=5)
+    assert (
+        list(command.get_date_ranges(since=since))
+        == [(since, localdate() + timedelta(days=1))])
+
+
+@pytest.mark.cmd
+def test_cmd_refresh_scores_reset_partitioned():
+    with pytest.raises(CommandError):
+        call_command('refresh_scores', '--reset', '--workers=2')
+    with pytest.raises(CommandError):
+        call_command('refresh_scores', '--reset', '--since=2016-01-24')
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+@patch('pootle_app.management.commands.refresh_scores.get_pool')
+def test_cmd_refresh_scores_workers(pool_mock, capfd, tp0, inline_pool):
+    pool_mock.return_value = inline_pool
+    store_scores = _get_scores(
+        UserStoreScore, store__translation_project=tp0)
+    tp_scores = _get_scores(UserTPScore, tp=tp0)
+    assert store_scores
+    UserStoreScore.objects.filter(store__translation_project=tp0).delete()
+    UserTPScore.objects.filter(tp=tp0).delete()
+    call_command(
+        'refresh_scores',
+        '--workers=2',
+        '--project=%s' % tp0.project.code,
+        '--language=%s' % tp0.language.code)
+    out, err = capfd.readouterr()
+    assert 'Refreshing scores for 1 partitions with 2 workers' in out
+    assert pool_mock.call_args[0] == (2, )
+    assert (
+        _get_scores(UserStoreScore, store__translation_project=tp0)
+        == store_scores)
+    assert _get_scores(UserTPScore, tp=tp0) == tp_scores
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_cmd_refresh_scores_all(capfd):
+    store_scores = _get_scores(UserStoreScore)
+    tp_scores = _get_scores(UserTPScore)
+    assert store_scores
+    UserStoreScore.objects.all().delete()
+    UserTPScore.objects.all().delete()
+    call_command('refresh_scores')
+    out, err = capfd.readouterr()
+    assert (
+        'Refreshing scores for %s partitions with 1 workers'
+        % TranslationProject.objects.count()) in out
+    assert _get_scores(UserStoreScore) == store_scores
+    assert _get_scores(UserTPScore) == tp_scores
+    # progress is cleared once all of the partitions are refreshed
+    assert not get_redis_connection("redis").exists(
+        Command().get_progress_key())
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_cmd_refresh_scores_since_until(capfd, tp0):
+    dates = sorted(
+        set(UserStoreScore.objects.filter(
+            store__translation_project=tp0).values_list("date", flat=True)))
+    assert len(dates) > 1
+    since = until = dates[-1]
+    store_scores = _get_scores(
+        UserStoreScore, store__translation_project=tp0, date=since)
+    tp_scores = _get_scores(UserTPScore, tp=tp0, date=since)
+    UserStoreScore.objects.filter(store__translation_project=tp0).delete()
+    UserTPScore.objects.filter(tp=tp0).delete()
+    call_command(
+        'refresh_scores',
+        '--since=%s' % since.isoformat(),
+        '--until=%s' % until.isoformat(),
+        '--project=%s' % tp0.project.code,
+        '--language=%s' % tp0.language.code)
+    # only the scores in the window are rebuilt
+    assert (
+        _get_scores(UserStoreScore, store__translation_project=tp0)
+        == store_scores)
+    assert _get_scores(UserTPScore, tp=tp0) == tp_scores
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+@patch('pootle_app.management.commands.refresh_scores._refresh_partition')
+def test_cmd_refresh_scores_resume(refresh_mock, capfd, tp0):
+    refresh_mock.side_effect = lambda partition: partition
+    redis = get_redis_connection("redis")
+    command = Command()
+    command.name = "refresh_scores"
+    command.projects = [tp0.project.code]
+    tps = list(
+        command.tp_qs.order_by("pk").values_list("pk", flat=True))
+    assert len(tps) > 1
+    progress_key = command.get_progress_key()
+    started_key = "%s.started" % progress_key
+    redis.sadd(progress_key, command.get_partition_id((tps[0], None, None)))
+    redis.set(started_key, int(time.time()) - 3 * 24 * 60 * 60)
+    command.refresh_partitions()
+    out, err = capfd.readouterr()
+    assert 'Resuming refresh_scores started 3' in out
+    assert 'days ago, 1 partitions already refreshed' in out
+    assert (
+        [call[0][0] for call in refresh_mock.call_args_list]
+        == [(tp, None, None, None) for tp in tps[1:]])
+    # progress is cleared once all of the partitions are refreshed
+    assert not redis.exists(progress_key)
+    assert not redis.exists(started_key)
+    refresh_mock.reset_mock()
+    command.refresh_partitions()
+    out, err = capfd.readouterr()
+    assert 'Resuming' not in out
+    assert (
+        [call[0][0] for call in refresh_mock.call_args_list]
+        == [(tp, None, None, None) for tp in tps])
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+@patch('pootle_app.management.commands.refresh_scores._refresh_partition')
+def test_cmd_refresh_scores_restart(refresh_mock, capfd, tp0):
+    refresh_mock.side_effect = lambda partition: partition
+    redis = get_redis_connection("redis")
+    command = Command()
+    command.name = "refresh_scores"
+    command.projects = [tp0.project.code]
+    tps = list(
+        command.tp_qs.order_by("pk").values_list("pk", flat=True))
+    progress_key = command.get_progress_key()
+    redis.sadd(progress_key, command.get_partition_id((tps[0], None, None)))
+    command.refresh_partitions(restart=True)
+    out, err = capfd.readouterr()
+    assert 'Resuming' not in out
+    assert (
+        [call[0][0] for call in refresh_mock.call_args_list]
+        == [(tp, None, None, None) for tp in tps])
+    assert not redis.exists(progress_key)
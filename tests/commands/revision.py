@@ -27,3 +27,27 @@ def test_revision_restore(capfd):
     call_command('revision', '--restore')
     out, err = capfd.readouterr()
     assert out.rstrip().isnumeric()
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_revision_coalesced(capfd, store0):
+    """Get the number of coalesced revision updates."""
+    from pootle.core.signals import update_revisions
+    from pootle_revision.contextmanagers import (
+        coalesce_revisions, get_coalesced_stats)
+
+    stats = get_coalesced_stats()
+    with coalesce_revisions():
+        for i in range(2):
+            update_revisions.send(
+                store0.__class__, instance=store0, keys=["stats"])
+    new_stats = get_coalesced_stats()
+    assert (
+        new_stats["requested"] - stats["requested"]
+        > new_stats["written"] - stats["written"])
+    call_command('revision', '--coalesced')
+    out, err = capfd.readouterr()
+    assert (
+        out.rstrip()
+        == "Requested: %(requested)s Written: %(written)s" % new_stats)
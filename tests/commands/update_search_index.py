@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import pytest
+
+from django.core.management import call_command
+
+from pootle_word.models import UnitTrigram
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_update_search_index_language(capfd, tp0):
+    UnitTrigram.objects.all().delete()
+    call_command(
+        "update_search_index",
+        "--language=%s" % tp0.language.code,
+        "--project=%s" % tp0.project.code)
+    out, err = capfd.readouterr()
+    assert "Running update_search_index for %s" % tp0 in out
+    indexed = UnitTrigram.objects.values_list(
+        "unit__store__translation_project", flat=True).distinct()
+    assert list(indexed) == [tp0.pk]
@@ -13,6 +13,11 @@ import pytest
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db.models import Max
+
+from pootle_app.management.commands.update_tmserver import (
+    DBParser, IndexPipeline)
+from pootle_store.models import Unit
 
 
 @pytest.mark.cmd
@@ -118,3 +123,101 @@ msgstr "test"
                  '--target-language=af', os.path.join(p.dirname, p.basename))
     out, err = capfd.readouterr()
     assert "1 translations to index" in out
+
+
+class _FakeTMTarget(object):
+
+    def __init__(self, fail_on=None):
+        self.indexed = []
+        self.checkpoints = []
+        self.fail_on = fail_on
+        self.requests = 0
+
+    def bulk(self, actions):
+        self.requests += 1
+        if self.requests == self.fail_on:
+            raise ValueError("Bulk request failed")
+        self.indexed += [action["_id"] for action in actions]
+
+    def get_checkpoint(self):
+        return self.checkpoints[-1] if self.checkpoints else None
+
+    def set_checkpoint(self, revision):
+        self.checkpoints.append(revision)
+
+
+def _tm_parser(last_indexed_revision=-1):
+    parser = DBParser(
+        stdout=None,
+        index="translations",
+        disabled_projects=True)
+    parser.last_indexed_revision = last_indexed_revision
+    return parser
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_update_tmserver_unit_chunks(tp0):
+    parser = _tm_parser()
+    units = parser.units_qs.order_by("revision", "id")
+    # give some units the same revision so they cant be split
+    same_revision = list(units.values_list("id", flat=True)[3:8])
+    Unit.objects.filter(id__in=same_revision).update(revision=1)
+    chunks = list(parser.get_unit_chunks(4))
+    unit_ids = [unit["id"] for revision, chunk in chunks for unit in chunk]
+    assert unit_ids == list(units.values_list("id", flat=True))
+    for revision, chunk in chunks:
+        assert len(chunk) >= 4 or chunk is chunks[-1][1]
+        assert revision == max(unit["revision"] for unit in chunk)
+    assert [revision for revision, chunk in chunks] == sorted(
+        set(revision for revision, chunk in chunks))
+    same_revision_chunks = [
+        chunk for revision, chunk in chunks
+        if any(unit["id"] in same_revision for unit in chunk)]
+    assert len(same_revision_chunks) == 1
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_update_tmserver_pipeline(tp0):
+    parser = _tm_parser()
+    expected = list(
+        parser.units_qs.order_by("revision", "id").values_list(
+            "id", flat=True))
+    target = _FakeTMTarget()
+    pipeline = IndexPipeline(parser, target, workers=2, chunk_size=10)
+    assert pipeline.run() == len(expected)
+    assert sorted(target.indexed) == sorted(expected)
+    assert target.checkpoints == sorted(target.checkpoints)
+    assert (
+        target.get_checkpoint()
+        == parser.units_qs.aggregate(Max("revision"))["revision__max"])
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_update_tmserver_pipeline_resume(tp0):
+    parser = _tm_parser()
+    expected = list(
+        parser.units_qs.order_by("revision", "id").values_list(
+            "id", flat=True))
+    target = _FakeTMTarget(fail_on=3)
+    pipeline = IndexPipeline(parser, target, workers=1, chunk_size=10)
+    with pytest.raises(ValueError):
+        pipeline.run()
+    checkpoint = target.get_checkpoint()
+    assert checkpoint is not None
+    indexed = set(target.indexed)
+    assert (
+        set(parser.units_qs.filter(
+            revision__lte=checkpoint).values_list("id", flat=True))
+        <= indexed)
+
+    # resume from the checkpoint
+    parser.last_indexed_revision = checkpoint
+    target.fail_on = None
+    IndexPipeline(parser, target, workers=2, chunk_size=10).run()
+    assert sorted(set(target.indexed)) == sorted(expected)
+    assert (
+        set(target.indexed[len(indexed):]).intersection(indexed)
+        == set())
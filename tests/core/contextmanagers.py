@@ -6,11 +6,14 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+from threading import Event, Thread
+
 import pytest
 
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 
-from pootle.core.contextmanagers import bulk_operations, keep_data
+from pootle.core.contextmanagers import (
+    bulk_operations, keep_data, suppress_signal)
 from pootle.core.signals import create, delete, update, update_data
 from pootle_data.models import StoreChecksData
 from pootle_store.models import QualityCheck, Store, Unit
@@ -298,3 +301,35 @@ def test_contextmanager_bulk_ops_update(tp0, store0):
             update.send(Unit, updates=d2)
         d1.update(d2)
         assert updated.unit_updates == d1
+
+
+def test_contextmanager_suppress_signal_threads():
+    signal = Signal()
+    received = []
+    entered = Event()
+    exited = Event()
+
+    def handler(**kwargs):
+        received.append(kwargs["name"])
+
+    signal.connect(handler)
+
+    def suppress_in_thread():
+        # enters after and exits before the main thread
+        with suppress_signal(signal):
+            entered.set()
+            signal.send(None, name="suppressed_thread")
+            exited.wait()
+        signal.send(None, name="thread")
+
+    with suppress_signal(signal):
+        thread = Thread(target=suppress_in_thread)
+        thread.start()
+        entered.wait()
+        # suppression in one thread does not affect another
+        signal.send(None, name="suppressed_main")
+    signal.send(None, name="main")
+    exited.set()
+    thread.join()
+    signal.send(None, name="main")
+    assert received == ["main", "thread", "main"]
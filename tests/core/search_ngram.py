@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import sqlite3
+
+import pytest
+
+from django.core.management import call_command
+from django.db.models import Max
+
+from pootle.core.search import NgramSearchBackend, SearchBroker
+from pootle.core.search.backends.ngram import get_ngrams
+from pootle_store.models import Unit
+
+
+def _tm_settings(settings, tmpdir, **kwargs):
+    tm_settings = {
+        'ENGINE': 'pootle.core.search.backends.NgramSearchBackend',
+        'PATH': str(tmpdir.join("tm.db")),
+        'INDEX_NAME': 'translations'}
+    tm_settings.update(kwargs)
+    settings.POOTLE_TM_SERVER = {'local': tm_settings}
+
+
+def _tm_doc(unit_id, source, target, **kwargs):
+    doc = {
+        'id': unit_id,
+        'revision': 1,
+        'project': 'Project 0',
+        'path': '/language0/project0/store0.po',
+        'username': 'member',
+        'fullname': 'Member',
+        'email_md5': None,
+        'source': source,
+        'target': target}
+    doc.update(kwargs)
+    return doc
+
+
+def test_search_ngrams():
+    assert get_ngrams(u"Cat") == set([u" ca", u"cat", u"at "])
+    assert get_ngrams(u"") == set()
+    assert get_ngrams(u"a") == set([u" a "])
+
+
+@pytest.mark.django_db
+def test_search_ngram_backend(settings, tmpdir, store0):
+    _tm_settings(settings, tmpdir)
+    unit = store0.units.first()
+    unit.source = u"Open the file in a new window"
+    backend = NgramSearchBackend('local')
+    assert backend.is_auto_updatable
+    assert backend.search(unit) == []
+    language = unit.store.translation_project.language.code
+    backend.update(
+        language,
+        _tm_doc(unit.id, u"Open the file in a new window", u"Self"))
+    backend.update(
+        language,
+        _tm_doc(1001, u"Open the file in a new window", u"Match"))
+    backend.update(
+        language,
+        _tm_doc(1002, u"Open the file in new windows", u"Fuzzy"))
+    backend.update(
+        language,
+        _tm_doc(1003, u"Close all of the other tabs", u"No match"))
+    backend.update(
+        "other_language",
+        _tm_doc(1004, u"Open the file in a new window", u"Other"))
+    assert backend.count() == 5
+    results = backend.search(unit)
+    assert [r['target'] for r in results] == [u"Match", u"Fuzzy"]
+    assert results[0]['score'] == 100
+    assert results[1]['score'] < results[0]['score']
+    assert results[0]['unit_id'] == u"1001"
+    assert results[0]['project'] == 'Project 0'
+    assert results[0]['count'] == 1
+
+    # updating an entry replaces it
+    backend.update(
+        language,
+        _tm_doc(1002, u"Close all of the other windows", u"Fuzzy"))
+    assert backend.count() == 5
+    assert [r['target'] for r in backend.search(unit)] == [u"Match"]
+
+    # the broker merges results from the backend
+    assert (
+        [r['target'] for r in SearchBroker().search(unit)]
+        == [u"Match"])
+
+    # only the best ranked candidates are compared
+    backend.max_candidates = 1
+    assert [r['target'] for r in backend.search(unit)] == [u"Match"]
+
+    backend.clear()
+    assert backend.count() == 0
+    assert backend.get_checkpoint() is None
+
+
+@pytest.mark.django_db
+def test_search_ngram_backend_min_similarity(settings, tmpdir, store0):
+    _tm_settings(settings, tmpdir, MIN_SIMILARITY=0.99, WEIGHT=0.5)
+    unit = store0.units.first()
+    unit.source = u"Open the file in a new window"
+    backend = NgramSearchBackend('local')
+    language = unit.store.translation_project.language.code
+    backend.update(
+        language,
+        _tm_doc(1001, u"Open the file in a new window", u"Match"))
+    backend.update(
+        language,
+        _tm_doc(1002, u"Open the file in new windows", u"Fuzzy"))
+    results = backend.search(unit)
+    assert [r['target'] for r in results] == [u"Match"]
+    assert results[0]['score'] == 50
+
+
+@pytest.mark.cmd
+@pytest.mark.django_db
+def test_update_tmserver_ngram(capfd, settings, tmpdir, tp0):
+    _tm_settings(settings, tmpdir)
+    units_qs = (
+        Unit.objects.exclude(target_f__isnull=True)
+                    .exclude(target_f__exact='')
+                    .exclude(store__translation_project__project__disabled=True)
+                    .exclude(store__obsolete=True))
+    max_revision = units_qs.aggregate(Max("revision"))["revision__max"]
+    call_command('update_tmserver', '--chunk-size=10')
+    out, err = capfd.readouterr()
+    assert "Last indexed revision = -1" in out
+    assert "%d translations to index" % units_qs.count() in out
+    backend = NgramSearchBackend('local')
+    assert backend.count() == units_qs.count()
+    assert backend.get_checkpoint() == max_revision
+
+    # nothing left to index
+    call_command('update_tmserver')
+    out, err = capfd.readouterr()
+    assert "Last indexed revision = %s" % max_revision in out
+    assert "No translations to index" in out
+
+    call_command('update_tmserver', '--rebuild')
+    out, err = capfd.readouterr()
+    assert "Last indexed revision = -1" in out
+    assert backend.count() == units_qs.count()
+
+
+@pytest.mark.django_db
+def test_search_ngram_backend_locked(settings, tmpdir, store0):
+    _tm_settings(settings, tmpdir, TIMEOUT=0)
+    backend = NgramSearchBackend('local')
+    language = store0.translation_project.language.code
+    writer = sqlite3.connect(str(tmpdir.join("tm.db")))
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        # the error is logged and not raised
+        backend.update(language, _tm_doc(1001, u"Locked", u"Locked"))
+    finally:
+        writer.rollback()
+    assert backend.count() == 0
+    backend.update(language, _tm_doc(1001, u"Unlocked", u"Unlocked"))
+    assert backend.count() == 1
+    assert (
+        backend.connection.execute("PRAGMA journal_mode").fetchone()[0]
+        == "wal")
+
+
+@pytest.mark.django_db
+def test_search_ngram_backend_missing_path(settings, tmpdir, store0):
+    _tm_settings(settings, tmpdir)
+    settings.POOTLE_TM_SERVER["local"]["PATH"] = str(
+        tmpdir.join("missing", "tm.db"))
+    # the error is logged and not raised
+    backend = NgramSearchBackend('local')
+    assert backend.search(store0.units.first()) == []
+
+
+@pytest.mark.django_db
+def test_search_ngram_backend_corrupt(settings, tmpdir, store0):
+    _tm_settings(settings, tmpdir)
+    tmpdir.join("tm.db").write("NOT A DATABASE" * 100)
+    backend = NgramSearchBackend('local')
+    assert backend.search(store0.units.first()) == []
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import os
+
+import pytest
+from mock import patch
+
+from pootle.core.utils.db import get_pool
+
+
+# pids of the processes that have closed their database connections
+_closed = []
+
+
+class _Connections(object):
+
+    def close_all(self):
+        _closed.append(os.getpid())
+
+
+def _get_worker(arg):
+    return arg, os.getpid(), os.getpid() in _closed
+
+
+def test_get_pool():
+    with patch("pootle.core.utils.db.connections", _Connections()):
+        pool = get_pool(2)
+        try:
+            results = pool.map(_get_worker, range(4))
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    assert [arg for arg, pid, closed in results] == range(4)
+    # the connections are closed before forking, and the workers close the
+    # connections they inherit
+    assert os.getpid() in _closed
+    assert all(pid != os.getpid() for arg, pid, closed in results)
+    assert all(closed for arg, pid, closed in results)
+
+
+@pytest.mark.django_db
+def test_get_pool_atomic():
+    # workers could not see the changes in the test transaction
+    assert get_pool(2) is None
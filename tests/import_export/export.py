@@ -6,11 +6,21 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+import os
+from io import BytesIO
+from zipfile import ZipFile
+
 import pytest
 
+from mock import patch
+
+from translate.storage import tmx
+
 from django.urls import reverse
 
-from import_export.utils import TPTMXExporter
+from import_export.utils import (
+    TMXStream, TPTMXExporter, enqueue_export_zip, get_path_exporter)
+from pootle_store.constants import TRANSLATED, UNTRANSLATED
 
 
 @pytest.mark.django_db
@@ -25,6 +35,67 @@ def test_download_exported_tmx(client, tp0):
     assert response.url == exporter.get_url()
 
 
+def _read_tmx(exporter):
+    with ZipFile(exporter.abs_filepath) as zf:
+        return zf.read(exporter.filename.rstrip('.zip'))
+
+
+@pytest.mark.django_db
+def test_export_tmx(tp0, media_test_dir):
+    exporter = TPTMXExporter(tp0)
+    exported, removed = exporter.export()
+    assert exported == exporter.abs_filepath
+    assert removed == []
+    tmxfile = tmx.tmxfile()
+    for store in tp0.stores.live().order_by("pootle_path"):
+        for unit in store.units.filter(state=TRANSLATED):
+            tmxfile.addtranslation(unit.source, tp0.project.source_language.code,
+                                   unit.target, tp0.language.code,
+                                   unit.developer_comment)
+    assert len(tmxfile.units)
+    bs = BytesIO()
+    tmxfile.serialize(bs)
+    assert _read_tmx(exporter) == bs.getvalue()
+    assert [
+        f for f
+        in os.listdir(exporter.directory)
+        if f.endswith(".tmp")] == []
+
+
+@pytest.mark.django_db
+def test_export_tmx_stream(tp0):
+    translations = list(TPTMXExporter(tp0).translations)
+    assert len(translations) > 1
+    assert (
+        "".join(TMXStream(translations, "en", "fr", chunk_size=1))
+        == "".join(TMXStream(translations, "en", "fr")))
+    tmxfile = tmx.tmxfile()
+    bs = BytesIO()
+    tmxfile.serialize(bs)
+    assert "".join(TMXStream([], "en", "fr")) == bs.getvalue()
+
+
+@pytest.mark.django_db
+def test_export_tmx_incremental(tp0, media_test_dir):
+    exporter = TPTMXExporter(tp0)
+    exported, removed = exporter.export(incremental=True)
+    assert exported == exporter.abs_filepath
+    mtime = os.path.getmtime(exported)
+    exporter = TPTMXExporter(tp0)
+    assert exporter.export(incremental=True) == (None, [])
+    assert os.path.getmtime(exported) == mtime
+    assert exporter.get_url()
+
+    unit = tp0.stores.first().units.filter(state=UNTRANSLATED).first()
+    unit.target = "Changed"
+    unit.save()
+    exporter = TPTMXExporter(tp0)
+    assert exporter.has_changes()
+    exported, removed = exporter.export(incremental=True)
+    assert exported == exporter.abs_filepath
+    assert "Changed" in _read_tmx(exporter)
+
+
 @pytest.mark.django_db
 def test_view_context_with_exported_tmx(exported_tp_view_response):
 
@@ -57,3 +128,144 @@ def test_wrong_language_exported_tmx_url(client):
     args = ('language_foo', 'project0')
     response = client.get(reverse('pootle-offline-tm-tp', args=args))
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_download_store_export(client, store0):
+    response = client.get(
+        "%s?path=%s" % (reverse('pootle-export'), store0.pootle_path))
+    assert response.status_code == 200
+    assert response.streaming
+    assert (
+        response["Content-Disposition"]
+        == "attachment; filename=%s" % store0.name)
+    content = "".join(response.streaming_content)
+    assert (
+        store0.deserialize(content).getids()
+        == store0.deserialize(store0.serialize()).getids())
+
+
+def _test_zip_export(content, tp):
+    prefix = tp.pootle_path.strip("/").replace("/", "-")
+    stores = tp.stores.live()
+    with ZipFile(BytesIO(content)) as zf:
+        assert (
+            sorted(zf.namelist())
+            == sorted(
+                prefix + store.pootle_path
+                for store
+                in stores))
+        for store in stores:
+            assert (
+                zf.read(prefix + store.pootle_path)
+                == store.serialize())
+
+
+@pytest.mark.django_db
+def test_download_zip_export(client, tp0, exports_dir):
+    url = "%s?path=%s" % (reverse('pootle-export'), tp0.pootle_path)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.streaming
+    assert (
+        response["Content-Disposition"]
+        == "attachment; filename=%s.zip"
+        % tp0.pootle_path.strip("/").replace("/", "-"))
+    content = "".join(response.streaming_content)
+    _test_zip_export(content, tp0)
+    exporter = get_path_exporter(tp0.pootle_path)
+    cached = exporter.get_cached()
+    assert os.listdir(exports_dir) == [os.path.basename(cached)]
+    with open(cached, "rb") as f:
+        assert f.read() == content
+
+    # unchanged trees are served from disk
+    response = client.get(url)
+    assert "".join(response.streaming_content) == content
+    assert hasattr(response, "file_to_stream")
+
+    # the zip is exported again once the directory changes
+    unit = tp0.stores.first().units.filter(state=UNTRANSLATED).first()
+    unit.target = "Changed"
+    unit.save()
+    response = client.get(url)
+    assert not hasattr(response, "file_to_stream")
+    content = "".join(response.streaming_content)
+    _test_zip_export(content, tp0)
+    new_cached = get_path_exporter(tp0.pootle_path).get_cached()
+    assert new_cached != cached
+    assert os.listdir(exports_dir) == [os.path.basename(new_cached)]
+
+
+@pytest.mark.django_db
+def test_download_zip_export_incomplete(client, tp0, exports_dir):
+    response = client.get(
+        "%s?path=%s" % (reverse('pootle-export'), tp0.pootle_path))
+    next(iter(response.streaming_content))
+    response.close()
+    assert not os.listdir(exports_dir)
+    assert not get_path_exporter(tp0.pootle_path).get_cached()
+
+
+@pytest.mark.django_db
+def test_download_zip_export_background(client, tp0, exports_dir):
+    url = "%s?path=%s&background=1" % (
+        reverse('pootle-export'), tp0.pootle_path)
+    response = client.get(url)
+    assert response.status_code == 202
+    cached = get_path_exporter(tp0.pootle_path).get_cached()
+    assert cached
+    response = client.get(url)
+    assert response.status_code == 200
+    with open(cached, "rb") as f:
+        assert "".join(response.streaming_content) == f.read()
+
+
+@pytest.mark.django_db
+def test_download_zip_export_background_queued(client, tp0, exports_dir):
+    from django_rq.queues import get_queue
+
+    # jobs are only queued, rather than run
+    queue = get_queue("default", async=True)
+    url = "%s?path=%s&background=1" % (
+        reverse('pootle-export'), tp0.pootle_path)
+    with patch("import_export.views.get_queue") as queue_mock:
+        queue_mock.return_value = queue
+        assert client.get(url).status_code == 202
+        assert client.get(url).status_code == 202
+    exporter = get_path_exporter(tp0.pootle_path)
+    # the job for the current revision is only queued once
+    assert queue.job_ids == [exporter.job_id]
+    assert enqueue_export_zip(queue, tp0.pootle_path).id == exporter.job_id
+    assert queue.count == 1
+    assert not exporter.get_cached()
+
+    # the export is queued again once the directory changes
+    unit = tp0.stores.first().units.filter(state=UNTRANSLATED).first()
+    unit.target = "Changed"
+    unit.save()
+    new_exporter = get_path_exporter(tp0.pootle_path)
+    assert new_exporter.job_id != exporter.job_id
+    assert (
+        enqueue_export_zip(queue, tp0.pootle_path).id
+        == new_exporter.job_id)
+    assert new_exporter.job_id in queue.job_ids
+
+
+@pytest.mark.django_db
+def test_download_zip_export_single_store(client, tp0, exports_dir):
+    # a directory containing a single store
+    directory = tp0.directory.child_dirs.get(
+        name="subdir0").child_dirs.get(name="subdir1")
+    store = directory.child_stores.get()
+    exporter = get_path_exporter(directory.pootle_path)
+    assert exporter.stores.count() == 1
+    with open(exporter.cached_path, "wb") as f:
+        f.write("ZIP")
+    response = client.get(
+        "%s?path=%s" % (reverse('pootle-export'), directory.pootle_path))
+    assert response.status_code == 200
+    assert (
+        response["Content-Disposition"]
+        == "attachment; filename=%s" % store.name)
+    assert "".join(response.streaming_content) == store.serialize()
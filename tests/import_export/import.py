@@ -16,7 +16,7 @@ import pytest_pootle
 from pytest_pootle.utils import create_store
 
 from import_export.exceptions import UnsupportedFiletypeError
-from import_export.utils import import_file
+from import_export.utils import import_file, import_files
 from pootle_app.models.permissions import check_user_permission
 from pootle_statistics.models import SubmissionTypes
 from pootle_store.constants import NEW, OBSOLETE, PARSED, TRANSLATED
@@ -146,3 +146,36 @@ def test_import_add_and_obsolete_units(project0_nongnu, import_tps,
         assert Unit.objects.filter(store=store).count() == 2
     else:
         assert store.units.all().count() == 1
+
+
+@pytest.mark.django_db
+def test_import_files(project0, admin):
+    stores = [
+        Store.objects.live().filter(
+            translation_project__project=project0,
+            translation_project__language__code=language_code,
+            unit__state__lt=TRANSLATED).first()
+        for language_code in ["language0", "language1"]]
+    files = []
+    translated = {}
+    for store in stores:
+        unit = store.units.filter(state__lt=TRANSLATED).first()
+        ttk = store.deserialize(store.serialize())
+        ttk.findid(unit.getid()).target = "Imported %s" % store.pk
+        files.append(
+            SimpleUploadedFile(
+                store.name, str(ttk), "text/x-gettext-translation"))
+        translated[store.pk] = (
+            unit.pk,
+            store.data.translated_words,
+            store.translation_project.data.translated_words)
+    import_files(files, user=admin)
+    for store in Store.objects.filter(pk__in=translated.keys()):
+        unit_id, store_words, tp_words = translated[store.pk]
+        unit = Unit.objects.get(pk=unit_id)
+        assert unit.target == "Imported %s" % store.pk
+        assert unit.state == TRANSLATED
+        assert unit.change.changed_with == SubmissionTypes.UPLOAD
+        assert store.data.translated_words > store_words
+        assert store.translation_project.data.translated_words > tp_words
+        assert store.data.max_unit_revision == unit.revision
@@ -12,6 +12,7 @@ import os
 import six
 
 import pytest
+from mock import patch
 
 from pytest_pootle.factories import (
     LanguageDBFactory, ProjectDBFactory, StoreDBFactory,
@@ -26,11 +27,13 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 
 from pootle.core.delegate import (
     config, format_classes, format_diffs, formats)
+from pootle.core.cache import get_cache
 from pootle.core.models import Revision
 from pootle.core.delegate import deserializers, serializers
 from pootle.core.url_helpers import to_tp_relative_path
 from pootle.core.plugin import provider
-from pootle.core.serializers import Serializer, Deserializer
+from pootle.core.serializers import (
+    Deserializer, Serializer, StreamSerializer)
 from pootle_app.models import Directory
 from pootle_config.exceptions import ConfigurationError
 from pootle_format.exceptions import UnrecognizedFiletype
@@ -45,6 +48,7 @@ from pootle_store.constants import (
     NEW, OBSOLETE, PARSED, POOTLE_WINS, TRANSLATED)
 from pootle_store.diff import DiffableStore, StoreDiff
 from pootle_store.models import Store
+from pootle_store.store.serialize import StoreSerialization, XLIFFStoreStream
 from pootle_store.util import parse_pootle_revision
 from pootle_translationproject.models import TranslationProject
 
@@ -875,6 +879,170 @@ def test_store_po_serializer_custom(test_fs, store_po):
     assert checker.original_data == _store_as_string(store_po)
 
 
+def _without_creation_date(data):
+    return "\n".join(
+        line
+        for line
+        in data.split("\n")
+        if not line.startswith('"POT-Creation-Date'))
+
+
+@pytest.mark.django_db
+def test_store_po_serializer_stream(test_fs, store_po):
+
+    with test_fs.open("data/po/complex.po") as test_file:
+        test_string = test_file.read()
+    store_po.update(store_po.deserialize(test_string))
+    store_po.makeobsolete()
+    store_po.resurrect()
+    store_po.units.first().makeobsolete()
+
+    for include_obsolete in [True, False]:
+        chunks = list(
+            StoreSerialization(store_po).stream(
+                include_obsolete=include_obsolete,
+                chunk_size=2))
+        assert len(chunks) > 2
+        assert all(isinstance(chunk, str) for chunk in chunks)
+        assert (
+            _without_creation_date("".join(chunks))
+            == _without_creation_date(
+                store_po.serialize(include_obsolete=include_obsolete)))
+    assert (
+        _without_creation_date("".join(store_po.serialize_stream()))
+        == _without_creation_date(store_po.serialize()))
+
+
+@pytest.mark.django_db
+def test_store_xliff_serializer_stream(store_po, test_fs, xliff):
+    project = store_po.translation_project.project
+    project.filetypes.add(xliff)
+    project.filetype_tool.set_store_filetype(store_po, xliff)
+    serialization = StoreSerialization(store_po)
+    assert serialization.stream_class is XLIFFStoreStream
+    assert "".join(serialization.stream()) == store_po.serialize()
+
+    with test_fs.open(['data', 'xliff', 'welcome.xliff']) as f:
+        file_store = getclass(f)(f.read())
+    store_po.update(file_store)
+    chunks = list(serialization.stream(chunk_size=1))
+    assert len(chunks) == store_po.units.count() + 2
+    assert "".join(chunks) == store_po.serialize()
+
+    # units keep their files across chunks
+    with test_fs.open(['data', 'xliff', 'manyfiles.xliff']) as f:
+        file_store = getclass(f)(f.read())
+    store_po.update(file_store)
+    chunks = list(serialization.stream(chunk_size=1))
+    assert len(chunks) > store_po.units.count()
+    serialized = store_po.deserialize("".join(chunks))
+    expected = store_po.deserialize(store_po.serialize())
+    assert (
+        [(unit.getid(), unit.target) for unit in serialized.units]
+        == [(unit.getid(), unit.target) for unit in expected.units])
+    assert (
+        set([u'file0\x04hello', u'file1\x04world'])
+        <= set(unit.getid() for unit in serialized.units))
+
+
+@pytest.mark.django_db
+def test_store_po_serializer_stream_custom(test_fs, store_po):
+
+    class EGStreamSerializer(StreamSerializer):
+
+        def transform(self, chunk):
+            return chunk.replace("msgid", "MSGID")
+
+    class EGSerializer(Serializer):
+
+        @property
+        def output(self):
+            return self.original_data.replace("msgstr", "MSGSTR")
+
+    @provider(serializers, sender=Project)
+    def provide_serializers(**kwargs):
+        return dict(
+            eg_stream_serializer=EGStreamSerializer,
+            eg_serializer=EGSerializer)
+
+    with test_fs.open("data/po/complex.po") as test_file:
+        test_string = test_file.read()
+    store_po.update(store_po.deserialize(test_string))
+    project = store_po.translation_project.project
+    config.get(project.__class__, instance=project).set_config(
+        "pootle.core.serializers",
+        ["eg_stream_serializer"])
+    chunks = StoreSerialization(store_po).stream(chunk_size=2)
+    assert not isinstance(chunks, six.string_types)
+    chunks = list(chunks)
+    assert len(chunks) > 2
+    serialized = store_po.serialize()
+    assert isinstance(serialized, str)
+    assert "MSGID" in serialized
+    assert "msgid" not in serialized
+    assert (
+        _without_creation_date("".join(chunks))
+        == _without_creation_date(serialized))
+
+    # chunks are joined for serializers that dont stream
+    config.get(project.__class__, instance=project).set_config(
+        "pootle.core.serializers",
+        ["eg_stream_serializer", "eg_serializer"])
+    chunks = list(StoreSerialization(store_po).stream(chunk_size=2))
+    assert len(chunks) == 1
+    assert "MSGSTR" in chunks[0]
+    assert "MSGID" in chunks[0]
+
+
+@pytest.mark.django_db
+def test_store_po_serializer_cache(store0, settings):
+    settings.POOTLE_SERIALIZED_CACHE_MAX_SIZE = 10 * 1024 * 1024
+    cache = get_cache("lru")
+    serialization = StoreSerialization(store0)
+    cache_key = serialization.get_cache_key()
+    assert cache_key != serialization.get_cache_key(include_obsolete=True)
+    assert cache_key != serialization.get_cache_key(raw=True)
+    assert cache.get(cache_key) is None
+    serialized = store0.serialize()
+    assert cache.get(cache_key) is not None
+    assert serialization.get_cached(cache_key) == serialized
+
+    # cached data is returned without converting the store
+    with patch("pootle_store.store.serialize.StoreSerialization.tostring") as m:
+        assert StoreSerialization(store0).serialize() == serialized
+        assert "".join(StoreSerialization(store0).stream()) == serialized
+        assert not m.called
+
+    # changing a unit changes the key
+    unit = store0.units.first()
+    unit.target = "CHANGED TARGET"
+    unit.save()
+    new_key = StoreSerialization(store0).get_cache_key()
+    assert new_key != cache_key
+    assert cache.get(new_key) is None
+    chunks = StoreSerialization(store0).stream()
+    assert cache.get(new_key) is None
+    serialized = "".join(chunks)
+    assert "CHANGED TARGET" in serialized
+    assert StoreSerialization(store0).get_cached(new_key) == serialized
+
+
+@pytest.mark.django_db
+def test_store_po_serializer_cache_max_size(store0, settings):
+    cache = get_cache("lru")
+    settings.POOTLE_SERIALIZED_CACHE_MAX_SIZE = 0
+    cache_key = StoreSerialization(store0).get_cache_key()
+    store0.serialize()
+    "".join(StoreSerialization(store0).stream())
+    assert cache.get(cache_key) is None
+
+    # entries larger than the limit are not cached
+    settings.POOTLE_SERIALIZED_CACHE_MAX_SIZE = 10
+    store0.serialize()
+    "".join(StoreSerialization(store0).stream(chunk_size=1))
+    assert cache.get(cache_key) is None
+
+
 @pytest.mark.django_db
 def test_store_po_deserializer_custom(test_fs, store_po):
 
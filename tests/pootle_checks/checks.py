@@ -9,7 +9,8 @@
 import pytest
 
 from pootle.core.delegate import check_updater
-from pootle_checks.utils import TPQCUpdater, StoreQCUpdater
+from pootle_checks.utils import (
+    QualityCheckWriter, StoreQCUpdater, TPQCUpdater)
 from pootle_store.constants import OBSOLETE
 from pootle_store.models import QualityCheck
 
@@ -96,3 +97,37 @@ def test_store_qualitycheck_updater(tp0, store0):
     newest_revision = tp0.directory.revisions.filter(
         key="stats").values_list("value", flat=True).first()
     assert newest_revision == new_revision
+
+
+@pytest.mark.django_db
+def test_qualitycheck_writer(store0):
+    unit = store0.units.first()
+    writer = QualityCheckWriter(batch_size=2)
+    checks = [
+        QualityCheck(unit=unit, name=name, message="", category=0)
+        for name in ["check0", "check1", "check2"]]
+    writer.create(checks[:1])
+    assert writer.to_create == checks[:1]
+    assert not unit.qualitycheck_set.filter(name__startswith="check").exists()
+    writer.create(checks[1:])
+    assert writer.to_create == []
+    created = unit.qualitycheck_set.filter(name__startswith="check")
+    assert sorted(created.values_list("name", flat=True)) == [
+        "check0", "check1", "check2"]
+    check_ids = list(created.values_list("id", flat=True))
+    writer.delete(check_ids[:1])
+    assert created.count() == 3
+    writer.flush()
+    assert writer.to_delete == []
+    assert sorted(created.values_list("id", flat=True)) == check_ids[1:]
+
+
+@pytest.mark.django_db
+def test_tp_qualitycheck_updater_batch_size(tp0):
+    checks = QualityCheck.objects.filter(unit__store__translation_project=tp0)
+    expected = sorted(checks.values_list("unit_id", "name"))
+    checks.delete()
+    updater = TPQCUpdater(translation_project=tp0, batch_size=3)
+    updater.update()
+    assert sorted(checks.values_list("unit_id", "name")) == expected
+    assert "writer" not in updater.__dict__
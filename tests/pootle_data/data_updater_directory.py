@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import pytest
+
+from django.db.models import Max, Sum
+
+from pootle.core.delegate import data_updater
+from pootle.core.signals import update_data
+from pootle_app.models import Directory
+from pootle_data.directory_data import (
+    DirectoryDataTool, DirectoryDataUpdater, DirectoryUpdater)
+from pootle_data.models import DirectoryData, StoreData
+from pootle_data.utils import SUM_FIELDS
+from pootle_store.constants import FUZZY, TRANSLATED
+from pootle_store.models import Unit
+
+
+def _calc_directory_data(directory):
+    store_data = StoreData.objects.filter(
+        store__translation_project_id=directory.tp_id,
+        store__pootle_path__startswith=directory.pootle_path,
+        store__obsolete=False)
+    aggregates = dict(
+        (k, Sum(k)) for k in SUM_FIELDS)
+    aggregates["max_unit_revision"] = Max("max_unit_revision")
+    aggregates["last_submission"] = Max("last_submission")
+    return store_data.aggregate(**aggregates)
+
+
+def _test_directory_data(directory):
+    directory = Directory.objects.get(pk=directory.pk)
+    expected = _calc_directory_data(directory)
+    for k in SUM_FIELDS:
+        assert getattr(directory.data, k) == expected[k]
+    assert directory.data.max_unit_revision == expected["max_unit_revision"]
+    assert directory.data.last_submission_id == expected["last_submission"]
+
+
+@pytest.mark.django_db
+def test_data_directory_updater(subdir0):
+    data_tool = DirectoryDataTool(subdir0)
+    assert isinstance(data_tool.updater, DirectoryDataUpdater)
+    assert data_updater.get(Directory) is DirectoryUpdater
+    _test_directory_data(subdir0)
+    _test_directory_data(subdir0.tp.directory)
+    assert (
+        subdir0.tp.directory.data.total_words
+        == subdir0.tp.data.total_words)
+
+
+@pytest.mark.django_db
+def test_data_directory_updater_parent_paths(subdir0):
+    updater = DirectoryUpdater(
+        object_list=subdir0.child_dirs.all())
+    assert updater.parent_paths == set(
+        [child.pootle_path for child in subdir0.child_dirs.all()]
+        + [subdir0.pootle_path,
+           subdir0.tp.pootle_path])
+    assert not DirectoryUpdater(
+        object_list=Directory.objects.filter(
+            pootle_path__startswith="/projects/")).parent_paths
+
+
+@pytest.mark.django_db
+def test_data_directory_updater_unit_change(subdir0):
+    unit = Unit.objects.live().filter(
+        store__pootle_path__startswith=subdir0.pootle_path).exclude(
+            state=TRANSLATED).first()
+    store = unit.store
+    unit.target = "CHANGED"
+    unit.state = TRANSLATED
+    unit.save()
+    _test_directory_data(subdir0)
+    _test_directory_data(subdir0.tp.directory)
+    store.data.refresh_from_db()
+    assert (
+        Directory.objects.get(pk=subdir0.pk).data.max_unit_revision
+        == store.data.max_unit_revision)
+
+
+@pytest.mark.django_db
+def test_data_directory_updater_rebuild(subdir0):
+    DirectoryData.objects.filter(
+        directory__tp=subdir0.tp).delete()
+    data_tool = DirectoryDataTool(subdir0)
+    assert not data_tool.has_rollup_data
+    # rollups for the whole tp are built when any of its directories change
+    update_data.send(
+        Directory,
+        object_list=[subdir0])
+    assert DirectoryDataTool(subdir0).has_rollup_data
+    assert (
+        DirectoryData.objects.filter(directory__tp=subdir0.tp).count()
+        == subdir0.tp.dirs.count())
+    _test_directory_data(subdir0)
+    _test_directory_data(subdir0.tp.directory)
+
+
+@pytest.mark.django_db
+def test_data_directory_rollup_children_stats(subdir0):
+    unit = Unit.objects.live().filter(
+        store__pootle_path__startswith=subdir0.pootle_path,
+        state=TRANSLATED).first()
+    unit.state = FUZZY
+    unit.save()
+    for directory in [subdir0, subdir0.tp.directory]:
+        data_tool = DirectoryDataTool(directory)
+        assert data_tool.has_rollup_data
+        assert (
+            data_tool.get_rollup_children_stats()
+            == data_tool.get_children_stats(data_tool.child_stats_qs))
+        assert (
+            data_tool.children_stats
+            == data_tool.get_rollup_children_stats())
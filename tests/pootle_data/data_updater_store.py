@@ -14,7 +14,7 @@ from pytest_pootle.factories import StoreDBFactory
 
 from translate.filters.decorators import Category
 
-from django.db.models import Max
+from django.db.models import F, Max
 
 from pootle.core.delegate import crud, review
 from pootle.core.signals import update_checks, update_data
@@ -396,3 +396,78 @@ def test_data_store_updater_defaults(tp0):
             assert (
                 aggregate_data[k]
                 == store.data_tool.updater.aggregate_defaults[k])
+
+
+@pytest.mark.django_db
+def test_data_store_updater_unit_deltas(store0):
+    WORDCOUNT_KEYS = ["total_words", "fuzzy_words", "translated_words"]
+    updater = store0.data_tool.updater
+    unit = store0.units.filter(state=TRANSLATED).first()
+    wordcount = unit.unit_source.source_wordcount
+    before = {k: getattr(store0.data, k) for k in WORDCOUNT_KEYS}
+    deltas = updater.get_data_deltas(
+        unit_deltas=[
+            dict(before=(TRANSLATED, wordcount),
+                 after=(FUZZY, wordcount),
+                 revision=store0.data.max_unit_revision + 1,
+                 mtime=None)])
+    assert deltas["total_words"] == 0
+    assert deltas["translated_words"] == -wordcount
+    assert deltas["fuzzy_words"] == wordcount
+    assert deltas["max_unit_revision"] == store0.data.max_unit_revision + 1
+    assert deltas["max_unit_mtime"] is None
+    # new units only add to the data
+    assert (
+        updater.get_unit_delta(before=(None, 0), after=(UNTRANSLATED, 3))
+        == dict(max_unit_revision=None, max_unit_mtime=None, total_words=3))
+    assert updater.get_data_deltas() is None
+    assert updater.get_data_deltas(unit_deltas=[]) is None
+    assert before == {k: getattr(store0.data, k) for k in WORDCOUNT_KEYS}
+
+
+@pytest.mark.django_db
+def test_data_store_updater_unit_deltas_concurrent(store0):
+    updater = store0.data_tool.updater
+    data = updater.data
+    original = data.total_words
+    # another process adds to the data after it was read
+    data.__class__.objects.filter(pk=data.pk).update(
+        total_words=F("total_words") + 7)
+    updater.update(
+        unit_deltas=[
+            dict(before=(None, 0),
+                 after=(UNTRANSLATED, 3),
+                 revision=None,
+                 mtime=None)])
+    assert data.total_words == original + 10
+    data.refresh_from_db()
+    assert data.total_words == original + 10
+
+
+@pytest.mark.django_db
+def test_data_store_updater_unit_deltas_match_full(store0):
+    unit = store0.units.filter(state=TRANSLATED).first()
+    unit.state = FUZZY
+    unit.save()
+    unit.target = ""
+    unit.state = UNTRANSLATED
+    unit.save()
+    unit = store0.units.filter(state=UNTRANSLATED).first()
+    unit.source = "%s and some more words" % unit.source
+    unit.target = "Translated"
+    unit.state = TRANSLATED
+    unit.save()
+    unit = store0.units.filter(state=TRANSLATED).last()
+    unit.makeobsolete()
+    unit.save()
+    store0.addunit(store0.UnitClass(source="A new unit"), user=None)
+    data = store0.data
+    data.refresh_from_db()
+    expected = store0.data_tool.updater.get_store_data()
+    for k in ["total_words", "fuzzy_words", "translated_words",
+              "max_unit_revision", "max_unit_mtime"]:
+        assert getattr(data, k) == expected[k]
+    assert (
+        data.max_unit_revision
+        == store0.unit_set.aggregate(
+            revision=Max("revision"))["revision"])
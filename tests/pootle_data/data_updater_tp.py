@@ -295,3 +295,38 @@ def test_data_tp_checks(tp0):
     assert len(check_data) == len(checks)
     for (category, name), count in checks.items():
         assert (category, name, count) in check_data
+
+
+@pytest.mark.django_db
+def test_data_tp_updater_data_deltas(tp0):
+    WORDCOUNT_KEYS = ["total_words", "fuzzy_words", "translated_words"]
+    updater = tp0.data_tool.updater
+    original = {k: getattr(tp0.data, k) for k in WORDCOUNT_KEYS}
+    deltas = updater.get_data_deltas(
+        data_deltas=dict(
+            total_words=0,
+            translated_words=-3,
+            fuzzy_words=3,
+            max_unit_revision=tp0.data.max_unit_revision + 1,
+            max_unit_mtime=None))
+    assert deltas["total_words"] == 0
+    assert deltas["translated_words"] == -3
+    assert deltas["fuzzy_words"] == 3
+    assert deltas["max_unit_revision"] == tp0.data.max_unit_revision + 1
+    assert original == {k: getattr(tp0.data, k) for k in WORDCOUNT_KEYS}
+    assert updater.get_data_deltas() is None
+
+    # deltas sent from unit edits match a full aggregation
+    store = tp0.stores.first()
+    unit = store.units.filter(state=TRANSLATED).first()
+    unit.state = FUZZY
+    unit.save()
+    unit = store.units.filter(state=UNTRANSLATED).first()
+    unit.target = "Translated"
+    unit.state = TRANSLATED
+    unit.save()
+    data = tp0.data
+    data.refresh_from_db()
+    expected = updater.get_store_data()
+    for k in WORDCOUNT_KEYS + ["max_unit_revision", "max_unit_mtime"]:
+        assert getattr(data, k) == expected[k]
@@ -9,9 +9,12 @@
 
 import os
 import sys
+import time
 
 import pytest
 
+from mock import patch
+
 from django.core.exceptions import ValidationError
 from django.urls import resolve
 
@@ -267,3 +270,95 @@ def test_finder_lang_codes():
         "/path/to/<dir_path>/<language_code>.<ext>")
     match = finder.match("/path/to/foo/bar@baz.po")
     assert match[1]["language_code"] == "bar@baz"
+
+
+def _write_files(root, paths, age=60):
+    mtime = time.time() - age
+    for path in paths:
+        file_path = os.path.join(root, path)
+        if not os.path.exists(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with open(file_path, "w") as f:
+            f.write("")
+    for dir_path, dirs_, files_ in os.walk(root):
+        os.utime(dir_path, (mtime, mtime))
+
+
+@pytest.mark.xfail(sys.platform == 'win32',
+                   reason="path mangling broken on windows")
+def test_finder_match_dir():
+    finder = TranslationFileFinder(
+        "/path/to/<language_code>/LC_MESSAGES/<filename>.<ext>")
+    assert finder.match_dir("/path/to/en")
+    assert finder.match_dir("/path/to/en/LC_MESSAGES")
+    assert not finder.match_dir("/path/to/en/images")
+    assert not finder.match_dir("/path/to/en/LC_MESSAGES/foo")
+    finder = TranslationFileFinder(
+        "/path/to/po-<filename>/<language_code>.<ext>")
+    assert finder.match_dir("/path/to/po-foo")
+    assert not finder.match_dir("/path/to/foo")
+    assert not finder.match_dir("/path/to/po-foo/bar")
+    finder = TranslationFileFinder(
+        "/path/to/<language_code><dir_path>/<filename>.<ext>")
+    assert finder.dir_regexes == [None]
+    assert finder.match_dir("/path/to/foo/bar/baz")
+
+
+@pytest.mark.xfail(sys.platform == 'win32',
+                   reason="path mangling broken on windows")
+def test_finder_find_pruned(tmpdir):
+    root = str(tmpdir)
+    _write_files(
+        root,
+        ["po-foo/en.po",
+         "po-foo/sub/fr.po",
+         "vendor/po-bar/en.po",
+         "images/en.po"])
+    finder = TranslationFileFinder(
+        os.path.join(root, "po-<filename>/<language_code>.<ext>"))
+    walked = []
+
+    def _match_dir(dir_path):
+        walked.append(dir_path)
+        return TranslationFileFinder.match_dir(finder, dir_path)
+
+    with patch.object(finder, "match_dir", side_effect=_match_dir):
+        found = sorted(path for path, matched in finder.find())
+    assert found == [os.path.join(root, "po-foo/en.po")]
+    # directories that cannot contain matches are not walked into
+    assert sorted(walked) == [
+        os.path.join(root, path)
+        for path
+        in ["images", "po-foo", "po-foo/sub", "vendor"]]
+
+
+@pytest.mark.xfail(sys.platform == 'win32',
+                   reason="path mangling broken on windows")
+def test_finder_find_cached(tmpdir):
+    root = str(tmpdir)
+    _write_files(root, ["po/en.po", "po/fr.po"])
+    finder = TranslationFileFinder(
+        os.path.join(root, "po/<language_code>.<ext>"))
+    expected = sorted(finder.find())
+    assert [path for path, matched in expected] == [
+        os.path.join(root, "po/en.po"),
+        os.path.join(root, "po/fr.po")]
+
+    # unchanged directories are not walked again
+    finder = TranslationFileFinder(
+        os.path.join(root, "po/<language_code>.<ext>"))
+    with patch("pootle_fs.finder.scandir.scandir") as scandir_mock:
+        assert sorted(finder.find()) == expected
+        assert not scandir_mock.called
+
+    # changing file contents does not change the directory
+    with open(os.path.join(root, "po/en.po"), "w") as f:
+        f.write("CHANGED")
+    assert sorted(finder.find()) == expected
+
+    # adding files does
+    _write_files(root, ["po/de.po"], age=30)
+    assert (
+        sorted(path for path, matched in finder.find())
+        == [os.path.join(root, "po/de.po")] + [
+            path for path, matched in expected])
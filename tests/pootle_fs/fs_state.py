@@ -8,6 +8,7 @@
 # AUTHORS file for copyright and authorship information.
 
 import sys
+import uuid
 from copy import copy
 
 import pytest
@@ -15,9 +16,11 @@ import pytest
 from pytest_pootle.factories import ProjectDBFactory
 from pytest_pootle.fixtures.pootle_fs.state import DummyPlugin
 
+from pootle.core.delegate import revision
 from pootle_fs.models import StoreFS
 from pootle_fs.resources import FSProjectStateResources
-from pootle_fs.state import FS_STATE, ProjectFSState
+from pootle_fs.state import FS_STATE, ProjectFSState, ProjectFSStateCache
+from pootle_project.models import Project
 from pootle_store.constants import POOTLE_WINS, SOURCE_WINS
 
 
@@ -334,3 +337,72 @@ def test_fs_state_fs_unchanged(fs_path_qs, no_complex_po_, dummyfs):
     StoreFS.objects.filter(pk__in=stores_fs).update(staged_for_removal=True)
     state = UnchangedFSState(plugin, fs_path=fs_path, pootle_path=pootle_path)
     assert len(list(state.state_unchanged)) == 0
+
+
+def _state_paths(state):
+    return {
+        k: [(item.pootle_path, item.fs_path, item.store_fs)
+            for item in state[k]]
+        for k in state.states}
+
+
+
+def _fetched(plugin):
+    # files changed on the filesystem are found once they are fetched
+    revision.get(Project)(plugin.project).set(
+        keys=["pootle.fs.fs_hash"], value=uuid.uuid4().hex)
+    plugin.reload()
+
+
+def _changed_paths(plugin):
+    state_cache = ProjectFSStateCache(plugin)
+    return state_cache.get_changed_paths(state_cache.get())
+
+
+@pytest.mark.django_db
+@pytest.mark.xfail(
+    sys.platform == 'win32',
+    reason="path mangling broken on windows")
+def test_fs_state_incremental(localfs_pootle_staged_real):
+    plugin = localfs_pootle_staged_real
+    plugin.sync()
+    _fetched(plugin)
+    plugin.project.config["pootle_fs.incremental_state"] = True
+    ProjectFSStateCache(plugin).clear()
+    assert not ProjectFSState(plugin, pootle_path="/*").incremental
+
+    state = ProjectFSState(plugin)
+    assert state.incremental
+    assert _changed_paths(plugin) == set()
+    assert _state_paths(ProjectFSState(plugin)) == _state_paths(state)
+
+    # change a unit in pootle
+    store_fs = plugin.resources.tracked.select_related("store").first()
+    unit = store_fs.store.units.first()
+    unit.target = "CHANGED TARGET"
+    unit.save()
+    changed = _changed_paths(plugin)
+    assert changed == set([store_fs.pootle_path])
+    state = ProjectFSState(plugin)
+    assert state["pootle_ahead"]
+    plugin.project.config["pootle_fs.incremental_state"] = False
+    assert _state_paths(state) == _state_paths(ProjectFSState(plugin))
+    plugin.project.config["pootle_fs.incremental_state"] = True
+
+    # change a file in the filesystem
+    other_fs = plugin.resources.tracked.exclude(pk=store_fs.pk).first()
+    with open(other_fs.file.file_path, "a") as f:
+        f.write("\n")
+    _fetched(plugin)
+    changed = _changed_paths(plugin)
+    assert changed == set([other_fs.pootle_path])
+    state = ProjectFSState(plugin)
+    assert state["fs_ahead"]
+    plugin.project.config["pootle_fs.incremental_state"] = False
+    assert _state_paths(state) == _state_paths(ProjectFSState(plugin))
+    plugin.project.config["pootle_fs.incremental_state"] = True
+
+    # syncing recalculates the whole state
+    plugin.sync()
+    assert _changed_paths(plugin) is None
+    ProjectFSStateCache(plugin).clear()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import os
+import time
+from hashlib import md5
+
+from mock import patch
+
+from pootle_fs.manifest import (
+    FSFileManifest, get_file_digest, get_mtime_hash)
+
+
+class DummyProject(object):
+    code = "manifest_project"
+
+    def __init__(self, local_fs_path):
+        self.local_fs_path = local_fs_path
+
+
+def _write_file(path, content, age=60):
+    with open(path, "w") as f:
+        f.write(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_fs_manifest_digest(tmpdir):
+    file_path = os.path.join(str(tmpdir), "example.po")
+    _write_file(file_path, "CONTENT")
+    assert get_file_digest(file_path) == md5("CONTENT").hexdigest()
+    assert get_mtime_hash(file_path) == str(os.stat(file_path).st_mtime)
+    assert get_mtime_hash(os.path.join(str(tmpdir), "missing.po")) is None
+
+
+def test_fs_manifest(tmpdir):
+    project = DummyProject(str(tmpdir))
+    file_path = os.path.join(str(tmpdir), "example.po")
+    _write_file(file_path, "CONTENT")
+    manifest = FSFileManifest(project)
+    manifest.clear()
+    digest = md5("CONTENT").hexdigest()
+    assert manifest.get_hash("/missing.po") is None
+    assert manifest.get_hash("/example.po") == digest
+    assert manifest.changed
+    manifest.save()
+    assert not manifest.changed
+
+    # unchanged files are not hashed again
+    manifest = FSFileManifest(project)
+    assert manifest.entries["/example.po"][2] == digest
+    with patch("pootle_fs.manifest.get_file_digest") as digest_mock:
+        assert manifest.get_hash("/example.po") == digest
+        assert not digest_mock.called
+    assert not manifest.changed
+
+    # touched files are hashed again but keep their digest
+    _write_file(file_path, "CONTENT", age=30)
+    assert manifest.get_hash("/example.po") == digest
+    assert manifest.changed
+    assert manifest.is_synced("/example.po", digest)
+    assert manifest.is_synced("/example.po", get_mtime_hash(file_path))
+    assert not manifest.is_synced("/example.po", "FOO")
+    manifest.save()
+
+    # recently modified files are not recorded
+    _write_file(file_path, "CHANGED", age=0)
+    assert manifest.get_hash("/example.po") == md5("CHANGED").hexdigest()
+    assert "/example.po" not in manifest.entries
+
+    os.unlink(file_path)
+    assert manifest.get_hash("/example.po") is None
+    assert manifest.is_synced("/example.po", None)
+    manifest.clear()
+    assert FSFileManifest(project).entries == {}
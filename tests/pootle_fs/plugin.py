@@ -10,6 +10,7 @@ import os
 import sys
 
 import pytest
+from mock import patch
 
 from pootle.core.delegate import revision
 from pootle.core.response import Response
@@ -350,6 +351,154 @@ def test_fs_plugin_localfs_push(localfs_pootle_staged_real):
                 assert src.read() == target.read()
 
 
+@pytest.mark.django_db
+@pytest.mark.xfail(
+    sys.platform == 'win32',
+    reason="path mangling broken on windows")
+def test_fs_plugin_localfs_sync_workers(localfs_pootle_staged_real,
+                                        inline_pool):
+    plugin = localfs_pootle_staged_real
+    with patch("pootle_fs.plugin.get_pool") as pool_mock:
+        pool_mock.return_value = inline_pool
+        response = plugin.sync(workers=2)
+    pushed = response["pushed_to_fs"]
+    assert len(pushed) == plugin.resources.tracked.count() > 1
+    assert (
+        [item.pootle_path for item in pushed]
+        == [fs_state.pootle_path
+            for fs_state
+            in sorted(pushed, key=lambda item: item.pootle_path)])
+    for response_item in pushed:
+        pushed_fs = response_item.store_fs
+        assert pushed_fs.last_sync_hash == pushed_fs.file.latest_hash
+        assert (
+            pushed_fs.last_sync_revision
+            == pushed_fs.store.data.max_unit_revision)
+
+    # stores synced in workers give the same results in the same order
+    stores = [
+        (tracked, {})
+        for tracked
+        in plugin.resources.tracked.order_by("-pootle_path")]
+    with patch("pootle_fs.plugin.get_pool") as pool_mock:
+        pool_mock.return_value = inline_pool
+        synced = plugin.sync_stores("pull_store", stores, workers=2)
+    assert synced == plugin.sync_stores("pull_store", stores)
+    assert (
+        [synced_fs for synced_fs, result in synced]
+        == [tracked for tracked, kwargs in stores])
+    for store_fs, result in synced:
+        assert result == dict(
+            file_hash=store_fs.file.latest_hash,
+            pootle_revision=store_fs.store.data.max_unit_revision)
+
+
+def _change_fs_files(plugin):
+    """Changes the translations in the files of a synced plugin, and returns
+    a new plugin for the project with its stores ahead in FS
+    """
+    plugin.sync()
+    for store_fs in plugin.resources.tracked:
+        disk_store = store_fs.file.deserialize()
+        for unit in disk_store.units:
+            if unit.istranslatable():
+                unit.target = "%s CHANGED" % unit.source
+        file_paths = [
+            store_fs.file.file_path,
+            os.path.join(plugin.fs_url, store_fs.path[1:])]
+        for file_path in file_paths:
+            with open(file_path, "w") as f:
+                f.write(str(disk_store))
+    revision.get(Project)(plugin.project).set(
+        keys=["pootle.fs.fs_hash"], value="FS_CHANGED")
+    # the plugin caches the files it finds
+    plugin = FSPlugin(plugin.project)
+    state = plugin.state()
+    assert len(state["fs_ahead"]) == plugin.resources.tracked.count()
+    return plugin
+
+
+@pytest.mark.django_db
+@pytest.mark.xfail(
+    sys.platform == 'win32',
+    reason="path mangling broken on windows")
+@pytest.mark.parametrize("workers", [None, 2])
+def test_fs_plugin_localfs_pull_batch(localfs_pootle_staged_real,
+                                      inline_pool, workers):
+    from pootle_translationproject import contextmanagers
+
+    plugin = _change_fs_files(localfs_pootle_staged_real)
+    callback = contextmanagers._callback_handler
+    with patch("pootle_translationproject.contextmanagers._callback_handler",
+               wraps=callback) as callback_mock:
+        with patch("pootle_fs.plugin.get_pool") as pool_mock:
+            pool_mock.return_value = inline_pool
+            response = plugin.sync(workers=workers)
+    pulled = response["pulled_to_pootle"]
+    assert len(pulled) == plugin.resources.tracked.count() > 1
+    # the data is updated once for each tp
+    tps = set(
+        response_item.store_fs.store.translation_project
+        for response_item
+        in pulled)
+    assert len(tps) < len(pulled)
+    assert (
+        sorted(call[0][0].pk for call in callback_mock.call_args_list)
+        == sorted(tp.pk for tp in tps))
+    for response_item in pulled:
+        store_fs = response_item.store_fs
+        store_fs.refresh_from_db()
+        store = store_fs.store
+        store_data = store.data_tool.updater.get_store_data()
+        for k in ["total_words", "translated_words", "max_unit_revision"]:
+            assert getattr(store.data, k) == store_data[k]
+        assert (
+            store_fs.last_sync_revision
+            == store.data.max_unit_revision
+            == store.get_max_unit_revision())
+
+
+@pytest.mark.django_db
+@pytest.mark.xfail(
+    sys.platform == 'win32',
+    reason="path mangling broken on windows")
+def test_fs_plugin_localfs_pull_workers_error(localfs_pootle_staged_real,
+                                              inline_pool):
+    plugin = _change_fs_files(localfs_pootle_staged_real)
+    stores = [
+        (tracked, {})
+        for tracked
+        in plugin.resources.tracked.select_related(
+            "store", "store__data").order_by("pootle_path")]
+    failing = stores[-1][0]
+    pull_store = Plugin.pull_store
+
+    def _pull_store(self, store_fs):
+        if store_fs.id == failing.id:
+            raise ValueError
+        return pull_store(self, store_fs)
+
+    with patch("pootle_fs.plugin.Plugin.pull_store", _pull_store):
+        with patch("pootle_fs.plugin.get_pool") as pool_mock:
+            pool_mock.return_value = inline_pool
+            with pytest.raises(ValueError):
+                plugin.sync_stores("pull_store", stores, workers=2)
+
+    # the stores synced before the error have their sync recorded, and
+    # their data updated
+    for store_fs, kwargs in stores[:-1]:
+        store_fs = StoreFS.objects.get(pk=store_fs.pk)
+        store = store_fs.store
+        assert store_fs.last_sync_hash == store_fs.file.latest_hash
+        assert (
+            store_fs.last_sync_revision
+            == store.data.max_unit_revision
+            == store.get_max_unit_revision())
+    store_fs = StoreFS.objects.get(pk=failing.pk)
+    assert store_fs.last_sync_hash == failing.last_sync_hash
+    assert store_fs.last_sync_hash != store_fs.file.latest_hash
+
+
 @pytest.mark.django_db
 def test_fs_plugin_cache_key(project_fs):
     plugin = project_fs
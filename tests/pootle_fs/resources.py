@@ -8,12 +8,15 @@
 # AUTHORS file for copyright and authorship information.
 
 from fnmatch import fnmatch
+import os
 import sys
+import uuid
 
 import pytest
 
 from django.utils.functional import cached_property
 
+from pootle.core.delegate import revision
 from pootle_fs.apps import PootleFSConfig
 from pootle_fs.models import StoreFS
 from pootle_fs.resources import (
@@ -406,3 +409,46 @@ def test_fs_resources_cache_key(project_fs):
     assert (
         resources.cache_key
         == resources.context.cache_key)
+
+
+def _fetched(plugin):
+    # files changed on the filesystem are found once they are fetched
+    revision.get(Project)(plugin.project).set(
+        keys=["pootle.fs.fs_hash"], value=uuid.uuid4().hex)
+    plugin.reload()
+
+
+@pytest.mark.django_db
+@pytest.mark.xfail(
+    sys.platform == 'win32',
+    reason="path mangling broken on windows")
+def test_fs_state_resources_touched(localfs_pootle_staged_real):
+    plugin = localfs_pootle_staged_real
+    plugin.sync()
+    _fetched(plugin)
+    resources = FSProjectStateResources(plugin)
+    assert resources.fs_changed == []
+    synced = list(resources.synced)
+    assert synced
+    for store_fs in synced:
+        assert (
+            resources.file_hashes[store_fs.pootle_path]
+            == store_fs.last_sync_hash
+            == store_fs.file.latest_hash)
+        # touching files does not change them
+        os.utime(store_fs.file.file_path, None)
+    _fetched(plugin)
+    assert FSProjectStateResources(plugin).fs_changed == []
+
+    # files synced with mtime hashes are also unchanged
+    for store_fs in synced:
+        store_fs.last_sync_hash = str(
+            os.stat(store_fs.file.file_path).st_mtime)
+        store_fs.save()
+    assert FSProjectStateResources(plugin).fs_changed == []
+
+    changed = synced[0]
+    with open(changed.file.file_path, "a") as f:
+        f.write("\n")
+    _fetched(plugin)
+    assert FSProjectStateResources(plugin).fs_changed == [changed.pk]
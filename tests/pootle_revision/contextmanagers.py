@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+import pytest
+
+from mock import patch
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from pootle.core.delegate import revision, revision_updater
+from pootle.core.signals import update_revisions
+from pootle_app.models import Directory
+from pootle_revision.contextmanagers import (
+    coalesce_revisions, get_coalesced_stats)
+from pootle.middleware.revisions import CoalesceRevisionsMiddleware
+from pootle_revision.utils import RevisionUpdater
+from pootle_store.contextmanagers import update_store_after
+from pootle_store.models import Store
+
+
+def _get_revisions(parents, key):
+    revisions = revision.get(Directory)
+    return {
+        parent.pootle_path: revisions(parent).get(key=key)
+        for parent in parents}
+
+
+@pytest.mark.django_db
+def test_revision_coalesce_revisions(tp0):
+    stores = list(tp0.stores.all())
+    parents = list(
+        revision_updater.get(Store)(object_list=tp0.stores.all()).parents)
+    assert len(stores) > 1
+    before = _get_revisions(parents, "stats")
+    stats = get_coalesced_stats()
+    updated = []
+    _update = RevisionUpdater.update
+
+    def _update_revisions(updater, keys=None):
+        updated.append(keys)
+        return _update(updater, keys=keys)
+
+    with patch.object(RevisionUpdater, "update", _update_revisions):
+        with coalesce_revisions():
+            for store in stores:
+                update_revisions.send(
+                    Store, instance=store, keys=["stats"])
+            with coalesce_revisions():
+                update_revisions.send(
+                    Directory, instance=tp0.directory, keys=["stats"])
+            update_revisions.send(
+                Directory,
+                paths=[stores[0].parent.pootle_path],
+                keys=["checks"])
+            # revisions are not updated until leaving the context
+            assert not updated
+            assert _get_revisions(parents, "stats") == before
+    assert sorted(updated) == [["checks"], ["stats"]]
+    after = _get_revisions(parents, "stats")
+    for parent in parents:
+        assert after[parent.pootle_path] != before[parent.pootle_path]
+    assert len(set(after.values())) == 1
+    new_stats = get_coalesced_stats()
+    requested = new_stats["requested"] - stats["requested"]
+    written = new_stats["written"] - stats["written"]
+    assert written < requested
+
+
+@pytest.mark.django_db
+def test_revision_coalesce_revisions_project(project0):
+    updater = revision_updater.get(project0.__class__)(context=project0)
+    before = _get_revisions(updater.parents, "stats")
+    with coalesce_revisions():
+        update_revisions.send(
+            project0.__class__, instance=project0, keys=["stats"])
+        update_revisions.send(
+            project0.__class__, instance=project0, keys=["stats"])
+        assert _get_revisions(updater.parents, "stats") == before
+    after = _get_revisions(updater.parents, "stats")
+    for parent in updater.parents:
+        assert after[parent.pootle_path] != before[parent.pootle_path]
+
+
+@pytest.mark.django_db
+def test_revision_coalesce_revisions_request(tp0, member):
+    stores = list(tp0.stores.all())
+    parents = list(
+        revision_updater.get(Store)(object_list=tp0.stores.all()).parents)
+    before = _get_revisions(parents, "stats")
+    updated = []
+    _update = RevisionUpdater.update
+
+    def _update_revisions(updater, keys=None):
+        updated.append(keys)
+        return _update(updater, keys=keys)
+
+    def _get_response(request):
+        assert connection.in_atomic_block
+        for store in stores:
+            with update_store_after(store):
+                update_revisions.send(
+                    Store, instance=store, keys=["stats"])
+                unit = store.units.first()
+                unit.target = "Coalesced %s" % store.pk
+                unit.save(user=member)
+        # revisions are not updated until the request has been handled
+        assert not updated
+        assert _get_revisions(parents, "stats") == before
+        return HttpResponse()
+
+    middleware = CoalesceRevisionsMiddleware(_get_response)
+    with patch.object(RevisionUpdater, "update", _update_revisions):
+        middleware(RequestFactory().post("/"))
+    # each revision is updated once for all of the stores
+    assert sorted(updated) == [["stats", "checks"]]
+    after = _get_revisions(parents, "stats")
+    for parent in parents:
+        assert after[parent.pootle_path] != before[parent.pootle_path]
+
+    # safe requests are not coalesced
+    updated = []
+
+    def _get_safe_response(request):
+        update_revisions.send(
+            Store, instance=stores[0], keys=["stats"])
+        assert updated == [["stats"]]
+        return HttpResponse()
+
+    middleware = CoalesceRevisionsMiddleware(_get_safe_response)
+    with patch.object(RevisionUpdater, "update", _update_revisions):
+        middleware(RequestFactory().get("/"))
@@ -8,10 +8,13 @@
 
 import pytest
 
+from mock import patch
+
 from pootle.core.delegate import revision, revision_updater
 from pootle_app.models import Directory
-from pootle_revision.utils import UnitRevisionUpdater
+from pootle_revision.utils import UnitRevisionUpdater, directory_index
 from pootle_store.models import Store, Unit
+from pootle_translationproject.models import TranslationProject
 
 
 def _test_revision_updater(updater):
@@ -120,3 +123,59 @@ def test_revision_directory_updater_update():
     updater = updater_class(
         object_list=Directory.objects.filter(name="subdir0"))
     _test_revision_updater(updater)
+
+
+@pytest.mark.django_db
+def test_revision_directory_index(subdir0):
+    paths = [subdir0.pootle_path, subdir0.parent.pootle_path, "/no/such/"]
+    assert (
+        directory_index.get_ids(paths)
+        == [subdir0.id, subdir0.parent.id])
+    # known paths are not looked up again
+    with patch("pootle_revision.utils.Directory") as dir_mock:
+        assert (
+            directory_index.get_ids(paths[:2])
+            == [subdir0.id, subdir0.parent.id])
+        assert not dir_mock.objects.filter.called
+
+    # adding and removing directories clears the index
+    new_dir = subdir0.get_or_make_subdir("new_subdir")
+    assert directory_index.get_ids([new_dir.pootle_path]) == [new_dir.id]
+    new_dir.delete()
+    assert directory_index.get_ids([new_dir.pootle_path]) == []
+
+
+@pytest.mark.django_db
+def test_revision_directory_index_languages(project0, language1):
+    languages = set(
+        project0.translationproject_set.values_list(
+            "language__code", flat=True))
+    assert directory_index.get_languages([project0.code]) == languages
+    updater = revision_updater.get(project0.__class__)(project0)
+    assert (
+        updater.get_parent_paths([project0.pootle_path])
+        == set(["/projects/", project0.pootle_path]
+               + ["/%s/" % code for code in languages]))
+    with patch("pootle_revision.utils.TranslationProject") as tp_mock:
+        assert directory_index.get_languages([project0.code]) == languages
+        assert not tp_mock.objects.filter.called
+    tp = TranslationProject.objects.get(
+        project=project0, language=language1)
+    tp.delete()
+    assert (
+        directory_index.get_languages([project0.code])
+        == languages - set([language1.code]))
+
+
+@pytest.mark.django_db
+def test_revision_directory_index_commit(subdir0):
+    on_commit = "pootle_revision.receivers.transaction.on_commit"
+    with patch(on_commit) as on_commit_mock:
+        new_dir = subdir0.get_or_make_subdir("new_subdir")
+    assert on_commit_mock.call_count == 1
+    # another process fills the index before the directory is committed
+    directory_index.ids[new_dir.pootle_path] = None
+    directory_index.check()
+    assert new_dir.pootle_path in directory_index.ids
+    on_commit_mock.call_args[0][0]()
+    assert directory_index.get_ids([new_dir.pootle_path]) == [new_dir.id]
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Pootle contributors.
+#
+# This file is a part of the Pootle project. It is distributed under the GPL3
+# or later license. See the LICENSE file for a copy of the license and the
+# AUTHORS file for copyright and authorship information.
+
+from contextlib import contextmanager
+
+from mock import patch
+
+import pytest
+
+from django.db.models import Sum
+
+from pootle.core.delegate import scores
+from pootle.core.signals import update
+from pootle.core.utils.timezone import localdate
+from pootle_project.models import ProjectSet
+from pootle_score.leaderboard import (
+    Leaderboard, clear_leaderboards, get_leaderboards)
+from pootle_score.models import UserTPScore
+from pootle_store.constants import UNTRANSLATED
+
+
+@contextmanager
+def _committed():
+    callbacks = []
+    on_commit = "pootle_score.leaderboard.transaction.on_commit"
+    with patch(on_commit, side_effect=callbacks.append):
+        yield callbacks
+    for callback in callbacks:
+        callback()
+
+
+def _get_ranking(score_data):
+    ranking = score_data.get_scores(30).values("user").annotate(
+        Sum("score")).filter(score__sum__gt=0)
+    return sorted(
+        (ranked["user"], round(ranked["score__sum"], 2))
+        for ranked
+        in ranking)
+
+
+def _test_leaderboard(score_data):
+    leaderboard = score_data.leaderboard
+    expected = _get_ranking(score_data)
+    ranking = leaderboard.get_ranking()
+    assert (
+        sorted((user, round(score, 2)) for user, score in ranking)
+        == expected)
+    assert (
+        [round(score, 2) for user, score in ranking]
+        == sorted((score for user, score in expected), reverse=True))
+    assert leaderboard.count() == len(expected)
+    for i, (user, score) in enumerate(ranking):
+        assert leaderboard.rank(user) == i
+    assert (
+        leaderboard.get_ranking(offset=1, limit=1)
+        == ranking[1:2])
+    assert (
+        [scorer["user__username"] for scorer in score_data.top_scorers]
+        == [scorer["user__username"]
+            for scorer
+            in score_data.get_ranked_scorers()])
+    assert score_data.top_scorer_count == len(expected)
+
+
+@pytest.mark.django_db
+def test_leaderboard_contexts(tp0):
+    leaderboards = get_leaderboards(tp0)
+    assert all(isinstance(x, Leaderboard) for x in leaderboards)
+    assert (
+        [leaderboard.scores.leaderboard_key for leaderboard in leaderboards]
+        == ["tp.%s" % tp0.id,
+            "language.%s" % tp0.language.id,
+            "project.%s" % tp0.project.id,
+            "projects"])
+    for leaderboard in leaderboards:
+        _test_leaderboard(leaderboard.scores)
+    assert scores.get(ProjectSet)(None).leaderboard.key == leaderboards[-1].key
+
+
+@pytest.mark.django_db
+def test_leaderboard_rank_unscored(tp0, system):
+    leaderboard = scores.get(tp0.__class__)(tp0).leaderboard
+    assert leaderboard.rank(system.id) is None
+
+
+@pytest.mark.django_db
+def test_leaderboard_update(tp0, member):
+    leaderboards = get_leaderboards(tp0)
+    for leaderboard in leaderboards:
+        leaderboard.build()
+    tp_score = UserTPScore.objects.filter(
+        tp=tp0, user=member, date=localdate()).first()
+    assert tp_score
+    rankings = [leaderboard.get_ranking() for leaderboard in leaderboards]
+    with _committed() as callbacks:
+        update.send(
+            UserTPScore,
+            updates={tp_score.id: dict(score=tp_score.score + 1000)})
+        # the leaderboards are not updated until the scores are committed
+        assert callbacks
+        assert (
+            [leaderboard.get_ranking() for leaderboard in leaderboards]
+            == rankings)
+    for leaderboard in leaderboards:
+        _test_leaderboard(leaderboard.scores)
+        assert leaderboard.rank(member.id) == 0
+
+
+@pytest.mark.django_db
+def test_leaderboard_update_unit_change(store0, member):
+    tp = store0.translation_project
+    leaderboards = get_leaderboards(tp)
+    for leaderboard in leaderboards:
+        leaderboard.build()
+    unit = store0.units.filter(state=UNTRANSLATED).first()
+    with _committed():
+        unit.target = "Ranked"
+        unit.save(user=member)
+    for leaderboard in leaderboards:
+        _test_leaderboard(leaderboard.scores)
+
+
+@pytest.mark.django_db
+def test_leaderboard_new_day(tp0):
+    leaderboard = scores.get(tp0.__class__)(tp0).leaderboard
+    leaderboard.build()
+    ranking = leaderboard.get_ranking()
+    assert ranking
+    # a new ranking is built from the day buckets that are already built
+    leaderboard.redis.delete(leaderboard.ranking_key)
+    get_day_scores = (
+        "pootle_score.leaderboard.Leaderboard.get_day_scores")
+    with patch(get_day_scores) as scores_mock:
+        assert leaderboard.get_ranking() == ranking
+        assert not scores_mock.called
+
+
+@pytest.mark.django_db
+def test_leaderboard_clear(tp0):
+    leaderboard = scores.get(tp0.__class__)(tp0).leaderboard
+    leaderboard.build()
+    assert leaderboard.redis.exists(leaderboard.ranking_key)
+    with _committed() as callbacks:
+        clear_leaderboards()
+        assert not leaderboard.redis.exists(leaderboard.ranking_key)
+        # rebuilt by another process before the commit
+        leaderboard.build()
+    assert len(callbacks) == 1
+    assert not leaderboard.redis.exists(leaderboard.ranking_key)
+    assert not leaderboard.redis.keys("%s.*" % Leaderboard.ns)
@@ -14,16 +14,19 @@ import pytest
 
 from django.db.models import Sum
 
-from pootle.core.delegate import event_score, score_updater
+from pootle.core.delegate import (
+    event_score, review, score_accumulator, score_updater)
 from pootle.core.plugin import provider
 from pootle.core.plugin.results import GatheredDict
 from pootle.core.utils.timezone import localdate
 from pootle_log.utils import LogEvent, StoreLog
-from pootle_score.models import UserStoreScore
+from pootle_score.models import UserStoreScore, UserTPScore
 from pootle_score.updater import (
-    StoreScoreUpdater, TPScoreUpdater, UserScoreUpdater)
+    ScoreAccumulator, StoreScoreUpdater, TPScoreUpdater, UserScoreUpdater)
 from pootle_score.utils import to_datetime
-from pootle_store.models import Store
+from pootle_statistics.models import Submission
+from pootle_store.constants import UNTRANSLATED
+from pootle_store.models import Store, Suggestion, Unit
 from pootle_translationproject.models import TranslationProject
 
 
@@ -386,3 +389,147 @@ def test_score_tp_updater_clear_users(tp0, admin, member):
     assert (
         round(member.score, 2)
         == round(member_score - member_tp_score, 2))
+
+
+def _get_score(model, **kwargs):
+    score = model.objects.filter(date=localdate(), **kwargs).values(
+        "score", "translated", "reviewed", "suggested").first()
+    return score or dict(score=0, translated=0, reviewed=0, suggested=0)
+
+
+@pytest.mark.django_db
+def test_score_accumulator_unit_change(store0, member, system):
+    tp = store0.translation_project
+    assert score_accumulator.get(Submission) is ScoreAccumulator
+    assert score_accumulator.get(Suggestion) is ScoreAccumulator
+    unit = store0.units.filter(state=UNTRANSLATED).first()
+    original_store_score = _get_score(
+        UserStoreScore, store=store0, user=member)
+    original_tp_score = _get_score(
+        UserTPScore, tp=tp, user=member)
+
+    unit.target = "Accumulated"
+    unit.save(user=member)
+    store_score = _get_score(UserStoreScore, store=store0, user=member)
+    tp_score = _get_score(UserTPScore, tp=tp, user=member)
+    wordcount = unit.unit_source.source_wordcount
+    assert (
+        store_score["translated"]
+        == original_store_score["translated"] + wordcount)
+    assert (
+        tp_score["translated"]
+        == original_tp_score["translated"] + wordcount)
+    assert store_score["score"] > original_store_score["score"]
+    assert (
+        round(tp_score["score"] - original_tp_score["score"], 2)
+        == round(store_score["score"] - original_store_score["score"], 2))
+
+    # the accumulated scores match the scores calculated from the events
+    calculated = StoreScoreUpdater(store0).calculate(
+        users=[member.id],
+        start=localdate(),
+        end=localdate() + timedelta(days=1))[localdate()][member.id]
+    for k in ["score", "translated", "reviewed", "suggested"]:
+        assert (
+            round(calculated.get(k, 0), 2)
+            == round(store_score[k], 2))
+
+    # user score is the sum of the last 30 days of tp scores
+    member.refresh_from_db()
+    assert (
+        round(member.score, 2)
+        == round(
+            member.scores.filter(
+                date__gte=localdate() - timedelta(days=30)).aggregate(
+                    score=Sum("score"))["score"],
+            2))
+
+    # meta users are not scored
+    unit = store0.units.filter(state=UNTRANSLATED).first()
+    unit.target = "Accumulated by system"
+    unit.save(user=system)
+    assert not UserStoreScore.objects.filter(user=system).exists()
+
+
+@pytest.mark.django_db
+def test_score_accumulator_suggestion(store0, member, member2):
+    tp = store0.translation_project
+    unit = store0.units.filter(state=UNTRANSLATED).first()
+    wordcount = unit.unit_source.source_wordcount
+    original_suggested = _get_score(
+        UserTPScore, tp=tp, user=member)["suggested"]
+    original_reviewed = _get_score(
+        UserTPScore, tp=tp, user=member2)["reviewed"]
+    suggestion, created = review.get(Suggestion)().add(
+        unit, "Accumulated suggestion", user=member)
+    assert created
+    review.get(Suggestion)([suggestion], member2).reject()
+    assert (
+        _get_score(UserTPScore, tp=tp, user=member)["suggested"]
+        == original_suggested + wordcount)
+    assert (
+        _get_score(UserTPScore, tp=tp, user=member2)["reviewed"]
+        == original_reviewed + wordcount)
+
+    # saving a reviewed suggestion again doesnt add to the score
+    suggestion.save()
+    assert (
+        _get_score(UserTPScore, tp=tp, user=member2)["reviewed"]
+        == original_reviewed + wordcount)
+
+
+@pytest.mark.django_db
+def test_score_accumulator_update_store_after(store0, member):
+    from pootle_store.contextmanagers import update_store_after
+    from pootle_translationproject.contextmanagers import update_tps_after
+
+    tp = store0.translation_project
+    original_translated = _get_score(
+        UserTPScore, tp=tp, user=member)["translated"]
+    tp_units = list(
+        Unit.objects.filter(
+            store__translation_project=tp,
+            state=UNTRANSLATED).exclude(store=store0)[:2])
+    units = list(store0.units.filter(state=UNTRANSLATED)[:2])
+    assert len(units) == len(tp_units) == 2
+    add_submissions = ScoreAccumulator.add_submissions
+    with patch.object(ScoreAccumulator, "add_submissions",
+                      autospec=True,
+                      side_effect=add_submissions) as add_mock:
+        with update_store_after(store0):
+            for unit in units:
+                unit.target = "Accumulated later"
+                unit.save(user=member)
+            assert not add_mock.called
+            assert (
+                _get_score(UserTPScore, tp=tp, user=member)["translated"]
+                == original_translated)
+    # the scores are added for all of the submissions together
+    assert add_mock.call_count == 1
+    submissions = list(add_mock.call_args[0][1])
+    assert (
+        set(sub.unit_id for sub in submissions)
+        == set(unit.id for unit in units))
+    translated = (
+        original_translated
+        + sum(unit.unit_source.source_wordcount for unit in units))
+    assert (
+        _get_score(UserTPScore, tp=tp, user=member)["translated"]
+        == translated)
+
+    # stores updated in update_tps_after
+    units = tp_units
+    with patch.object(ScoreAccumulator, "add_submissions",
+                      autospec=True,
+                      side_effect=add_submissions) as add_mock:
+        with update_tps_after():
+            for unit in units:
+                with update_store_after(unit.store):
+                    unit.target = "Accumulated later"
+                    unit.save(user=member)
+            assert not add_mock.called
+    assert add_mock.call_count == 1
+    assert (
+        _get_score(UserTPScore, tp=tp, user=member)["translated"]
+        == translated + sum(
+            unit.unit_source.source_wordcount for unit in units))
@@ -11,8 +11,9 @@ import re
 import pytest
 
 from pootle.core.delegate import (
-    stemmer, stopwords, terminology, terminology_matcher)
-from pootle_terminology.utils import UnitTerminology
+    stemmer, stopwords, terminology, terminology_matcher, text_comparison)
+from pootle_terminology.utils import (
+    TerminologyIndex, UnitTerminology, get_terminology_index)
 
 
 @pytest.mark.django_db
@@ -121,3 +122,51 @@ def test_terminology_matcher(store0, terminology0):
     assert (
         matcher.matches
         == matcher.similar(results))
+
+
+@pytest.mark.django_db
+def test_terminology_index(store0, terminology0):
+    unit = store0.units.first()
+    matcher = terminology_matcher.get(unit.__class__)(unit)
+    index = matcher.index
+    assert index is get_terminology_index(
+        terminology0.language_id, matcher.rev_cache_key)
+    assert index == TerminologyIndex(
+        terminology0.language_id, matcher.rev_cache_key).build()
+    units = matcher.terminology_units.order_by("id")
+    assert (
+        [term[0] for term in index["terms"]]
+        == list(units.values_list("id", flat=True)))
+    for position, (unit_id, target_pair, term) in enumerate(index["terms"]):
+        term_unit = units.get(id=unit_id)
+        comparison = text_comparison.get()(term_unit.source_f)
+        assert (
+            target_pair
+            == (term_unit.source_f.lower().strip(),
+                term_unit.target_f.lower().strip()))
+        assert term.text == term_unit.source_f
+        assert term.tokens == comparison.tokens
+        assert term.stems == comparison.stems
+        for stem in term.stems:
+            assert position in index["stems"][stem]
+    assert (
+        sum(len(positions) for positions in index["stems"].values())
+        == sum(len(term.stems) for _uid, _pair, term in index["terms"]))
+
+    # changing the terminology gives a new index
+    term_unit = units.first()
+    term_unit.source_f = "hatstand umbrella"
+    term_unit.save()
+    matcher = terminology_matcher.get(unit.__class__)(unit)
+    assert matcher.index is not index
+    assert matcher.index["stems"]["hatstand"] == [0]
+
+
+@pytest.mark.django_db
+def test_terminology_matcher_no_terminology(store0, terminology0):
+    unit = store0.units.first()
+    terminology0.project.code = "not_terminology"
+    terminology0.project.save()
+    matcher = terminology_matcher.get(unit.__class__)(unit)
+    assert matcher.index == dict(terms=[], stems={})
+    assert matcher.matches == []
@@ -6,11 +6,18 @@
 # or later license. See the LICENSE file for a copy of the license and the
 # AUTHORS file for copyright and authorship information.
 
+import pickle
+
 import pytest
+from mock import MagicMock, patch
 
 from pootle.core.delegate import review
-from pootle_store.models import Suggestion
-from pootle_translationproject.contextmanagers import update_tp_after
+from pootle_store.constants import TRANSLATED
+from pootle_score.updater import ScoreAccumulator
+from pootle_store.models import Store, Suggestion
+from pootle_translationproject.contextmanagers import (
+    defer_tps_updates, send_deferred_updates, update_tp_after,
+    update_tps_after)
 
 
 class CriticalCheckTest(object):
@@ -330,6 +337,101 @@ def test_contextmanager_update_tp_after_checks(tp0, store0, member,
                 user=member)
 
 
+@pytest.mark.django_db
+def test_contextmanager_update_tps_after(tp0, store0, member,
+                                         update_unit_test):
+    unit = store0.units.exclude(
+        qualitycheck__name="xmltags").first()
+    other_store = Store.objects.live().filter(
+        translation_project__project=tp0.project).exclude(
+            translation_project=tp0).filter(
+                unit__state__lt=TRANSLATED).first()
+    other_tp = other_store.translation_project
+    other_unit = other_store.units.filter(state__lt=TRANSLATED).first()
+    store_checks = store0.data.critical_checks
+    other_words = other_store.data.translated_words
+    other_tp_words = other_tp.data.translated_words
+
+    with update_unit_test(CriticalCheckTest(unit)):
+        with update_tps_after():
+            unit.target = "<bad></target>."
+            unit.save(user=member)
+            other_unit.target = "Translated"
+            other_unit.state = TRANSLATED
+            other_unit.save(user=member)
+            # updates are deferred until leaving the context
+            store0.data.refresh_from_db()
+            other_store.data.refresh_from_db()
+            assert store0.data.critical_checks == store_checks
+            assert other_store.data.translated_words == other_words
+
+    other_store.data.refresh_from_db()
+    other_tp.data.refresh_from_db()
+    assert other_store.data.translated_words > other_words
+    assert other_tp.data.translated_words > other_tp_words
+    assert (
+        other_store.data.max_unit_revision
+        == other_tp.data.max_unit_revision
+        == other_unit.revision)
+
+
+@pytest.mark.django_db
+def test_contextmanager_defer_tps_updates(store0, member):
+    unit = store0.units.filter(state__lt=TRANSLATED).first()
+    translated_words = store0.data.translated_words
+
+    with patch.object(ScoreAccumulator, "add_submissions",
+                      autospec=True) as add_mock:
+        with defer_tps_updates() as deferred:
+            unit.target = "Deferred"
+            unit.state = TRANSLATED
+            unit.save(user=member)
+    assert not add_mock.called
+    store0.data.refresh_from_db()
+    assert store0.data.translated_words == translated_words
+    assert deferred.data == set([store0.id])
+    assert deferred.checks == {store0.id: set([unit.id])}
+    assert set(sub.unit_id for sub in deferred.submissions) == set([unit.id])
+
+    # the deferred updates can be sent from another process
+    deferred = pickle.loads(pickle.dumps(deferred))
+    with patch.object(ScoreAccumulator, "add_submissions",
+                      autospec=True) as add_mock:
+        send_deferred_updates(deferred)
+    assert add_mock.call_count == 1
+    assert (
+        [sub.unit_id for sub in add_mock.call_args[0][1]]
+        == [sub.unit_id for sub in deferred.submissions])
+    store0.data.refresh_from_db()
+    unit.refresh_from_db()
+    assert store0.data.translated_words > translated_words
+    assert store0.data.max_unit_revision == unit.revision
+
+
+@pytest.mark.django_db
+def test_contextmanager_update_tps_after_error():
+    callback = MagicMock()
+
+    # in a transaction the updates are left to be rolled back
+    with pytest.raises(ValueError):
+        with update_tps_after(callback=callback):
+            raise ValueError
+    assert not callback.called
+
+    # otherwise the stores updated before the error are updated
+    connection_path = "pootle_translationproject.contextmanagers.connection"
+    with patch(connection_path) as connection_mock:
+        connection_mock.in_atomic_block = False
+        with pytest.raises(ValueError):
+            with update_tps_after(callback=callback):
+                raise ValueError
+    assert callback.call_count == 1
+
+    with update_tps_after(callback=callback):
+        pass
+    assert callback.call_count == 2
+
+
 @pytest.mark.django_db
 def test_contextmanager_update_tp_after_suggestion(tp0, store0, member,
                                                    update_unit_test):
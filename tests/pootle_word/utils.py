@@ -17,7 +17,7 @@ import translate
 import pytest
 
 from pootle.core.delegate import stemmer, stopwords, text_comparison
-from pootle_word.utils import TextComparison
+from pootle_word.utils import Stopwords, TextComparison, get_stem
 
 
 def test_stemmer():
@@ -77,3 +77,29 @@ def test_text_comparer():
              + comparer.tokens_present(other)
              + comparer.stems_present(other))
             / 4))
+
+
+def test_stopwords_frozen():
+    assert isinstance(stopwords.get().words, frozenset)
+    assert Stopwords().words is stopwords.get().words
+
+
+def test_stem_cache():
+    assert get_stem(stem, u"cycling") == stem(u"cycling")
+    hits = get_stem.cache_info().hits
+    assert get_stem(stem, u"cycling") == stem(u"cycling")
+    assert get_stem.cache_info().hits == hits + 1
+
+
+@pytest.mark.django_db
+def test_text_stemmer_stems_many():
+    texts = [
+        "Cycling through the examples",
+        "cycle home",
+        "",
+        "the"]
+    comparer = text_comparison.get()(texts[0])
+    assert (
+        comparer.get_stems_many(texts)
+        == [text_comparison.get()(text).stems for text in texts])
+    assert comparer.get_stems_many(texts)[2:] == [set(), set()]
@@ -19,6 +19,8 @@ from pootle_store.unit.filters import (
     FilterNotFound, UnitChecksFilter, UnitContributionFilter, UnitSearchFilter,
     UnitStateFilter, UnitTextSearch)
 from pootle_store.unit.search import DBSearchBackend
+from pootle_word.search import TrigramSearchBackend, UnitTrigramSearch
+from pootle_word.utils import StoreTrigrams, TextTrigrams, UnitTrigrams
 
 
 def _expected_text_search_words(text, case):
@@ -334,3 +336,104 @@ def test_unit_search_backend_custom():
     search_backend.connect(get_search_backend, sender=Unit)
 
     assert search_backend.get(Unit) is CustomSearchBackend
+
+
+@pytest.mark.django_db
+def test_unit_search_backend_trigram(settings):
+    settings.POOTLE_SEARCH_BACKEND = "pootle_word.search.TrigramSearchBackend"
+    assert search_backend.get(Unit) is TrigramSearchBackend
+
+
+@pytest.mark.django_db
+def test_get_units_trigram_search(units_text_searches, tp0):
+    search = units_text_searches
+    for store in tp0.stores.all():
+        StoreTrigrams(store).index()
+    units = Unit.objects.filter(store__translation_project=tp0)
+    live_units = Unit.objects.live().filter(store__translation_project=tp0)
+    for qs in [units, units.none(), live_units]:
+        expected = UnitTextSearch(qs).search(
+            search["text"], search["sfields"],
+            search["exact"], search["case"])
+        result = UnitTrigramSearch(qs).search(
+            search["text"], search["sfields"],
+            search["exact"], search["case"])
+        assert (
+            list(result.order_by("pk"))
+            == list(expected.order_by("pk")))
+
+
+@pytest.mark.django_db
+def test_unit_trigram_index(settings, store0):
+    settings.POOTLE_SEARCH_BACKEND = "pootle_word.search.TrigramSearchBackend"
+    unit = store0.units.first()
+    unit.target = "Some indexable text"
+    unit.save()
+    target_trigrams = set(
+        unit.trigrams.filter(
+            field=UnitTrigrams.search_fields.index("target_f")).values_list(
+                "trigram", flat=True))
+    assert target_trigrams == TextTrigrams("Some indexable text").trigrams
+    assert "ind" in target_trigrams
+    assert (
+        list(UnitTrigramSearch(store0.units).search("INDEXABLE", ["target"]))
+        == [unit])
+    unit.target = "Some other text"
+    unit.save()
+    assert not unit.trigrams.filter(trigram="ind").exists()
+    assert not UnitTrigramSearch(store0.units).search("indexable", ["target"])
+
+
+def _search_backend_kwargs(tp, **kwargs):
+    search_kwargs = {
+        "language_code": tp.language.code,
+        "project_code": tp.project.code,
+        "dir_path": "",
+        "filename": "",
+        "count": 9,
+        "filter": "all",
+        "category": None,
+        "checks": None,
+        "modified-since": None,
+        "month": None,
+        "search": None,
+        "sfields": None,
+        "soptions": [],
+        "sort_by": None,
+        "sort_on": "units"}
+    search_kwargs.update(kwargs)
+    return search_kwargs
+
+
+@pytest.mark.django_db
+def test_unit_search_backend_cached_results(tp0, admin):
+    kwargs = _search_backend_kwargs(tp0, user=admin)
+    backend = DBSearchBackend(admin, **kwargs)
+    assert backend.revision_context == tp0.directory
+    assert backend.cache_key
+    uids = list(backend.results.values_list("pk", flat=True))
+    assert backend.result_uids == uids
+    total, start, end, result = backend.search()
+    assert total == len(uids)
+    assert result == uids[:18]
+
+    # other searches are cached separately
+    other_backend = DBSearchBackend(
+        admin, **_search_backend_kwargs(tp0, user=admin, filter="translated"))
+    assert other_backend.cache_key != backend.cache_key
+
+    # updating the units without bumping the revision is not seen
+    unit = Unit.objects.get(pk=uids[0])
+    Unit.objects.filter(pk=unit.pk).update(state=-100)
+    backend = DBSearchBackend(admin, **kwargs)
+    assert backend.search()[0] == len(uids)
+    assert backend.get_all_uids() == uids
+
+    # saving the unit updates the revision and so the results
+    unit.refresh_from_db()
+    unit.save()
+    backend = DBSearchBackend(admin, **kwargs)
+    total, start, end, result = backend.search()
+    assert total == len(uids) - 1
+    assert unit.pk not in backend.get_all_uids()
+    assert result == uids[1:19]
@@ -49,6 +49,8 @@ MIDDLEWARE = [
     #: Must be early in the response cycle (close to bottom)
     'pootle.middleware.captcha.CaptchaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    #: Coalesces revision updates, must be closest to the view
+    'pootle.middleware.revisions.CoalesceRevisionsMiddleware',
 ]
 
 # Using the only Redis DB for testing
@@ -245,3 +245,55 @@ def test_get_next_slice(client, request_users):
 
     assert uids3 == list(
         qs[start:end].values_list("pk", flat=True))
+
+
+@pytest.mark.django_db
+def test_get_next_slice_cursor(client, admin):
+    client.login(username=admin.username, password="admin")
+    qs = Unit.objects.get_translatable(
+        user=admin).order_by("store__pootle_path", "index")
+    uids = list(qs[:18].values_list("pk", flat=True))
+
+    resp = client.get(
+        "/xhr/units/",
+        dict(
+            filter="all",
+            path="/",
+            offset=18,
+            cursor=uids[-1],
+            total=1000),
+        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+    result = json.loads(resp.content)
+
+    next_uids = []
+    for group in result["unitGroups"]:
+        for group_data in group.values():
+            for unit in group_data["units"]:
+                next_uids.append(unit["id"])
+
+    # the total is passed back without counting the results again
+    assert result["total"] == 1000
+    assert result["start"] == 18
+    assert result["end"] == 36
+    assert next_uids == list(qs[18:36].values_list("pk", flat=True))
+
+    # units before the cursor dont affect the next slice
+    for unit in Unit.objects.filter(id__in=uids[:5]):
+        unit.makeobsolete()
+        unit.save()
+    resp = client.get(
+        "/xhr/units/",
+        dict(
+            filter="all",
+            path="/",
+            offset=18,
+            cursor=uids[-1]),
+        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+    result = json.loads(resp.content)
+    cursor_uids = []
+    for group in result["unitGroups"]:
+        for group_data in group.values():
+            for unit in group_data["units"]:
+                cursor_uids.append(unit["id"])
+    assert result["total"] == qs.count()
+    assert cursor_uids == next_uids